@@ -1,94 +1,126 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import re
 
+from kobis_table import read_boxoffice_table
+from storage import replace_years, write_frame
+
+# =========================
+# 설정
+# =========================
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
-all_years_df = []
-
-def to_int(series: pd.Series) -> pd.Series:
-    """'1,234,567' 같은 문자열을 int로 변환"""
-    return pd.to_numeric(series.astype(str).str.replace(",", ""), errors="coerce")
-
-for year in range(2015, 2026):
-    file_path = DATA_DIR / f"KOBIS_연도별박스오피스_{year}.xls"
+# 연도별 박스오피스 원본 파일 (KOBIS_연도별박스오피스_2015.xls ...)
+YEAR_FILE_GLOB = "KOBIS_연도별박스오피스_*.xls"
+YEAR_FILE_PATTERN = re.compile(r"KOBIS_연도별박스오피스_(\d{4})\.xls$")
+
+TOP_N = 30
+
+# 다음 단계로 넘기는 건 parquet, csv는 사람이 보는 용도
+OUTPUT_FILE = DATA_DIR / "boxoffice_top30_2015_2025.parquet"
+OUTPUT_CSV = DATA_DIR / "boxoffice_top30_2015_2025.csv"
+
+# ✅ 연도별 파일을 프로세스 풀에서 병렬로 파싱 (False면 기존처럼 순차 처리)
+PARALLEL = True
+MAX_WORKERS = None   # None이면 CPU 개수만큼
+
+def find_year_files(data_dir: Path) -> list[tuple[int, Path]]:
+    """
+    data 폴더에서 연도별 박스오피스 파일을 찾아 (연도, 경로) 리스트로 반환 (연도 오름차순)
+    """
+    found = []
+    for path in data_dir.glob(YEAR_FILE_GLOB):
+        m = YEAR_FILE_PATTERN.search(path.name)
+        if m:
+            found.append((int(m.group(1)), path))
+    return sorted(found)
+
+def make_year_top30(year: int, file_path: Path) -> pd.DataFrame:
+    """
+    연도별 박스오피스 파일 1개를 읽어서 관객수 기준 Top30 DataFrame을 반환
+    (프로세스 풀 워커에서 그대로 호출되므로 모듈 최상위 함수로 둠)
+    """
     print("처리 중:", file_path)
 
-    # 1) HTML 테이블 읽기 (파일 안의 모든 table을 리스트로 반환)
-    tables = pd.read_html(file_path, encoding="utf-8")  # 인코딩은 필요시 cp949로 바꿔봐
-
-    # 2) 보통 첫 번째 테이블이 본문인 경우가 많아서 일단 tables[0] 사용
-    #    만약 컬럼이 이상하면 아래 "테이블 선택" 로직을 켜면 됨
-    df = tables[0]
-
-    # 3) 컬럼명 정리 (KOBIS 표 컬럼명에 맞춰 통일)
-    #    실제 컬럼명이 조금 다를 수 있으니 여기서 맞춰주면 됨
-    df = df.rename(columns={
-        "영화명": "movieNm",
-        "개봉일": "openDt",
-        "관객수": "audiAcc",
-        "매출액": "salesAcc",
-        "스크린수": "scrnCnt",
-        "순위": "rank"
-    })
-
-    # 4) 필수 컬럼 체크 (없으면 테이블이 잘못 선택된 것)
-    required = {"movieNm", "openDt", "audiAcc"}
-    if not required.issubset(df.columns):
-        # ✅ 테이블이 여러 개인 경우: 필요한 컬럼이 있는 테이블을 찾아서 선택
-        picked = None
-        for t in tables:
-            t2 = t.rename(columns={
-                "영화명": "movieNm",
-                "개봉일": "openDt",
-                "관객수": "audiAcc",
-                "매출액": "salesAcc",
-                "스크린수": "scrnCnt",
-                "순위": "rank"
-            })
-            if required.issubset(t2.columns):
-                picked = t2
-                break
-        if picked is None:
-            raise ValueError(f"{file_path}에서 박스오피스 테이블을 찾지 못함. 컬럼들: {list(df.columns)}")
-        df = picked
-
-    # 5) 숫자 컬럼들을 숫자로 변환
-    df["audiAcc"] = to_int(df["audiAcc"])
-    if "salesAcc" in df.columns:
-        df["salesAcc"] = to_int(df["salesAcc"])
-    else:
-        df["salesAcc"] = pd.NA
+    # 1) 박스오피스 테이블만 스트리밍으로 읽기
+    #    (영화명/개봉일/관객수 헤더가 있는 첫 테이블을 찾으면 거기서 멈추고,
+    #     '1,234,567' 같은 숫자는 읽으면서 바로 숫자로 변환됨)
+    df = read_boxoffice_table(file_path)
 
-    if "scrnCnt" in df.columns:
-        df["scrnCnt"] = to_int(df["scrnCnt"])
-    else:
-        df["scrnCnt"] = pd.NA
+    # 2) 없는 선택 컬럼은 결측으로 채움
+    for c in ["salesAcc", "scrnCnt"]:
+        if c not in df.columns:
+            df[c] = pd.NA
 
-    # 6) 관객수 기준 Top30 자르기
-    df_top30 = df.sort_values("audiAcc", ascending=False).head(30).copy()
+    # 3) 관객수 기준 Top30 자르기
+    df_top30 = df.sort_values("audiAcc", ascending=False).head(TOP_N).copy()
 
-    # 7) 집계연도 컬럼 추가
+    # 4) 집계연도 컬럼 추가
     df_top30["year"] = year
 
-    # 8) 필요한 컬럼만 정리 (원하면 더 남겨도 됨)
+    # 5) 필요한 컬럼만 정리 (원하면 더 남겨도 됨)
     keep = ["year", "movieNm", "openDt", "salesAcc", "audiAcc", "scrnCnt"]
     if "rank" in df_top30.columns:
         keep.insert(1, "rank")
 
-    all_years_df.append(df_top30[keep])
+    return df_top30[keep]
 
-# 9) 11개 연도 Top30 합치기 → 330행
-final_df = pd.concat(all_years_df, ignore_index=True)
+def build_top30(year_files: list[tuple[int, Path]], *, parallel: bool = PARALLEL) -> pd.DataFrame:
+    """
+    연도별 Top30을 만들어 연도 순서대로 합친다.
+    parallel=True면 연도마다 별도 프로세스에서 파싱 (결과 순서는 입력 순서 그대로 유지)
+    """
+    years = [year for year, _ in year_files]
+    paths = [path for _, path in year_files]
 
-# 10) 저장
-output_xlsx = DATA_DIR / "boxoffice_top30_2015_2025.xlsx"
-output_csv = DATA_DIR / "boxoffice_top30_2015_2025.csv"
+    if parallel and len(year_files) > 1:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            all_years_df = list(pool.map(make_year_top30, years, paths))
+    else:
+        all_years_df = [make_year_top30(year, path) for year, path in year_files]
+
+    return pd.concat(all_years_df, ignore_index=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="연도별 박스오피스 Top30 만들기")
+    parser.add_argument(
+        "--year",
+        type=int,
+        nargs="+",
+        dest="years",
+        help="이 연도만 다시 만들어서 기존 결과 파일의 해당 연도만 교체 (없던 연도면 추가)",
+    )
+    return parser.parse_args()
+
+def main(years: list[int] | None = None):
+    year_files = find_year_files(DATA_DIR)
+    if years is not None:
+        year_files = [(year, path) for year, path in year_files if year in years]
+    if not year_files:
+        raise FileNotFoundError(f"{DATA_DIR}에 {YEAR_FILE_GLOB} 파일이 없어요 (대상 연도: {years or '전체'})")
+
+    print("대상 연도:", [year for year, _ in year_files])
+
+    # 1) 연도별 Top30 합치기 (2015~2025면 11개 연도 → 330행)
+    final_df = build_top30(year_files)
+
+    # 2) 저장
+    if years is None:
+        write_frame(final_df, OUTPUT_FILE)
+    else:
+        # ✅ 연도 단위 갱신: 나머지 연도는 다시 파싱하지 않고 기존 결과 그대로 둠
+        final_df = replace_years(final_df, OUTPUT_FILE, years)
+    final_df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
 
-final_df.to_excel(output_xlsx, index=False)
-final_df.to_csv(output_csv, index=False, encoding="utf-8-sig")
+    print(f"✅ 완료: {OUTPUT_FILE} 생성")
+    print("총 행 개수:", len(final_df))
+    print(final_df.head())
 
-print(f"✅ 완료: {output_xlsx} 생성")
-print("총 행 개수:", len(final_df))
-print(final_df.head())
+# ✅ 프로세스 풀은 워커가 이 파일을 다시 import하므로 메인 가드가 꼭 필요 (특히 Windows)
+if __name__ == "__main__":
+    main(years=parse_args().years)
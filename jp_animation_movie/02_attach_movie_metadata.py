@@ -1,106 +1,129 @@
 from __future__ import annotations
 
-import re
-import time
+import argparse
+import asyncio
+import json
+import os
+from contextlib import nullcontext
 from pathlib import Path
 
 import pandas as pd
-import requests
+
+from api_cache import DAY, ApiCache
+from kobis_api import KOBIS_BASE_URL, KobisClient
+from kobis_catalog import MovieCatalog, sync_years
+from kobis_quota import KeyPool, QuotaExceeded
+from kobis_transport import CircuitBreaker, KobisRequestError, KobisUnavailable
+from movie_text import clean_movieNm, clean_movieNm_series, join_alt, norm_openDt_series
+from storage import read_frame, replace_years, write_frame
+from title_match import NgramIndex, pick_candidate, title_variants
 
 # =========================
 # 설정
 # =========================
 KOBIS_KEY = "d98ec60f84b6fde17b49119958d77bb6"  # 네 키 (나중에 .env로 빼는 게 베스트)
 
+# ✅ 여러 키를 넣으면 키별 일일 한도를 세면서 돌아가며 사용
+KOBIS_KEYS = [KOBIS_KEY]
+DAILY_QUOTA_PER_KEY = 3000   # KOBIS 기본 일일 호출 한도
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
-INPUT_FILE = DATA_DIR / "boxoffice_top30_2015_2025.xlsx"
-OUTPUT_FILE = DATA_DIR / "boxoffice_top30_with_movieinfo.xlsx"
+INPUT_FILE = DATA_DIR / "boxoffice_top30_2015_2025.parquet"
+OUTPUT_FILE = DATA_DIR / "boxoffice_top30_with_movieinfo.parquet"
 FAIL_LOG_FILE = DATA_DIR / "movieCd_match_failed.csv"
 
-API_SLEEP = 0.12
-TIMEOUT = 10
-
-SEARCH_URL = "https://kobis.or.kr/kobisopenapi/webservice/rest/movie/searchMovieList.json"
-INFO_URL = "https://kobis.or.kr/kobisopenapi/webservice/rest/movie/searchMovieInfo.json"
-
-session = requests.Session()
-
-# =========================
-# 유틸
-# =========================
-def norm_openDt(openDt: str) -> str:
-    digits = re.sub(r"\D", "", str(openDt))
-    return digits[:8]
-
-def clean_movieNm(name: str) -> str:
-    s = str(name).replace("\xa0", " ").strip()
-    s = re.sub(r"\s+", " ", s)
-    s = s.replace("\u200b", "").replace("\ufeff", "")
-    return s
-
-def call_json(url: str, params: dict) -> dict:
-    r = session.get(url, params=params, timeout=TIMEOUT)
-    r.raise_for_status()
-    data = r.json()
-    return data
+# ✅ API 호출 제한 (예전엔 호출마다 time.sleep(0.12) → 초당 약 8회)
+API_CONCURRENCY = 8       # 동시에 보내는 요청 수
+API_RATE_PER_SEC = 8.0    # 초당 호출 수 상한 (토큰 버킷)
+TIMEOUT = 5               # 시도 1번당 제한 시간 (느린 응답은 끊고 재시도 → 꼬리 지연 줄이기)
+
+# ✅ 일시적 오류 재시도 / 서킷 브레이커
+API_MAX_RETRIES = 3             # 실패 시 재시도 횟수 (지수 백오프 + 지터)
+BREAKER_FAILURES = 5            # 연속 이만큼 실패하면 잠깐 멈춤
+BREAKER_COOLDOWN = 15.0         # 멈추는 시간 (초)
+
+# ✅ 실행 간 공유되는 API 응답 캐시 (같은 영화는 다음 실행부터 호출 안 함)
+API_CACHE_FILE = DATA_DIR / ".cache" / "kobis_api.sqlite"
+API_CACHE_TTL = 30 * DAY           # 정상 결과 유지 기간
+API_CACHE_NEGATIVE_TTL = 1 * DAY   # 못 찾은 결과 유지 기간
+
+# 키별 오늘 사용량 기록 (여러 번 나눠 돌려도 같은 날이면 이어서 셈)
+QUOTA_FILE = DATA_DIR / ".cache" / "kobis_quota.sqlite"
+
+# ✅ 체크포인트 (중간에 죽어도 --resume으로 이어서 실행)
+# 조회가 끝난 (영화명, 개봉일)마다 한 줄씩 추가만 하는 저널 파일
+CHECKPOINT_FILE = DATA_DIR / ".cache" / "movieinfo_checkpoint.jsonl"
+CHECKPOINT_EVERY = 10   # 이 개수마다 디스크에 확실히 기록 (fsync)
+
+# ✅ genres / nations를 어디서 가져올지
+#  - "search": searchMovieList 후보에 딸려오는 genreAlt / nationAlt를 그대로 사용하고,
+#              비어 있을 때만 searchMovieInfo를 추가로 호출 (API 호출 약 절반)
+#  - "info"  : 예전처럼 매칭된 영화마다 항상 searchMovieInfo 호출
+METADATA_SOURCE = "search"
+
+# ✅ movieCd 매칭 방식
+#  - "api"    : 행(고유 영화)마다 searchMovieList 검색
+#  - "catalog": 필요한 개봉연도의 목록을 한 번에 받아 로컬 카탈로그에서 매칭
+#               (카탈로그에 없을 때만 CATALOG_API_FALLBACK이면 개별 검색)
+MATCH_SOURCE = "api"
+CATALOG_FILE = DATA_DIR / ".cache" / "kobis_catalog.sqlite"
+CATALOG_API_FALLBACK = True
+
+# 로컬 가짜 서버로 테스트할 땐 여기만 바꾸면 됨
+# (`python mock_kobis_server.py serve` 띄우고 "http://127.0.0.1:8765")
+API_BASE_URL = KOBIS_BASE_URL
 
 # =========================
 # 1) movieCd 찾기
 # =========================
-def find_movieCd(movieNm: str, openDt_norm: str) -> str:
+async def find_movie(client: KobisClient, movieNm: str, openDt_norm: str) -> dict:
+    """
+    searchMovieList에서 가장 잘 맞는 후보 1개를 반환 (못 찾으면 빈 dict)
+    후보에는 movieCd 외에 genreAlt / nationAlt / repNationNm 등이 같이 들어 있음
+    """
     movieNm = clean_movieNm(movieNm)
     year = openDt_norm[:4] if len(openDt_norm) >= 4 else ""
 
-    params = {
-        "key": KOBIS_KEY,
-        "movieNm": movieNm,
-        "curPage": 1,
-        "itemPerPage": 20,
-    }
-
-    # ✅ KOBIS는 openStartDt/openEndDt를 YYYY(연도)로 받음
-    if year:
-        params["openStartDt"] = year
-        params["openEndDt"] = year
-
-    data = call_json(SEARCH_URL, params)
+    data = await client.search_movie_list(movieNm, year=year)
 
     # faultInfo면 실패
     if "faultInfo" in data:
-        return ""
+        return {}
 
+    # 완전일치 우선, 없으면 퍼지 점수(제목 n-gram 유사도 + 개봉일 근접도)로 고름
+    # (예전처럼 lst[0]을 무조건 집지 않음 → 기준 미달이면 실패 로그로)
     lst = data.get("movieListResult", {}).get("movieList", []) or []
-    if not lst:
-        # 연도 필터가 너무 빡센 케이스 대비: 필터 없이 1회 재시도
-        params2 = {
-            "key": KOBIS_KEY,
-            "movieNm": movieNm,
-            "curPage": 1,
-            "itemPerPage": 20,
-        }
-        data2 = call_json(SEARCH_URL, params2)
+    movie = pick_candidate(movieNm, openDt_norm, lst)
+    if not movie and year:
+        # 연도 필터가 너무 빡센 케이스 대비 (후보가 없거나, 있어도 맞는 게 없을 때): 필터 없이 1회 재시도
+        data2 = await client.search_movie_list(movieNm)
         if "faultInfo" in data2:
-            return ""
+            return {}
         lst = data2.get("movieListResult", {}).get("movieList", []) or []
-        if not lst:
-            return ""
+        movie = pick_candidate(movieNm, openDt_norm, lst)
+    return movie
 
-    # 완전일치 우선
-    exact = next((m for m in lst if clean_movieNm(m.get("movieNm", "")) == movieNm), None)
-    picked = exact or lst[0]
-    return picked.get("movieCd", "") or ""
+def metadata_from_search(movie: dict) -> tuple[str, str] | None:
+    """
+    searchMovieList 후보에서 (genres_csv, nations_csv)를 바로 뽑는다.
+    장르나 국적이 비어 있으면 판단이 애매하니 None → searchMovieInfo로 다시 조회
+    """
+    genres_csv = join_alt(movie.get("genreAlt", ""))
+    nations_csv = join_alt(movie.get("nationAlt", "")) or join_alt(movie.get("repNationNm", ""))
+    if not genres_csv or not nations_csv:
+        return None
+    return genres_csv, nations_csv
 
 # =========================
 # 2) movieInfo 가져오기 (genres + nations)
 # =========================
-def fetch_movieinfo(movieCd: str) -> tuple[str, str]:
+async def fetch_movieinfo(client: KobisClient, movieCd: str) -> tuple[str, str]:
     """
     return: (genres_csv, nations_csv)
     """
-    params = {"key": KOBIS_KEY, "movieCd": movieCd}
-    data = call_json(INFO_URL, params)
+    data = await client.movie_info(movieCd)
 
     if "faultInfo" in data:
         return "", ""
@@ -115,87 +138,430 @@ def fetch_movieinfo(movieCd: str) -> tuple[str, str]:
 
     return genres_csv, nations_csv
 
+def make_client() -> KobisClient:
+    keys = KeyPool(KOBIS_KEYS, daily_quota=DAILY_QUOTA_PER_KEY, usage_file=QUOTA_FILE)
+    return KobisClient(
+        keys,
+        base_url=API_BASE_URL,
+        concurrency=API_CONCURRENCY,
+        rate_per_sec=API_RATE_PER_SEC,
+        timeout=TIMEOUT,
+        max_retries=API_MAX_RETRIES,
+        breaker=CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN),
+    )
+
+async def fetch_info_cached(client: KobisClient, cache: ApiCache, movieCd: str) -> tuple[str, str]:
+    info = cache.get_info(movieCd)
+    if info is None:
+        info = await fetch_movieinfo(client, movieCd)
+        cache.put_info(movieCd, *info)
+    return info
+
+def remember_search_metadata(cache: ApiCache, movie: dict, movieCd: str) -> None:
+    """
+    검색/카탈로그 결과에 장르/국적이 충분하면 그걸로 movieInfo 캐시를 채움
+    → 이후 fetch_info_cached가 캐시에서 바로 꺼내서 상세 조회를 건너뜀
+    """
+    if movie and movieCd and METADATA_SOURCE == "search" and cache.get_info(movieCd) is None:
+        meta = metadata_from_search(movie)
+        if meta is not None:
+            cache.put_info(movieCd, *meta)
+
 # =========================
-# 메인
+# 체크포인트 저널
 # =========================
-def main():
-    df = pd.read_excel(INPUT_FILE)
+def load_checkpoint(path: Path) -> dict[tuple[str, str], tuple[str, str, str]]:
+    """
+    저널에 기록된 조회 결과를 읽는다.
+    마지막 줄이 쓰다 만 상태(강제 종료)일 수 있어서 깨진 줄은 건너뜀
+    """
+    done: dict[tuple[str, str], tuple[str, str, str]] = {}
+    if not path.exists():
+        return done
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[(rec["movieNm"], rec["openDt_norm"])] = (rec["movieCd"], rec["genres"], rec["nations"])
+    return done
+
+def append_checkpoint(journal, key: tuple[str, str], value: tuple[str, str, str], *, sync: bool) -> None:
+    movieCd, genres_csv, nations_csv = value
+    journal.write(json.dumps({
+        "movieNm": key[0],
+        "openDt_norm": key[1],
+        "movieCd": movieCd,
+        "genres": genres_csv,
+        "nations": nations_csv,
+    }, ensure_ascii=False) + "\n")
+    if sync:
+        journal.flush()
+        os.fsync(journal.fileno())
+
+def write_csv_atomic(df: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")
+    tmp.replace(path)
 
-    # 혹시 한글 컬럼이면 통일
-    df = df.rename(columns={"영화명": "movieNm", "개봉일": "openDt"})
+# =========================
+# 3) 고유 (영화명, 개봉일) 단위로 동시에 조회
+# =========================
+async def resolve_all(
+    keys: list[tuple[str, str]],
+    *,
+    journal=None,
+    match_source: str = MATCH_SOURCE,
+    errors: dict[tuple[str, str], str] | None = None,
+) -> dict[tuple[str, str], tuple[str, str, str]]:
+    """
+    return: {(movieNm, openDt_norm): (movieCd, genres_csv, nations_csv)}
+
+    영화마다 검색 → 상세 조회를 하나의 코루틴으로 묶고, 여러 영화를 동시에 진행한다.
+    (동시 요청 수 / 초당 호출 수는 KobisClient가 제한)
+    journal이 주어지면 끝난 결과를 바로바로 저널에 추가 기록한다.
+    match_source="catalog"면 개봉연도 목록을 먼저 동기화하고 로컬에서 매칭한다.
+
+    keys는 우선순위 순서(중요한 영화 먼저)로 주면 그 순서대로 요청이 나간다.
+    오늘 API 한도를 다 쓰거나 재시도해도 KOBIS가 응답이 없으면
+    그 키는 결과에서 빠짐 → 나중에 --resume으로 이어서
+    KOBIS가 요청 자체를 거부하면(401/404 같은 4xx) 그 영화만 못 찾은 걸로 하고 계속 진행
+    (errors를 주면 그런 키 → 오류 메시지를 채워 줌, 체크포인트엔 안 남겨서 --resume 때 다시 시도)
+    """
+    results: dict[tuple[str, str], tuple[str, str, str]] = {}
+    info_tasks: dict[str, asyncio.Task] = {}  # movieCd -> 상세 조회 task (같은 영화 중복 호출 방지)
+
+    use_catalog = match_source == "catalog"
+
+    with ApiCache(API_CACHE_FILE, ttl=API_CACHE_TTL, negative_ttl=API_CACHE_NEGATIVE_TTL) as cache, \
+         (MovieCatalog(CATALOG_FILE) if use_catalog else nullcontext()) as catalog:
+        async with make_client() as client:
+            remaining = client.keys.remaining()
+            if remaining is not None:
+                print(f"오늘 남은 API 호출 한도: {remaining}회 (키 {len(client.keys.keys)}개)")
+
+            if use_catalog:
+                years = [openDt_norm[:4] for _, openDt_norm in keys if len(openDt_norm) >= 4]
+                # 한도 초과 / 장애로 못 받은 연도는 그 연도 영화만 개별 검색(또는 미룸)으로
+                unsynced = await sync_years(client, catalog, years)
+                # 완전일치가 없을 때 쓸 퍼지 인덱스 (카탈로그 전체, 메모리에서만 검색)
+                catalog_index = NgramIndex(catalog.all_movies())
+
+            async def resolve(key: tuple[str, str]):
+                try:
+                    return key, await resolve_one(key)
+                except (QuotaExceeded, KobisUnavailable):
+                    return key, None   # 한도 초과 / KOBIS 장애 → 다음으로 미룸
+                except KobisRequestError as e:
+                    if errors is not None:
+                        errors[key] = str(e)
+                    return key, ("", "", "")   # 이 영화 요청만 거부됨 → 실패 로그로
+
+            async def resolve_one(key: tuple[str, str]) -> tuple[str, str, str]:
+                # 카탈로그 매칭은 로컬이라 캐시 없이 매번 새로 함 (매칭 규칙을 바꿔도 바로 반영)
+                from_catalog = use_catalog and key[1][:4] not in unsynced
+                if use_catalog and not from_catalog and not CATALOG_API_FALLBACK:
+                    raise KobisUnavailable(f"{key[1][:4]}년 카탈로그 동기화 실패")   # → 미뤘다가 --resume
+                movie = (catalog.find(*key) or catalog_index.best(*key)) if from_catalog else {}
+                if movie:
+                    movieCd = movie["movieCd"]
+                elif from_catalog and not CATALOG_API_FALLBACK:
+                    movieCd = ""
+                else:
+                    movieCd = cache.get_movieCd(*key)
+                    if movieCd is None:
+                        movie = await find_movie(client, *key)
+                        movieCd = movie.get("movieCd", "") or ""
+                        cache.put_movieCd(*key, movieCd)
+
+                remember_search_metadata(cache, movie, movieCd)
+                if not movieCd:
+                    return "", "", ""
+                if movieCd not in info_tasks:
+                    info_tasks[movieCd] = asyncio.ensure_future(fetch_info_cached(client, cache, movieCd))
+                genres_csv, nations_csv = await info_tasks[movieCd]
+                return movieCd, genres_csv, nations_csv
+
+            # 워커 concurrency개가 우선순위 순서대로 키를 하나씩 가져감
+            # (코루틴을 한꺼번에 만들어 as_completed에 넘기면 시작 순서가 섞여서 한도가 모자랄 때 중요한 영화가 밀림)
+            pending = iter(keys)
+            total = len(keys)
+            done = 0
+            deferred = 0
+
+            async def worker() -> None:
+                nonlocal done, deferred
+                for key in pending:
+                    key, value = await resolve(key)
+                    done += 1
+                    if value is None:
+                        deferred += 1
+                        continue
+                    results[key] = value
+
+                    if journal is not None and not (errors and key in errors):
+                        append_checkpoint(journal, key, value, sync=(done % CHECKPOINT_EVERY == 0))
+
+                    # ✅ 진행상황 출력 (10개 단위 + 마지막)
+                    if done % 10 == 0 or done == total:
+                        print(f"{done}/{total} 불러오기 완료")
+
+            await asyncio.gather(*[worker() for _ in range(min(client.concurrency, total))])
+
+            if deferred:
+                print(f"⚠️ API 한도 초과/KOBIS 오류로 {deferred}건은 다음으로 미룸")
+            print(client.report())
+
+    return results
 
-    must = {"movieNm", "openDt"}
-    if not must.issubset(df.columns):
-        raise ValueError(f"필수 컬럼이 없어요. 필요: {must}, 현재: {list(df.columns)}")
+# =========================
+# 4) 실패 로그만 다시 매칭
+# =========================
+async def search_variants(client: KobisClient, movieNm: str, openDt_norm: str) -> list[dict]:
+    """
+    제목 변형 × (연도 필터 있음/없음) 조합을 한꺼번에 검색해서 후보를 모은다 (movieCd 기준 중복 제거)
+    """
+    year = openDt_norm[:4] if len(openDt_norm) >= 4 else ""
+    queries = [(v, y) for v in title_variants(movieNm) for y in dict.fromkeys([year, ""])]
+    responses = await asyncio.gather(*[client.search_movie_list(v, year=y) for v, y in queries])
+
+    candidates: dict[str, dict] = {}
+    for data in responses:
+        if "faultInfo" in data:
+            continue
+        for m in data.get("movieListResult", {}).get("movieList", []) or []:
+            if m.get("movieCd"):
+                candidates.setdefault(m["movieCd"], m)
+    return list(candidates.values())
+
+async def re_resolve(keys: list[tuple[str, str]]) -> dict[tuple[str, str], tuple[str, str, str]]:
+    """
+    실패했던 (영화명, 개봉일)만 다른 전략으로 다시 찾기 (영화끼리는 동시에 진행)
+    1) 로컬 카탈로그가 있으면 퍼지 매칭 (API 호출 없음)
+    2) 제목 변형 + 연도 필터 없이 재검색한 후보 전체에서 완전일치/퍼지 매칭
+    예전 실패 캐시는 무시하고, 새로 찾은 결과는 캐시에 덮어씀
+    """
+    results: dict[tuple[str, str], tuple[str, str, str]] = {}
+    catalog_index = None
+    if CATALOG_FILE.exists():
+        with MovieCatalog(CATALOG_FILE) as catalog:
+            catalog_index = NgramIndex(catalog.all_movies())
+
+    with ApiCache(API_CACHE_FILE, ttl=API_CACHE_TTL, negative_ttl=API_CACHE_NEGATIVE_TTL) as cache:
+        async with make_client() as client:
+
+            async def retry(key: tuple[str, str]):
+                try:
+                    return await retry_one(key)
+                except (QuotaExceeded, KobisUnavailable, KobisRequestError):
+                    return key, ("", "", "")   # 한도 초과 / KOBIS 장애 / 거부된 요청 → 실패 로그에 그대로 남김
+
+            async def retry_one(key: tuple[str, str]):
+                movie = catalog_index.best(*key) if catalog_index is not None else {}
+                if not movie:
+                    movie = pick_candidate(*key, await search_variants(client, *key))
+
+                movieCd = movie.get("movieCd", "") or ""
+                cache.put_movieCd(*key, movieCd)
+                if not movieCd:
+                    return key, ("", "", "")
+
+                remember_search_metadata(cache, movie, movieCd)
+                return key, (movieCd, *await fetch_info_cached(client, cache, movieCd))
+
+            for key, value in await asyncio.gather(*[retry(k) for k in keys]):
+                results[key] = value
+            print(client.report())
+
+    return results
+
+def retry_failed() -> None:
+    """
+    movieCd_match_failed.csv에 있는 행만 다시 매칭해서
+    기존 결과 파일(OUTPUT_FILE)의 해당 행만 고쳐 쓰고, 실패 로그도 남은 것만으로 갱신
+    """
+    if not FAIL_LOG_FILE.exists():
+        print("실패 로그가 없어요:", FAIL_LOG_FILE)
+        return
+
+    failed = pd.read_csv(FAIL_LOG_FILE, dtype=str, encoding="utf-8-sig").fillna("")
+    key_cols = ["movieNm", "openDt_norm"]
+    keys = list(failed[key_cols].drop_duplicates().itertuples(index=False, name=None))
+    if not keys:
+        print("다시 찾을 영화가 없어요")
+        return
 
-    df["movieNm"] = df["movieNm"].astype(str).apply(clean_movieNm)
-    df["openDt_norm"] = df["openDt"].apply(norm_openDt)
-
-    # 캐시(중복 호출 절감)
-    movieCd_cache: dict[tuple[str, str], str] = {}
-    info_cache: dict[str, tuple[str, str]] = {}  # movieCd -> (genres, nations)
-
-    movieCds, genres_list, nations_list = [], [], []
-    failed_rows = []
-
-    total = len(df)
-
-    for idx, (_, row) in enumerate(df.iterrows(), start=1):
-        key = (row["movieNm"], row["openDt_norm"])
-
-        # (A) movieCd
-        if key in movieCd_cache:
-            movieCd = movieCd_cache[key]
-        else:
-            movieCd = find_movieCd(row["movieNm"], row["openDt_norm"])
-            movieCd_cache[key] = movieCd
-            time.sleep(API_SLEEP)
-
-        movieCds.append(movieCd)
-
-        # (B) genres + nations
-        if not movieCd:
-            genres_list.append("")
-            nations_list.append("")
-            failed_rows.append({
-                "year": row.get("year", ""),
-                "movieNm": row["movieNm"],
-                "openDt": row["openDt"],
-                "openDt_norm": row["openDt_norm"],
-                "reason": "no_movieCd",
-            })
-        else:
-            if movieCd in info_cache:
-                genres_csv, nations_csv = info_cache[movieCd]
-            else:
-                genres_csv, nations_csv = fetch_movieinfo(movieCd)
-                info_cache[movieCd] = (genres_csv, nations_csv)
-                time.sleep(API_SLEEP)
-
-            genres_list.append(genres_csv)
-            nations_list.append(nations_csv)
-
-        # ✅ 진행상황 출력 (10개 단위 + 마지막)
-        if idx % 10 == 0 or idx == total:
-            print(f"{idx}/{total} 불러오기 완료")
-
-
-    df["movieCd"] = movieCds
-    df["genres"] = genres_list
-    df["nations"] = nations_list
+    print(f"실패 {len(keys)}건 재매칭 시작")
+    resolved = asyncio.run(re_resolve(keys))
 
+    fixed = pd.DataFrame(
+        [(*key, *value) for key, value in resolved.items() if value[0]],
+        columns=[*key_cols, "movieCd", "genres", "nations"],
+    )
+
+    # 결과 파일에서 고친 키의 행만 덮어쓰기
+    df = read_frame(OUTPUT_FILE)
+    df["openDt_norm"] = df["openDt_norm"].astype(str)
+    df = df.merge(fixed, on=key_cols, how="left", suffixes=("", "_fixed"))
+    for c in ["movieCd", "genres", "nations"]:
+        df[c] = df[c + "_fixed"].where(df[c + "_fixed"].notna(), df[c])
+    df = add_flags(df.drop(columns=["movieCd_fixed", "genres_fixed", "nations_fixed"]))
+
+    write_frame(df, OUTPUT_FILE)
+
+    still = failed.merge(fixed[key_cols], on=key_cols, how="left", indicator=True)
+    still = still.loc[still["_merge"] == "left_only"].drop(columns="_merge")
+    write_csv_atomic(still, FAIL_LOG_FILE)
+
+    print(f"✅ 재매칭 완료: {len(fixed)}/{len(keys)}건 해결, 남은 실패 {len(still)}건")
+
+# =========================
+# 메인
+# =========================
+def add_flags(df: pd.DataFrame) -> pd.DataFrame:
     # 파생 컬럼
     df["is_animation"] = df["genres"].fillna("").str.contains("애니메이션", na=False)
     df["is_japan"] = df["nations"].fillna("").str.contains("일본", na=False)
+    return df
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="박스오피스 Top30에 KOBIS 장르/국적 정보 붙이기")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="지난 실행의 체크포인트에 기록된 영화는 건너뛰고 이어서 조회",
+    )
+    parser.add_argument(
+        "--match-source",
+        choices=["api", "catalog"],
+        default=MATCH_SOURCE,
+        help="movieCd 매칭 방식 (api: 영화마다 검색 / catalog: 연도별 목록을 받아 로컬 매칭)",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="전체를 다시 돌리지 않고 실패 로그(movieCd_match_failed.csv)에 있는 영화만 다시 매칭",
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        nargs="+",
+        dest="years",
+        help="이 연도 행만 조회해서 결과 파일의 해당 연도만 교체 (없던 연도면 추가)",
+    )
+    return parser.parse_args()
+
+def attach_metadata(
+    df: pd.DataFrame,
+    *,
+    resume: bool = False,
+    match_source: str = MATCH_SOURCE,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    01 결과(Top30) DataFrame에 movieCd / genres / nations / is_animation / is_japan을 붙인다.
+    return: (결과 df, 실패 로그 df)  ← 파일 저장은 하지 않음 (main이나 메모리 파이프라인에서)
+    """
+    # 혹시 한글 컬럼이면 통일
+    df = df.rename(columns={"영화명": "movieNm", "개봉일": "openDt"})
 
-    df.to_excel(OUTPUT_FILE, index=False)
+    must = {"movieNm", "openDt"}
+    if not must.issubset(df.columns):
+        raise ValueError(f"필수 컬럼이 없어요. 필요: {must}, 현재: {list(df.columns)}")
 
-    failed_df = pd.DataFrame(failed_rows)
-    failed_df.to_csv(FAIL_LOG_FILE, index=False, encoding="utf-8-sig")
+    # 영화명/개봉일 정리는 Series 문자열 연산으로 한 번에
+    df["movieNm"] = clean_movieNm_series(df["movieNm"])
+    df["openDt_norm"] = norm_openDt_series(df["openDt"])
+
+    # 중복 (영화명, 개봉일)은 한 번만 조회 → 조회량은 전체 행 수가 아니라 고유 영화 수에 비례
+    # API 한도가 모자랄 때를 대비해 관객 수 많은 영화부터 조회
+    key_cols = ["movieNm", "openDt_norm"]
+    if "audiAcc" in df.columns:
+        priority = (
+            df.assign(_audi=pd.to_numeric(df["audiAcc"], errors="coerce"))
+              .groupby(key_cols, sort=False)["_audi"].max()
+              .sort_values(ascending=False, kind="stable")
+        )
+        keys = list(priority.index)
+    else:
+        keys = list(df[key_cols].drop_duplicates().itertuples(index=False, name=None))
+
+    # --resume이면 저널에 이미 있는 결과는 그대로 쓰고 나머지만 조회
+    resolved = load_checkpoint(CHECKPOINT_FILE) if resume else {}
+    todo = [k for k in keys if k not in resolved]
+    if resume:
+        print(f"체크포인트에서 {len(keys) - len(todo)}/{len(keys)}개 복원, 남은 {len(todo)}개 조회")
+
+    CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    errors: dict[tuple[str, str], str] = {}   # KOBIS가 거부한 요청(4xx) → 오류 메시지
+    with open(CHECKPOINT_FILE, "a" if resume else "w", encoding="utf-8") as journal:
+        resolved.update(asyncio.run(resolve_all(todo, journal=journal, match_source=match_source, errors=errors)))
+
+    # 조회 결과(고유 키 단위)를 원래 행에 merge로 붙이기
+    resolved_df = pd.DataFrame(
+        [(*key, *value) for key, value in resolved.items()],
+        columns=[*key_cols, "movieCd", "genres", "nations"],
+    )
+    df = (
+        df.drop(columns=["movieCd", "genres", "nations"], errors="ignore")
+          .merge(resolved_df, on=key_cols, how="left", validate="many_to_one", indicator=True)
+    )
+
+    # 한도 초과/KOBIS 장애로 못 한 행(merge 안 된 행)은 사유를 따로 남김
+    deferred = df["_merge"].eq("left_only")
+    df = df.drop(columns="_merge")
+    df[["movieCd", "genres", "nations"]] = df[["movieCd", "genres", "nations"]].fillna("")
+
+    failed_df = (
+        df.loc[df["movieCd"].eq(""), :]
+          .reindex(columns=["year", "movieNm", "openDt", "openDt_norm"])
+          .assign(reason="no_movieCd")
+    )
+    failed_df.loc[deferred[df["movieCd"].eq("")], "reason"] = "deferred"
+    if errors:
+        rejected = pd.Series(list(zip(failed_df["movieNm"], failed_df["openDt_norm"])), index=failed_df.index).isin(errors)
+        failed_df.loc[rejected, "reason"] = "request_error"
+        print(f"⚠️ KOBIS가 요청을 거부한 영화 {len(errors)}개는 실패 로그에 request_error로 남겼어요")
+
+    df = add_flags(df)
+
+    # 다 끝났으면 체크포인트는 정리 (미룬 게 있으면 다음 --resume을 위해 남겨 둠)
+    if deferred.any():
+        print(f"⚠️ {deferred.sum()}행은 API 한도/오류 때문에 미뤘어요. 나중에 --resume으로 이어서 실행하세요.")
+    else:
+        CHECKPOINT_FILE.unlink(missing_ok=True)
+
+    return df, failed_df
+
+def main(resume: bool = False, match_source: str = MATCH_SOURCE, years: list[int] | None = None) -> pd.DataFrame:
+    # years를 주면 그 연도 행만 조회해서 결과 파일의 해당 연도만 교체
+    # return: 저장한 실패 로그 (update_year.py가 미룬 연도를 확인할 때 씀)
+    df = read_frame(INPUT_FILE, years=years)
+    df, failed_df = attach_metadata(df, resume=resume, match_source=match_source)
+
+    # 결과 파일은 임시 파일에 쓰고 교체 (다 써지기 전에는 기존 파일 그대로)
+    if years is None:
+        write_frame(df, OUTPUT_FILE)
+    else:
+        df = replace_years(df, OUTPUT_FILE, years)
+        # 실패 로그도 다른 연도 기록은 그대로 두고 이번 연도만 교체
+        # (연도가 비어 있는 옛 기록도 있어서 숫자로 못 바꾸는 건 NaN → 그대로 남김, 빈칸도 빈칸 그대로 씀)
+        if FAIL_LOG_FILE.exists():
+            old = pd.read_csv(FAIL_LOG_FILE, dtype=str, encoding="utf-8-sig")
+            old = old[~pd.to_numeric(old["year"], errors="coerce").isin(years)]
+            failed_df = pd.concat([old, failed_df], ignore_index=True)
+
+    write_csv_atomic(failed_df, FAIL_LOG_FILE)
 
     print("✅ 완료:", OUTPUT_FILE)
     print("movieCd 매칭 실패 개수:", (df["movieCd"].fillna("") == "").sum())
     print("실패 로그:", FAIL_LOG_FILE)
+    return failed_df
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.retry_failed:
+        retry_failed()
+    else:
+        main(resume=args.resume, match_source=args.match_source, years=args.years)
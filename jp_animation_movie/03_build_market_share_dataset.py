@@ -1,19 +1,25 @@
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 import pandas as pd
 
+from covid_split import label_period
+from kobis_table import read_year_base_table
+from market_share import add_market_shares
+from storage import read_frame, replace_years, write_frame
+
 # =========================
 # 설정
 # =========================
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
-MOVIE_FILE = DATA_DIR / "boxoffice_top30_with_movieinfo.xlsx"
+MOVIE_FILE = DATA_DIR / "boxoffice_top30_with_movieinfo.parquet"
 YEAR_FILE  = DATA_DIR / "KOBIS_총_관객수_및_매출액_연도별.xls"
+OUTPUT_FILE = DATA_DIR / "analysis_master_df2.parquet"
 
-COVID_BEFORE_MAX = 2019   # <= 2019: 코로나 이전
-COVID_AFTER_MIN  = 2020   # >= 2024: 코로나 이후 
+# 코로나 전/후 기준 연도는 covid_split.py
 USE_YEAR_FROM = 2015
 
 # =========================
@@ -32,9 +38,13 @@ def fmt_int(s: pd.Series) -> pd.Series:
 # =========================
 # 로드
 # =========================
-def load_movies(path: Path) -> pd.DataFrame:
-    # 연도별 박스오피스 2015~2025 데이터
-    df = pd.read_excel(path)
+def load_movies(path: Path, years: list[int] | None = None) -> pd.DataFrame:
+    # 연도별 박스오피스 2015~2025 데이터 (years를 주면 그 연도만)
+    return prepare_movies(read_frame(path, years=years))
+
+def prepare_movies(df: pd.DataFrame) -> pd.DataFrame:
+    # 02 결과 DataFrame 정리 (파일에서 읽었든 메모리에서 바로 받았든 같은 처리)
+    df = df.copy()
 
     # 타입 정리
     df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
@@ -48,44 +58,25 @@ def load_movies(path: Path) -> pd.DataFrame:
     df = df.dropna(subset=["year", "salesAcc", "audiAcc"])
     df = df[df["year"] >= USE_YEAR_FROM].copy()
 
-    # period 라벨(네 기준을 정확히 반영)
-    df["period"] = pd.NA
-    df.loc[df["year"] <= COVID_BEFORE_MAX, "period"] = "코로나 이전"
-    df.loc[df["year"] >= COVID_AFTER_MIN,  "period"] = "코로나 이후"
+    # period 라벨(네 기준을 정확히 반영, 기준 연도는 covid_split.py)
+    df["period"] = label_period(df["year"])
     df = df.dropna(subset=["period"]).copy()
 
     return df
 
 def load_year_base(path: Path) -> pd.DataFrame:
     # 연도별 총 관객수 및 매출액 데이터
-    tables = pd.read_html(path)
-    dfy = tables[1].copy()
-
-    # MultiIndex -> 단일 컬럼
-    dfy.columns = [f"{a}_{b}" for (a, b) in dfy.columns]
-
-    year_base = (
-        dfy[["연도_연도", "전체_매출액", "전체_관객수"]]
-          .rename(columns={
-              "연도_연도": "year",
-              "전체_매출액": "total_sales",
-              "전체_관객수": "total_audience",
-          })
-          .copy()
-    )
+    # (2줄 헤더 중 '연도', '전체_매출액', '전체_관객수' 컬럼만 스트리밍으로 읽음)
+    year_base = read_year_base_table(path)
 
-    year_base["year"] = pd.to_numeric(year_base["year"], errors="coerce")
     year_base = year_base.dropna(subset=["year"])
     year_base["year"] = year_base["year"].astype(int)
 
-    year_base["total_sales"] = pd.to_numeric(year_base["total_sales"], errors="coerce")
-    year_base["total_audience"] = pd.to_numeric(year_base["total_audience"], errors="coerce")
-
     year_base = year_base[year_base["year"] >= USE_YEAR_FROM].copy()
     return year_base
 
 # df, dfy 데이터 합치기
-def build_df2(movies: pd.DataFrame, year_base: pd.DataFrame) -> pd.DataFrame:
+def build_df2(movies: pd.DataFrame, year_base: pd.DataFrame, *, market_shares: bool = True) -> pd.DataFrame:
     # 연도를 기준으로
     df2 = movies.merge(year_base, on="year", how="left")
 
@@ -98,23 +89,60 @@ def build_df2(movies: pd.DataFrame, year_base: pd.DataFrame) -> pd.DataFrame:
     df2["sales_share_pct"] = fmt_pct(df2["sales_share"])
     df2["audi_share_pct"]  = fmt_pct(df2["audi_share"])
 
+    # ✅ 애니 시장 / 국적별 시장 / 기간 전체 시장 기준 점유율도 같이 계산해서 저장
+    #    (04/05는 이 비율을 그대로 읽어서 씀, 연도만 바꿀 때는 replace_partition에서 따로)
+    if market_shares:
+        df2 = add_market_shares(df2)
+
     print(df2)
     return df2
 
-def main():
-    movies = load_movies(MOVIE_FILE)      # 파일2 결과
-    year_base = load_year_base(YEAR_FILE) # 연도별 전체 시장
-    df2 = build_df2(movies, year_base)    # 점유율 파생
+def replace_partition(part: pd.DataFrame, path: Path, years: list[int]) -> pd.DataFrame:
+    """
+    마스터에서 years 연도 행만 part로 교체
+    시장별 점유율 분모(기간 합)는 같은 기간의 다른 연도에도 걸쳐 있어서
+    바뀐 연도가 속한 기간의 행만 다시 계산 (다른 기간 행은 읽은 그대로)
+    return: 저장된 전체 마스터
+    """
+    try:
+        master = read_frame(path)
+    except FileNotFoundError:
+        master = part.iloc[0:0]
+
+    periods = label_period(pd.Series(years)).dropna().unique()
+    same_period = master[master["period"].isin(periods) & ~master["year"].isin(years)]
+    refreshed = add_market_shares(pd.concat([same_period, part], ignore_index=True))
+    return replace_years(refreshed, path, sorted(set(years) | set(same_period["year"])), base=master)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="점유율 분석용 마스터 데이터 만들기")
+    parser.add_argument(
+        "--year",
+        type=int,
+        nargs="+",
+        dest="years",
+        help="이 연도만 다시 계산해서 마스터의 해당 연도만 교체 (없던 연도면 추가)",
+    )
+    return parser.parse_args()
+
+def main(years: list[int] | None = None):
+    movies = load_movies(MOVIE_FILE, years)  # 파일2 결과
+    year_base = load_year_base(YEAR_FILE)    # 연도별 전체 시장
 
     # (선택이지만 강추) 폴더 없으면 생성
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 저장
-    output = DATA_DIR / "analysis_master_df2.xlsx"
-    df2.to_excel(output, index=False)
+    # 저장 (years를 주면 마스터에서 그 연도만 교체)
+    if years is None:
+        df2 = build_df2(movies, year_base)   # 점유율 파생 (연도별로 그 해 전체 시장 기준이라 연도끼리 독립)
+        write_frame(df2, OUTPUT_FILE)
+    else:
+        # 그 연도 행 × 그 연도 전체 시장 행만으로 점유율 계산 → 기간 단위 점유율은 교체하면서
+        part = build_df2(movies, year_base[year_base["year"].isin(years)], market_shares=False)
+        replace_partition(part, OUTPUT_FILE, years)
 
-    print(f"✅ 저장 완료: {output}")
+    print(f"✅ 저장 완료: {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    main()
+    main(years=parse_args().years)
 
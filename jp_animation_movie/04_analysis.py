@@ -3,18 +3,33 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 
+from covid_split import PERIOD_AFTER, PERIOD_BEFORE
+from share_cube import ShareCube
+from top_n import TopNIndex
+from uncertainty import compare_many
+from year_trend import YearTrend
+from market_share import MARKET_SHARE_COLUMNS, add_market_shares
+from master_codes import encode_master
+from storage import read_frame
+
 # =========================
 # 설정
 # =========================
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
-MASTER_FILE = DATA_DIR / "analysis_master_df2.xlsx"
+MASTER_FILE = DATA_DIR / "analysis_master_df2.parquet"
 
-COVID_BEFORE_MAX = 2019   # <= 2019: 코로나 이전
-COVID_AFTER_MIN  = 2020   # >= 2020: 코로나 이후
+# 코로나 전/후 기준 연도는 covid_split.py (다른 기준과 비교는 breakpoint_sweep.py)
 USE_YEAR_FROM = 2015
 
+# ✅ 신뢰구간 / p-value (uncertainty.py)
+BOOTSTRAP_SAMPLES = 5000   # 부트스트랩 재표본 수
+PERMUTATIONS = 5000        # 순열검정 횟수
+CI_LEVEL = 0.95
+SEED = 42                  # 같은 마스터면 매번 같은 구간이 나오게
+UNCERTAINTY_WORKERS = None # 2 이상이면 비교들을 프로세스 여러 개로 나눠서 계산
+
 # =========================
 # 출력 옵션
 # =========================
@@ -33,11 +48,12 @@ def fmt_int(s: pd.Series) -> pd.Series:
 # =========================
 def load_master_df2(path: Path) -> pd.DataFrame:
     """
-    analysis_master_df2.xlsx를 로드해서
+    analysis_master_df2(parquet)를 로드해서
     분석에 필요한 타입/결측/기간 라벨을 정리한다.
     """
-    df2 = pd.read_excel(path)
+    return check_master_df2(read_frame(path))
 
+def check_master_df2(df2: pd.DataFrame) -> pd.DataFrame:
     # ---- 필수 컬럼 체크 (파일 깨졌을 때 바로 알림)
     required_cols = {
         "year",
@@ -55,8 +71,12 @@ def load_master_df2(path: Path) -> pd.DataFrame:
     if missing:
         raise ValueError(f"MASTER_FILE에 필수 컬럼이 없습니다: {sorted(missing)}")
 
+    # 예전 03으로 만든 마스터면 시장별 점유율을 여기서 채움
+    if not set(MARKET_SHARE_COLUMNS) <= set(df2.columns):
+        df2 = add_market_shares(df2)
 
-    return df2
+    # ✅ period/group 카테고리 + 장르/국적 비트마스크 (장르 × 국적 조건은 tag_mask로)
+    return encode_master(df2)
 
 
 # =========================
@@ -66,21 +86,20 @@ def load_master_df2(path: Path) -> pd.DataFrame:
 """
 연도별 일본 애니메이션 추이
 """
-def trend_jp_animation_by_year(df2: pd.DataFrame) -> pd.DataFrame:
-
-    jp = df2[(df2["is_animation"] == True) & (df2["is_japan"] == True)].copy()
-
-    out = (
-        jp.groupby("year", as_index=False)
-          .agg(
-              jp_anim_count=("movieNm", "count"),
-              jp_avg_audi_share=("audi_share", "mean"),
-              jp_sum_audi_share=("audi_share", "sum"),
-              jp_avg_sales_share=("sales_share", "mean"),
-              jp_sum_sales_share=("sales_share", "sum"),
-          )
-          .sort_values("year")
-    )
+def trend_jp_animation_by_year(df2: pd.DataFrame, trend: YearTrend | None = None) -> pd.DataFrame:
+    # ✅ 연도별 집계는 추이 엔진에서 (trend를 안 주면 여기서 만듦)
+    trend = trend or YearTrend.from_master(df2)
+    jp = trend.table()
+    jp = jp[jp["jp_anim_count"] > 0]   # 일본 애니가 있었던 연도만
+
+    out = pd.DataFrame({
+        "year": jp["year"],
+        "jp_anim_count": jp["jp_anim_count"].astype(int),
+        "jp_avg_audi_share": jp["jp_avg_audi_share"],
+        "jp_sum_audi_share": jp["jp_sum_audi_share"],
+        "jp_avg_sales_share": jp["jp_avg_sales_share"],
+        "jp_sum_sales_share": jp["jp_sum_sales_share"],
+    })
 
     out["jp_avg_audi_share_pct"] = (out["jp_avg_audi_share"] * 100).round(4)
     out["jp_sum_audi_share_pct"] = (out["jp_sum_audi_share"] * 100).round(4)
@@ -96,6 +115,33 @@ def trend_jp_animation_by_year(df2: pd.DataFrame) -> pd.DataFrame:
 
     return out
 
+"""
+연도별 일본 애니메이션 추이 지표 (이동평균 / 전년 대비 / CAGR / 누적 점유율)
+"""
+def trend_metrics(df2: pd.DataFrame, trend: YearTrend | None = None) -> pd.DataFrame:
+    """
+    - ma: 최근 WINDOW년 이동평균 (편수 / 점유율 합)
+    - yoy: 전년 대비 변화 (편수는 편, 점유율 합은 %p)
+    - cagr: 일본 애니 그해 관객/매출의 연평균 성장률 (처음 흥행작이 나온 해 대비, 일본 애니가 없는 해는 NaN)
+    - cum: 첫 해부터 그 해까지 전체 시장 대비 일본 애니 누적 점유율
+    """
+    trend = trend or YearTrend.from_master(df2)
+    t = trend.table()
+    w = trend.window
+
+    out = pd.DataFrame({"year": t["year"], "jp_anim_count": t["jp_anim_count"].astype(int)})
+    out[f"count_ma{w}"] = t[f"jp_anim_count_ma{w}"].round(2)
+    out["count_yoy"] = t["jp_anim_count_yoy"]
+    out[f"audi_share_ma{w}_pct"] = fmt_pct(t[f"jp_sum_audi_share_ma{w}"])
+    out["audi_share_yoy_pct"] = fmt_pct(t["jp_sum_audi_share_yoy"])
+    out[f"sales_share_ma{w}_pct"] = fmt_pct(t[f"jp_sum_sales_share_ma{w}"])
+    out["sales_share_yoy_pct"] = fmt_pct(t["jp_sum_sales_share_yoy"])
+    out["audiAcc_cagr_pct"] = (t["jp_audiAcc_cagr"] * 100).round(2)
+    out["salesAcc_cagr_pct"] = (t["jp_salesAcc_cagr"] * 100).round(2)
+    out["cum_audi_share_pct"] = fmt_pct(t["cum_jp_audi_share"])
+    out["cum_sales_share_pct"] = fmt_pct(t["cum_jp_sales_share"])
+    return out
+
 """
 일본 애니메이션의 흥행 양상 변화 (Top10 사례 제시)
 """
@@ -107,6 +153,7 @@ def top_n_movies(
     only_japan: bool = True,
     sort_by: str = "audi_share",
     n: int = 5,
+    index: TopNIndex | None = None,
 ) -> pd.DataFrame:
     """
     특정 기간(period)에서 조건에 맞는 영화 중
@@ -116,15 +163,11 @@ def top_n_movies(
     - 애니메이션만
     - 일본 영화만
     - 관객 점유율(audi_share) 기준 정렬
-    """
-
-    cond = df2["period"].eq(period)
-
-    if only_animation:
-        cond &= df2["is_animation"].eq(True)
 
-    if only_japan:
-        cond &= df2["is_japan"].eq(True)
+    ✅ 미리 만든 순위 인덱스(TopNIndex)에서 바로 뽑음 (index를 안 주면 여기서 만듦)
+       다른 장르/국적/연도 조건은 index.query(...)로 직접
+    """
+    index = index or TopNIndex(df2)
 
     cols = [
         "year",
@@ -141,13 +184,13 @@ def top_n_movies(
     # rank 없는 경우 대비
     cols = [c for c in cols if c in df2.columns]
 
-    out = (
-        df2.loc[cond]
-           .sort_values(sort_by, ascending=False)
-           .head(n)
-           .loc[:, cols]
-           .copy()
-    )
+    out = index.query(
+        sort_by,
+        n,
+        period=period,
+        genres="애니메이션" if only_animation else None,
+        nations="일본" if only_japan else None,
+    ).loc[:, cols].copy()
 
     out["audiAcc"] = fmt_int(out["audiAcc"])
     out["salesAcc"] = fmt_int(out["salesAcc"])
@@ -158,7 +201,7 @@ def top_n_movies(
 """
 일본 애니메이션의 ‘절대적 시장 영향력 변화’
 """
-def make_summary(df2: pd.DataFrame) -> pd.DataFrame:
+def make_summary(df2: pd.DataFrame, cube: ShareCube | None = None) -> pd.DataFrame:
     """
     코로나 전/후에서
     일본 애니메이션(= 애니메이션 & 일본)이
@@ -167,19 +210,21 @@ def make_summary(df2: pd.DataFrame) -> pd.DataFrame:
     - 평균 점유율
     - 중앙값 점유율
     """
-    df2 = df2.copy()
-    df2["is_jp_anim"] = df2["is_animation"] & df2["is_japan"]
-
-    out = (
-        df2.groupby(["period", "is_jp_anim"], as_index=False)
-           .agg(
-               n=("movieNm", "count"),
-               avg_audi_share=("audi_share", "mean"),
-               median_audi_share=("audi_share", "median"),
-               avg_sales_share=("sales_share", "mean"),
-               median_sales_share=("sales_share", "median"),
-           )
-    )
+    cube = cube or ShareCube(df2)
+    cells = cube.cells
+
+    is_jp_anim = (cells["is_animation"] & cells["is_japan"]).rename("is_jp_anim")
+    g = cube.rollup(["period", is_jp_anim], medians=True)
+
+    out = pd.DataFrame({
+        "period": g["period"],
+        "is_jp_anim": g["is_jp_anim"],
+        "n": g["n"],
+        "avg_audi_share": g["audi_share_mean"],
+        "median_audi_share": g["audi_share_median"],
+        "avg_sales_share": g["sales_share_mean"],
+        "median_sales_share": g["sales_share_median"],
+    })
 
     out["avg_audi_share_pct"] = fmt_pct(out["avg_audi_share"])
     out["median_audi_share_pct"] = fmt_pct(out["median_audi_share"])
@@ -197,7 +242,7 @@ def make_summary(df2: pd.DataFrame) -> pd.DataFrame:
 """
 애니메이션 장르 내부에서의 상대적 위치 변화
 """
-def compare_animation_groups(df2: pd.DataFrame) -> pd.DataFrame:
+def compare_animation_groups(df2: pd.DataFrame, cube: ShareCube | None = None) -> pd.DataFrame:
     """
     코로나 이전 / 이후를 기준으로
     애니메이션을 '일본 애니'와 '일반 애니'로 나누어
@@ -206,30 +251,25 @@ def compare_animation_groups(df2: pd.DataFrame) -> pd.DataFrame:
     2) 평균 관객 점유율
     3) 평균 매출 점유율
     """
-    df2 = df2.copy()
-
-    anim = df2[df2["is_animation"] == True].copy()
+    cube = cube or ShareCube(df2)
+    cells = cube.cells
 
-    anim["group"] = pd.NA
-    anim.loc[anim["is_japan"] == True,  "group"] = "일본 애니"
-    anim.loc[anim["is_japan"] == False, "group"] = "일반 애니"
+    group = cells["is_japan"].map({True: "일본 애니", False: "일반 애니"}).rename("group")
 
     total_movies = (
-        df2.groupby("period")
-           .size()
-           .rename("total_movies")
-           .reset_index()
+        cube.rollup(["period"])
+            .loc[:, ["period", "n"]]
+            .rename(columns={"n": "total_movies"})
     )
 
-    summary = (
-        anim.groupby(["period", "group"])
-            .agg(
-                movie_count=("movieNm", "count"),
-                avg_audi_share=("audi_share", "mean"),
-                avg_sales_share=("sales_share", "mean"),
-            )
-            .reset_index()
-    )
+    anim = cube.rollup(["period", group], where=cells["is_animation"])
+    summary = pd.DataFrame({
+        "period": anim["period"],
+        "group": anim["group"],
+        "movie_count": anim["n"],
+        "avg_audi_share": anim["audi_share_mean"],
+        "avg_sales_share": anim["sales_share_mean"],
+    })
 
     summary = summary.merge(total_movies, on="period", how="left")
 
@@ -255,33 +295,31 @@ def compare_animation_groups(df2: pd.DataFrame) -> pd.DataFrame:
 """
 애니 시장 내 일본 애니 비중 변화 분석
 """
-def jp_share_within_animation_market(df2: pd.DataFrame) -> pd.DataFrame:
+def jp_share_within_animation_market(df2: pd.DataFrame, cube: ShareCube | None = None) -> pd.DataFrame:
     """
     코로나 전/후로 '애니 시장 내 일본 애니 비중' 비교
     """
+    cube = cube or ShareCube(df2)
+    cells = cube.cells
+    sums = {"audi_share_sum": "sum_audi_share", "sales_share_sum": "sum_sales_share"}
+    # 애니 시장 내 비중은 03에서 미리 계산해 둔 *_in_anim(애니 시장 기준 점유율)의 합
+    within = {"audi_share_in_anim_sum": "jp_within_anim_audi", "sales_share_in_anim_sum": "jp_within_anim_sales"}
+
     anim_total = (
-        df2[df2["is_animation"] == True]
-          .groupby("period", as_index=False)
-          .agg(
-              anim_sum_audi_share=("audi_share", "sum"),
-              anim_sum_sales_share=("sales_share", "sum"),
-          )
+        cube.rollup(["period"], where=cells["is_animation"])
+            .loc[:, ["period", *sums]]
+            .rename(columns={k: f"anim_{v}" for k, v in sums.items()})
     )
 
     jp_total = (
-        df2[(df2["is_animation"] == True) & (df2["is_japan"] == True)]
-          .groupby("period", as_index=False)
-          .agg(
-              jp_sum_audi_share=("audi_share", "sum"),
-              jp_sum_sales_share=("sales_share", "sum"),
-          )
+        cube.rollup(["period"], where=cells["is_animation"] & cells["is_japan"])
+            .loc[:, ["period", *sums, *within]]
+            .rename(columns={**{k: f"jp_{v}" for k, v in sums.items()}, **within})
     )
 
     out = anim_total.merge(jp_total, on="period", how="left")
-    out[["jp_sum_audi_share", "jp_sum_sales_share"]] = out[["jp_sum_audi_share", "jp_sum_sales_share"]].fillna(0)
-
-    out["jp_within_anim_audi"] = out["jp_sum_audi_share"] / out["anim_sum_audi_share"]
-    out["jp_within_anim_sales"] = out["jp_sum_sales_share"] / out["anim_sum_sales_share"]
+    jp_cols = ["jp_sum_audi_share", "jp_sum_sales_share", *within.values()]
+    out[jp_cols] = out[jp_cols].fillna(0)
 
     out["anim_sum_audi_share_pct"] = (out["anim_sum_audi_share"] * 100).round(4)
     out["jp_sum_audi_share_pct"] = (out["jp_sum_audi_share"] * 100).round(4)
@@ -304,38 +342,127 @@ def jp_share_within_animation_market(df2: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+"""
+요약/비교 결과가 우연인지 (부트스트랩 신뢰구간 + 순열검정)
+"""
+def summary_intervals(
+    df2: pd.DataFrame,
+    cube: ShareCube | None = None,
+    *,
+    workers: int | None = UNCERTAINTY_WORKERS,
+) -> pd.DataFrame:
+    """
+    make_summary / compare_animation_groups에서 비교한 그룹들에 대해
+    평균·중앙값의 신뢰구간과 차이(B - A)의 신뢰구간, 순열검정 p-value
+
+    - [요약] 기간별: 그 외 영화 vs 일본 애니
+    - [비교] 기간별: 일반 애니 vs 일본 애니
+    - [변화] 일본 애니: 코로나 이전 vs 코로나 이후
+    """
+    cube = cube or ShareCube(df2)
+    cells = cube.cells
+    anim, jp = cells["is_animation"].astype(bool), cells["is_japan"].astype(bool)
+    jp_anim = anim & jp
+    periods = sorted(cells["period"].dropna().unique())
+
+    comparisons = []
+    for m in ["audi_share", "sales_share"]:
+        for period in periods:
+            in_period = cells["period"].eq(period)
+            comparisons.append({
+                "comparison": f"[요약] {period}", "metric": m,
+                "group_a": "그 외", "a": cube.values(m, in_period & ~jp_anim),
+                "group_b": "일본 애니", "b": cube.values(m, in_period & jp_anim),
+            })
+            comparisons.append({
+                "comparison": f"[비교] {period}", "metric": m,
+                "group_a": "일반 애니", "a": cube.values(m, in_period & anim & ~jp),
+                "group_b": "일본 애니", "b": cube.values(m, in_period & jp_anim),
+            })
+        if len(periods) == 2:
+            before, after = periods
+            comparisons.append({
+                "comparison": "[변화] 일본 애니", "metric": m,
+                "group_a": before, "a": cube.values(m, cells["period"].eq(before) & jp_anim),
+                "group_b": after, "b": cube.values(m, cells["period"].eq(after) & jp_anim),
+            })
+
+    res = compare_many(
+        comparisons,
+        n_boot=BOOTSTRAP_SAMPLES,
+        n_perm=PERMUTATIONS,
+        level=CI_LEVEL,
+        seed=SEED,
+        workers=workers,
+    )
+
+    def ci(lo: str, hi: str) -> pd.Series:
+        return "[" + fmt_pct(res[lo]).astype(str) + ", " + fmt_pct(res[hi]).astype(str) + "]"
+
+    out = pd.DataFrame({
+        "comparison": res["comparison"],
+        "metric": res["metric"],
+        "stat": res["stat"],
+        "group_a": res["group_a"],
+        "n_a": res["n_a"],
+        "a_pct": fmt_pct(res["a"]),
+        "a_ci_pct": ci("a_lo", "a_hi"),
+        "group_b": res["group_b"],
+        "n_b": res["n_b"],
+        "b_pct": fmt_pct(res["b"]),
+        "b_ci_pct": ci("b_lo", "b_hi"),
+        "diff_pct": fmt_pct(res["diff"]),
+        "diff_ci_pct": ci("diff_lo", "diff_hi"),
+        "p_value": res["p_value"].round(4),
+    })
+    return out
+
 
 # =========================
 # 실행부
 # =========================
-def main():
-    df2 = load_master_df2(MASTER_FILE)
+def main(df2: pd.DataFrame | None = None):
+    # df2를 주면 파일 대신 그걸로 (메모리 파이프라인에서 03 결과를 바로 넘길 때)
+    df2 = load_master_df2(MASTER_FILE) if df2 is None else check_master_df2(df2)
+
+    # 리포트 공용 집계 큐브 + TOP N 순위 인덱스 + 연도별 추이 엔진 (마스터는 여기서 한 번씩만 훑음)
+    cube = ShareCube(df2)
+    index = TopNIndex(df2)
+    trend = YearTrend.from_master(df2)
 
     print("\n=== [추이] 연도별 일본 애니메이션 등장/점유율 추이 ===")
-    trend_year = trend_jp_animation_by_year(df2)
+    trend_year = trend_jp_animation_by_year(df2, trend)
     print(trend_year.to_string(index=False))
     print()
 
+    print(f"\n=== [추이 지표] 이동평균({trend.window}년) / 전년 대비 / CAGR / 누적 점유율 ===")
+    print(trend_metrics(df2, trend).to_string(index=False))
+    print()
+
     print("\n=== [TOP10] 코로나 이전 일본 애니메이션 (audi_share 기준) ===")
-    print(top_n_movies(df2, "코로나 이전", n=10).to_string(index=False))
+    print(top_n_movies(df2, PERIOD_BEFORE, n=10, index=index).to_string(index=False))
     print()
 
     print("\n=== [TOP10] 코로나 이후 일본 애니메이션 (audi_share 기준) ===")
-    print(top_n_movies(df2, "코로나 이후", n=10).to_string(index=False))
+    print(top_n_movies(df2, PERIOD_AFTER, n=10, index=index).to_string(index=False))
     print()
 
     print("\n=== [요약] 코로나 전/후 × 일본애니 여부(시장 점유율 평균/중앙값) ===")
-    print(make_summary(df2).to_string(index=False))
+    print(make_summary(df2, cube).to_string(index=False))
     print()
 
     print("\n=== [비교] 일본 애니 vs 일반 애니 (코로나 전/후) ===")
-    print(compare_animation_groups(df2).to_string(index=False))
+    print(compare_animation_groups(df2, cube).to_string(index=False))
     print()
 
     print("\n=== [비중] 애니 시장 내 일본 애니 점유 비중 (코로나 전/후) ===")
-    share_within_anim = jp_share_within_animation_market(df2)
+    share_within_anim = jp_share_within_animation_market(df2, cube)
     print(share_within_anim.to_string(index=False))
     print()
 
+    print(f"\n=== [신뢰구간] 요약/비교의 부트스트랩 {int(CI_LEVEL * 100)}% 구간 + 순열검정 p-value ===")
+    print(summary_intervals(df2, cube).to_string(index=False))
+    print()
+
 if __name__ == "__main__":
     main()
@@ -5,6 +5,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib import font_manager, rc
 
+from covid_split import PERIOD_AFTER, PERIOD_BEFORE, PERIOD_ORDER
+from market_share import MARKET_SHARE_COLUMNS, add_market_shares
+from master_codes import encode_master
+from storage import read_frame
+
 # =========================
 # (옵션) 한글 폰트 설정 (Windows 기준)
 # =========================
@@ -22,10 +27,9 @@ plt.rcParams['axes.unicode_minus'] =False
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 
-MASTER_FILE = DATA_DIR / "analysis_master_df2.xlsx"
+MASTER_FILE = DATA_DIR / "analysis_master_df2.parquet"
 
-COVID_BEFORE_MAX = 2019   # <= 2019: 코로나 이전
-COVID_AFTER_MIN  = 2020   # >= 2020: 코로나 이후 
+# 코로나 전/후 기준 연도는 covid_split.py
 USE_YEAR_FROM = 2015
 
 # =========================
@@ -43,10 +47,11 @@ def fmt_int(s: pd.Series) -> pd.Series:
 
 def load_master_df2(path: Path) -> pd.DataFrame:
     """
-    analysis_master_df2.xlsx를 로드
+    analysis_master_df2(parquet)를 로드
     """
-    df2 = pd.read_excel(path)
+    return check_master_df2(read_frame(path))
 
+def check_master_df2(df2: pd.DataFrame) -> pd.DataFrame:
     # ---- 필수 컬럼 체크 (파일 깨졌을 때 바로 알림)
     required_cols = {
         "year",
@@ -64,8 +69,12 @@ def load_master_df2(path: Path) -> pd.DataFrame:
     if missing:
         raise ValueError(f"MASTER_FILE에 필수 컬럼이 없습니다: {sorted(missing)}")
 
+    # 예전 03으로 만든 마스터면 시장별 점유율을 여기서 채움
+    if not set(MARKET_SHARE_COLUMNS) <= set(df2.columns):
+        df2 = add_market_shares(df2)
 
-    return df2
+    # ✅ period/group 카테고리 + 장르/국적 비트마스크 (장르 × 국적 조건은 tag_mask로)
+    return encode_master(df2)
 
 # =========================
 # 그래프 공통 컬러/스타일 
@@ -194,15 +203,11 @@ def plot_trend_jp_anim_by_year(df2: pd.DataFrame) -> None:
 def plot_avg_share_jp_vs_nonjp_animation_by_period(df2: pd.DataFrame) -> None:
     df = df2.copy()
 
-    # 애니만
-    anim = df[df["is_animation"] == True].copy()
-
-    # group 라벨 (일본 애니 / 일반 애니)
-    anim["group"] = "일반 애니"
-    anim.loc[anim["is_japan"] == True, "group"] = "일본 애니"
+    # 애니만 (group: 일본 애니 / 일반 애니 라벨은 로드할 때 붙여 둠)
+    anim = df[df["group"].notna()].copy()
 
     summary = (
-        anim.groupby(["period", "group"], as_index=False)
+        anim.groupby(["period", "group"], as_index=False, observed=True)
             .agg(
                 avg_audi_share=("audi_share", "mean"),
                 avg_sales_share=("sales_share", "mean"),
@@ -214,7 +219,7 @@ def plot_avg_share_jp_vs_nonjp_animation_by_period(df2: pd.DataFrame) -> None:
     summary["avg_sales_share_pct"] = (summary["avg_sales_share"] * 100).round(2)
 
     # period / group 순서 고정
-    period_order = ["코로나 이전", "코로나 이후"]
+    period_order = PERIOD_ORDER
     group_order = ["일본 애니", "일반 애니"]
 
     summary["period"] = pd.Categorical(summary["period"], categories=period_order, ordered=True)
@@ -245,8 +250,8 @@ def plot_avg_share_jp_vs_nonjp_animation_by_period(df2: pd.DataFrame) -> None:
         ax.text(b.get_x() + b.get_width()/2, h + 0.06, f"{h:.2f}%", ha="center", va="bottom", fontsize=9, color=COLOR_GRAY)
 
     # 주석: 전/후 일본 애니 변화량(Δ)
-    jp_before = float(pivot_audi.loc["코로나 이전", "일본 애니"])
-    jp_after = float(pivot_audi.loc["코로나 이후", "일본 애니"])
+    jp_before = float(pivot_audi.loc[PERIOD_BEFORE, "일본 애니"])
+    jp_after = float(pivot_audi.loc[PERIOD_AFTER, "일본 애니"])
     delta = jp_after - jp_before
     ax.annotate(
         f"일본 애니 변화 Δ {delta:+.2f}%p",
@@ -270,34 +275,23 @@ def plot_avg_share_jp_vs_nonjp_animation_by_period(df2: pd.DataFrame) -> None:
 def plot_jp_share_within_animation_market(df2: pd.DataFrame) -> None:
     df = df2.copy()
 
-    # 애니 전체(분모)
-    anim_total = (
-        df[df["is_animation"] == True]
-          .groupby("period", as_index=False)
-          .agg(
-              anim_sum_audi_share=("audi_share", "sum"),
-              anim_sum_sales_share=("sales_share", "sum"),
-          )
-    )
-
-    # 일본 애니(분자)
-    jp_total = (
-        df[(df["is_animation"] == True) & (df["is_japan"] == True)]
-          .groupby("period", as_index=False)
-          .agg(
-              jp_sum_audi_share=("audi_share", "sum"),
-              jp_sum_sales_share=("sales_share", "sum"),
-          )
+    # 03에서 미리 계산한 애니 시장 기준 점유율(*_in_anim)을 일본 애니만 더하면 그게 비중
+    jp_anim = df["is_animation"].eq(True) & df["is_japan"].eq(True)
+    out = (
+        df.assign(
+            jp_within_anim_audi=df["audi_share_in_anim"].where(jp_anim, 0),
+            jp_within_anim_sales=df["sales_share_in_anim"].where(jp_anim, 0),
+        )
+        .loc[df["is_animation"] == True]
+        .groupby("period", as_index=False, observed=True)[["jp_within_anim_audi", "jp_within_anim_sales"]]
+        .sum()
     )
 
-    out = anim_total.merge(jp_total, on="period", how="left")
-    out[["jp_sum_audi_share", "jp_sum_sales_share"]] = out[["jp_sum_audi_share", "jp_sum_sales_share"]].fillna(0)
-
-    out["jp_within_anim_audi_pct"] = (out["jp_sum_audi_share"] / out["anim_sum_audi_share"] * 100).round(2)
-    out["jp_within_anim_sales_pct"] = (out["jp_sum_sales_share"] / out["anim_sum_sales_share"] * 100).round(2)
+    out["jp_within_anim_audi_pct"] = (out["jp_within_anim_audi"] * 100).round(2)
+    out["jp_within_anim_sales_pct"] = (out["jp_within_anim_sales"] * 100).round(2)
 
     # period 순서 고정
-    order = ["코로나 이전", "코로나 이후"]
+    order = PERIOD_ORDER
     out["period"] = pd.Categorical(out["period"], categories=order, ordered=True)
     out = out.sort_values("period")
 
@@ -322,8 +316,8 @@ def plot_jp_share_within_animation_market(df2: pd.DataFrame) -> None:
         ax.text(b.get_x() + b.get_width()/2, h + 0.25, f"{h:.1f}%", ha="center", va="bottom", fontsize=9, color=COLOR_GRAY)
 
     # 주석: 관객 기준 증감
-    before = float(out.loc[out["period"] == "코로나 이전", "jp_within_anim_audi_pct"].iloc[0])
-    after = float(out.loc[out["period"] == "코로나 이후", "jp_within_anim_audi_pct"].iloc[0])
+    before = float(out.loc[out["period"] == PERIOD_BEFORE, "jp_within_anim_audi_pct"].iloc[0])
+    after = float(out.loc[out["period"] == PERIOD_AFTER, "jp_within_anim_audi_pct"].iloc[0])
     ax.annotate(
         f"관객 기준 Δ {after-before:+.1f}%p",
         xy=(1 - width/2, after),
@@ -347,16 +341,12 @@ def plot_jp_share_within_animation_market(df2: pd.DataFrame) -> None:
 def plot_line_avg_share_jp_vs_nonjp_by_year(df2: pd.DataFrame) -> None:
     df = df2.copy()
 
-    # 애니만
-    anim = df[df["is_animation"] == True].copy()
-
-    # 그룹 라벨
-    anim["group"] = "일반 애니"
-    anim.loc[anim["is_japan"] == True, "group"] = "일본 애니"
+    # 애니만 (그룹 라벨은 로드할 때 붙여 둔 group 카테고리)
+    anim = df[df["group"].notna()].copy()
 
     # 연도별 평균(영화 1편당 평균 점유율)
     yearly_avg = (
-        anim.groupby(["year", "group"], as_index=False)
+        anim.groupby(["year", "group"], as_index=False, observed=True)
             .agg(
                 avg_audi_share=("audi_share", "mean"),
                 count=("movieNm", "count"),
@@ -428,8 +418,9 @@ def plot_line_avg_share_jp_vs_nonjp_by_year(df2: pd.DataFrame) -> None:
 # 실행부
 # =========================
 
-def main():
-    df2 = load_master_df2(MASTER_FILE)
+def main(df2: pd.DataFrame | None = None):
+    # df2를 주면 파일 대신 그걸로 (메모리 파이프라인에서 03 결과를 바로 넘길 때)
+    df2 = load_master_df2(MASTER_FILE) if df2 is None else check_master_df2(df2)
 
     plot_trend_jp_anim_by_year(df2)
     plot_avg_share_jp_vs_nonjp_animation_by_period(df2)
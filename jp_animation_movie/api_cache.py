@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+# =========================
+# KOBIS API 응답 영구 캐시 (SQLite)
+# =========================
+# - movie_cd  : (clean_movieNm, openDt_norm) → movieCd   (못 찾은 경우 ""도 저장 = 실패 캐시)
+# - movie_info: movieCd → (genres_csv, nations_csv)
+# 항목마다 만료 시각(expires_at)을 저장해서 TTL이 지나면 다시 조회한다.
+# 실패 결과는 보통 TTL보다 짧게 (KOBIS에 나중에 등록될 수도 있으니까)
+# WAL 모드 + busy_timeout이라 여러 파이프라인 실행이 같은 파일을 동시에 써도 안전함.
+
+DAY = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movie_cd (
+    movieNm     TEXT NOT NULL,
+    openDt_norm TEXT NOT NULL,
+    movieCd     TEXT NOT NULL,
+    expires_at  REAL NOT NULL,
+    PRIMARY KEY (movieNm, openDt_norm)
+);
+CREATE TABLE IF NOT EXISTS movie_info (
+    movieCd    TEXT PRIMARY KEY,
+    genres     TEXT NOT NULL,
+    nations    TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class ApiCache:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl: float = 30 * DAY,
+        negative_ttl: float = 1 * DAY,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: 문장마다 바로 커밋 (락을 오래 잡지 않게)
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> ApiCache:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _expires_at(self, negative: bool) -> float:
+        return time.time() + (self.negative_ttl if negative else self.ttl)
+
+    # ---- movieCd
+    def get_movieCd(self, movieNm: str, openDt_norm: str) -> str | None:
+        """캐시에 있으면 movieCd(실패 캐시는 ""), 없거나 만료됐으면 None"""
+        row = self._conn.execute(
+            "SELECT movieCd FROM movie_cd WHERE movieNm = ? AND openDt_norm = ? AND expires_at > ?",
+            (movieNm, openDt_norm, time.time()),
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def put_movieCd(self, movieNm: str, openDt_norm: str, movieCd: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO movie_cd VALUES (?, ?, ?, ?)",
+            (movieNm, openDt_norm, movieCd, self._expires_at(not movieCd)),
+        )
+
+    # ---- movieInfo
+    def get_info(self, movieCd: str) -> tuple[str, str] | None:
+        """캐시에 있으면 (genres_csv, nations_csv), 없거나 만료됐으면 None"""
+        row = self._conn.execute(
+            "SELECT genres, nations FROM movie_info WHERE movieCd = ? AND expires_at > ?",
+            (movieCd, time.time()),
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def put_info(self, movieCd: str, genres_csv: str, nations_csv: str) -> None:
+        negative = not genres_csv and not nations_csv
+        self._conn.execute(
+            "INSERT OR REPLACE INTO movie_info VALUES (?, ?, ?, ?)",
+            (movieCd, genres_csv, nations_csv, self._expires_at(negative)),
+        )
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        self._conn.execute("DELETE FROM movie_cd WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM movie_info WHERE expires_at <= ?", (now,))
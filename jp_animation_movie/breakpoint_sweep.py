@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from covid_split import COVID_AFTER_MIN, COVID_BEFORE_MAX, PERIOD_AFTER, PERIOD_BEFORE
+from stages import load_stage
+
+# =========================
+# 코로나 기준 연도 스윕 (breakpoint sweep)
+# =========================
+# covid_split.py의 기준(2019 이하 / 2020 이상)을 바꿔 보려면 상수를 고치고 03~04를 다시 돌려야 했다.
+# 여기서는 마스터의 연도만 보고
+#   - 모든 "이전 마지막 연도" 후보 × 사이에 뺄 연도 수(0 ~ MAX_GAP, 예: 2020~2021 제외)
+# 조합을 한 번에 계산해서 04의 make_summary / jp_share_within_animation_market 지표를
+# 기준별 × 전/후 한 표로 낸다.
+#
+# - 평균 / 합계 / 비중: 연도별 집계를 누적합으로 만들어 두고 구간 합 = 누적합 차이 (기준 개수만큼 인덱싱)
+# - 중앙값: 값 정렬을 한 번만 해 두고, 구간마다 "구간 안 값 개수 누적"으로 가운데 위치를 찾음 (행렬 연산)
+#
+# 주의: 마스터에 없는 연도(03에서 기간 밖이라 빠진 연도)는 스윕에도 안 나옴
+#
+# 사용:
+#   python breakpoint_sweep.py                 # 사이 연도 0~2개 제외까지
+#   python breakpoint_sweep.py --max-gap 0     # 바로 붙어 있는 기준만
+#   python breakpoint_sweep.py --out outputs/breakpoint_sweep.csv
+
+BASE_DIR = Path(__file__).resolve().parent
+
+MAX_GAP = 2               # 이전/이후 사이에서 뺄 연도 수 최대
+BATCH_CELLS = 4_000_000   # 중앙값 계산 때 (구간 수 × 값 개수) 행렬을 이 크기 단위로 나눔
+
+METRICS = {"audi": "audi_share", "sales": "sales_share"}
+
+
+def candidate_splits(years: np.ndarray, max_gap: int = MAX_GAP) -> pd.DataFrame:
+    """(before_max, after_min) 후보: 이전/이후 모두 한 해 이상 남고 사이 연도는 max_gap개까지"""
+    rows = [
+        (b, b + 1 + gap)
+        for b in years[:-1]
+        for gap in range(max_gap + 1)
+        if b + 1 + gap <= years[-1]
+    ]
+    return pd.DataFrame(rows, columns=["before_max", "after_min"])
+
+def _prefix_sum(x: np.ndarray) -> np.ndarray:
+    """앞에 0을 붙인 누적합 (구간 [lo, hi] 합 = out[hi + 1] - out[lo])"""
+    return np.concatenate([[0.0], np.cumsum(x)])
+
+def _excluded(before_max: int, after_min: int) -> str:
+    """이전/이후 사이에서 빠지는 연도 표시 ('2020~2021' / '2020' / 없으면 '-')"""
+    if after_min - before_max > 2:
+        return f"{before_max + 1}~{after_min - 1}"
+    if after_min - before_max == 2:
+        return str(before_max + 1)
+    return "-"
+
+def range_medians(values: np.ndarray, year_idx: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    연도 구간 [lo[i], hi[i]] (연도 번호) 마다 그 구간 values의 중앙값 (결측 제외, 빈 구간은 NaN)
+    정렬은 한 번, 구간별 위치 찾기는 누적 개수 행렬로
+    """
+    ok = ~np.isnan(values)
+    order = np.argsort(values[ok], kind="stable")
+    v, y = values[ok][order], year_idx[ok][order]
+
+    out = np.full(len(lo), np.nan)
+    if len(v) == 0:
+        return out
+    step = max(1, BATCH_CELLS // len(v))
+    for s in range(0, len(lo), step):
+        l, h = lo[s:s + step, None], hi[s:s + step, None]
+        counts = np.cumsum((y >= l) & (y <= h), axis=1, dtype=np.int64)
+        n = counts[:, -1]
+        # 아래/위 가운데 순번 (홀수면 같은 자리)
+        lower = np.argmax(counts >= ((n + 1) // 2)[:, None], axis=1)
+        upper = np.argmax(counts >= (n // 2 + 1)[:, None], axis=1)
+        out[s:s + step] = np.where(n > 0, (v[lower] + v[upper]) / 2, np.nan)
+    return out
+
+def sweep(df2: pd.DataFrame, *, max_gap: int = MAX_GAP) -> pd.DataFrame:
+    """
+    df2: 분석 마스터 (period 컬럼은 안 씀, 연도로 다시 나눔)
+    return: 기준(before_max, after_min) × 기간(이전/이후)마다 한 행
+            make_summary(일본 애니 vs 그 외 평균/중앙값) + 애니 시장 내 일본 애니 비중
+    """
+    year = df2["year"].to_numpy(dtype=int)
+    years = np.unique(year)
+    if len(years) < 2:
+        raise ValueError("연도가 2개 이상 있어야 기준을 나눌 수 있습니다")
+    yi = year - years[0]   # 연도 번호 (0 ~ Y-1, 빈 연도도 자리 있음)
+    n_years = years[-1] - years[0] + 1
+
+    anim = df2["is_animation"].to_numpy(dtype=bool)
+    jp = anim & df2["is_japan"].to_numpy(dtype=bool)
+    groups = {"jp": jp, "other": ~jp, "anim": anim}
+
+    # 1) 연도별 집계 → 누적합 (앞에 0을 붙여서 구간 합 = prefix[hi + 1] - prefix[lo])
+    agg = {}
+    for g, mask in groups.items():
+        agg[f"{g}_n"] = _prefix_sum(np.bincount(yi[mask], minlength=n_years))
+        for key, col in METRICS.items():
+            vals = df2[col].to_numpy(dtype=float)
+            ok = mask & ~np.isnan(vals)
+            agg[f"{g}_{key}_count"] = _prefix_sum(np.bincount(yi[ok], minlength=n_years))
+            agg[f"{g}_{key}_sum"] = _prefix_sum(np.bincount(yi[ok], weights=vals[ok], minlength=n_years))
+
+    # 2) 기준 × 기간 구간 (연도 번호)
+    splits = candidate_splits(years, max_gap)
+    k = len(splits)
+    lo = np.concatenate([np.zeros(k, dtype=int), splits["after_min"].to_numpy() - years[0]])
+    hi = np.concatenate([splits["before_max"].to_numpy() - years[0], np.full(k, n_years - 1)])
+
+    def range_sum(name: str) -> np.ndarray:
+        return agg[name][hi + 1] - agg[name][lo]
+
+    out = pd.DataFrame({
+        "before_max": np.tile(splits["before_max"].to_numpy(), 2),
+        "after_min": np.tile(splits["after_min"].to_numpy(), 2),
+        "excluded": np.tile([_excluded(b, a) for b, a in zip(splits["before_max"], splits["after_min"])], 2),
+        "period": np.repeat([PERIOD_BEFORE, PERIOD_AFTER], k),
+        "years": [f"{years[0] + l}~{years[0] + h}" for l, h in zip(lo, hi)],
+        "jp_n": range_sum("jp_n").astype(int),
+        "other_n": range_sum("other_n").astype(int),
+    })
+
+    # 3) make_summary 지표 (평균 = 구간 합 / 구간 개수, 중앙값은 range_medians)
+    for key, col in METRICS.items():
+        vals = df2[col].to_numpy(dtype=float)
+        for g in ["jp", "other"]:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = range_sum(f"{g}_{key}_sum") / range_sum(f"{g}_{key}_count")
+            median = range_medians(vals[groups[g]], yi[groups[g]], lo, hi)
+            out[f"{g}_avg_{key}_pct"] = (mean * 100).round(4)
+            out[f"{g}_median_{key}_pct"] = (median * 100).round(4)
+
+    # 4) jp_share_within_animation_market 지표 (애니 시장 내 일본 애니 점유율 합 비중)
+    for key in METRICS:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            within = range_sum(f"jp_{key}_sum") / range_sum(f"anim_{key}_sum")
+        out[f"jp_within_anim_{key}_pct"] = (within * 100).round(2)
+
+    out["current"] = (out["before_max"] == COVID_BEFORE_MAX) & (out["after_min"] == COVID_AFTER_MIN)
+    return out.sort_values(["before_max", "after_min", "period"], kind="stable", ignore_index=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="코로나 전/후 기준 연도를 전부 바꿔 가며 04 요약 지표 비교")
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP, help="이전/이후 사이에서 뺄 연도 수 최대")
+    parser.add_argument("--out", type=Path, help="결과를 csv로도 저장")
+    return parser.parse_args()
+
+def main(max_gap: int = MAX_GAP, out: Path | None = None):
+    stage04 = load_stage("04")
+    df2 = stage04.load_master_df2(stage04.MASTER_FILE)
+
+    table = sweep(df2, max_gap=max_gap)
+    print(f"\n=== [스윕] 기준 연도별 코로나 전/후 요약 (current=True: 지금 기준 {COVID_BEFORE_MAX}/{COVID_AFTER_MIN}) ===")
+    print(table.to_string(index=False))
+
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(out, index=False, encoding="utf-8-sig")
+        print(f"✅ 저장 완료: {out}")
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(max_gap=args.max_gap, out=args.out)
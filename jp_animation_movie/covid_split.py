@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pandas as pd
+
+# =========================
+# 코로나 전/후 기간 기준 (03 / 04 / 05 / breakpoint_sweep 공용)
+# =========================
+# 예전엔 03/04/05에 같은 상수가 따로 있어서 기준을 바꾸려면 세 군데를 고쳐야 했다.
+# 기준 연도는 여기서만 바꾸고, 다른 기준으로 나눴을 때 결과가 궁금하면 breakpoint_sweep.py로 한 번에 비교.
+
+COVID_BEFORE_MAX = 2019   # <= 2019: 코로나 이전
+COVID_AFTER_MIN  = 2020   # >= 2020: 코로나 이후 (사이 연도는 분석에서 빠짐)
+
+PERIOD_BEFORE = "코로나 이전"
+PERIOD_AFTER = "코로나 이후"
+PERIOD_ORDER = [PERIOD_BEFORE, PERIOD_AFTER]
+
+
+def label_period(
+    year: pd.Series,
+    before_max: int = COVID_BEFORE_MAX,
+    after_min: int = COVID_AFTER_MIN,
+) -> pd.Series:
+    """연도 → 기간 라벨 (before_max와 after_min 사이 연도는 결측)"""
+    out = pd.Series(pd.NA, index=year.index, dtype="object")
+    out[year <= before_max] = PERIOD_BEFORE
+    out[year >= after_min] = PERIOD_AFTER
+    return out
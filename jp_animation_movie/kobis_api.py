@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import aiohttp
+
+from kobis_quota import KeyPool
+from kobis_transport import RETRY_STATUS, CircuitBreaker, EndpointStats, KobisRequestError, KobisUnavailable, backoff_delay
+
+# =========================
+# KOBIS Open API 비동기 클라이언트
+# =========================
+# - 동시에 날아가는 요청 수는 concurrency(세마포어)로 제한
+# - 초당 호출 수는 토큰 버킷으로 제한 (예전 time.sleep(API_SLEEP) 대체)
+# - 하나의 aiohttp 세션 + keep-alive 커넥션 풀을 재사용
+# - 키를 KeyPool로 주면 키별 일일 한도를 세면서 여러 키를 돌아가며 씀
+# - 일시적 오류는 백오프 재시도, 연속 실패 시 서킷 브레이커로 잠깐 멈춤 (kobis_transport.py)
+#   재시도를 다 쓰면 KobisUnavailable → 부르는 쪽에서 그 영화만 미루고 계속 진행
+# - 재시도해도 소용없는 4xx(401/404 등)는 KobisRequestError → 부르는 쪽에서 그 영화만 실패로 기록
+# base_url만 바꾸면 로컬 가짜 서버에 붙여서 테스트할 수 있다.
+
+KOBIS_BASE_URL = "https://kobis.or.kr/kobisopenapi/webservice/rest/movie"
+SEARCH_PATH = "searchMovieList.json"
+INFO_PATH = "searchMovieInfo.json"
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 토큰이 차는 버킷 (최대 capacity개까지 모아둘 수 있음)
+    acquire()는 토큰이 생길 때까지 기다렸다가 1개를 가져간다.
+    """
+
+    def __init__(self, rate: float, capacity: int | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class KobisClient:
+    """
+    사용 예:
+        async with KobisClient(key) as client:
+            data = await client.search_movie_list("베테랑", year="2015")
+
+    key 자리에 KeyPool을 주면 호출마다 한도가 남은 키를 골라 씀 (다 쓰면 QuotaExceeded)
+    (KeyPool은 클라이언트가 닫힐 때 같이 닫힘)
+    timeout은 시도 1번당 제한 시간, 실패하면 max_retries번까지 다시 시도
+    엔드포인트별 지연/오류 통계는 client.report()로 확인
+    """
+
+    def __init__(
+        self,
+        key: str | KeyPool,
+        *,
+        base_url: str = KOBIS_BASE_URL,
+        concurrency: int = 8,
+        rate_per_sec: float = 8.0,
+        burst: int | None = None,
+        timeout: float = 10,
+        max_retries: int = 3,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.keys = key if isinstance(key, KeyPool) else KeyPool([key])
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = EndpointStats()
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> KobisClient:
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self.keys.close()
+
+    async def call_json(self, path: str, params: dict) -> dict:
+        if self._session is None:
+            raise RuntimeError("KobisClient는 'async with'로 열어서 써야 해요")
+
+        last_error: Exception | None = None
+        retry_after = 0.0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats.record_retry(path)
+                await asyncio.sleep(retry_after or backoff_delay(attempt - 1))
+                retry_after = 0.0
+
+            trial = await self.breaker.wait()
+            try:
+                data, last_error, retry_after = await self._attempt(path, params)
+            finally:
+                if trial:
+                    # 시험 요청이 한도 초과/취소 등으로 결과 없이 끝났으면 브레이커를 다시 open으로
+                    self.breaker.release_trial()
+            if last_error is None:
+                return data
+
+        raise KobisUnavailable(f"{path} 호출 {self.max_retries + 1}번 실패: {last_error!r}")
+
+    async def _attempt(self, path: str, params: dict) -> tuple[dict | None, Exception | None, float]:
+        """
+        한 번 호출해서 (응답, None, 0) 또는 재시도할 만한 오류면 (None, 오류, Retry-After 초)
+        성공/실패는 여기서 브레이커에 기록 (4xx는 서버가 응답은 한 거라 성공으로 치고 KobisRequestError로 바로 올림)
+        """
+        async with self._semaphore:
+            await self._bucket.acquire()
+            query = {"key": self.keys.take(), **params}
+            started = time.monotonic()
+            try:
+                async with self._session.get(f"{self.base_url}/{path}", params=query) as r:
+                    retry_after = _retry_after_seconds(r.headers.get("Retry-After")) if r.status in RETRY_STATUS else 0.0
+                    r.raise_for_status()
+                    # KOBIS는 content-type을 제대로 안 주는 경우가 있어서 검사 생략
+                    data = await r.json(content_type=None)
+            except aiohttp.ClientResponseError as e:
+                self.stats.record(path, time.monotonic() - started, ok=False)
+                if e.status not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    # 4xx 같은 건 재시도해도 소용없으니 바로 올림 (aiohttp 예외 대신 이 호출만의 실패로)
+                    raise KobisRequestError(f"{path} HTTP {e.status} {e.message}", status=e.status) from e
+                self.breaker.record_failure()
+                return None, e, retry_after
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # 연결 끊김 / 시간 초과 / 응답이 깨진 JSON
+                self.stats.record(path, time.monotonic() - started, ok=False)
+                self.breaker.record_failure()
+                return None, e, 0.0
+
+        self.stats.record(path, time.monotonic() - started, ok=True)
+        self.breaker.record_success()
+        return data, None, 0.0
+
+    def report(self) -> str:
+        """실행 끝에 찍을 호출 통계 (엔드포인트별 지연/재시도/오류율 + 서킷 브레이커 작동 횟수)"""
+        text = self.stats.report()
+        if self.breaker.opened:
+            text += f"\n서킷 브레이커 작동 {self.breaker.opened}회 (연속 실패로 잠깐 멈춘 횟수)"
+        return text
+
+    async def search_movie_list(self, movieNm: str, *, year: str = "", item_per_page: int = 20) -> dict:
+        params = {
+            "movieNm": movieNm,
+            "curPage": 1,
+            "itemPerPage": item_per_page,
+        }
+        # ✅ KOBIS는 openStartDt/openEndDt를 YYYY(연도)로 받음
+        if year:
+            params["openStartDt"] = year
+            params["openEndDt"] = year
+        return await self.call_json(SEARCH_PATH, params)
+
+    async def movie_info(self, movieCd: str) -> dict:
+        return await self.call_json(INFO_PATH, {"movieCd": movieCd})
+
+
+def _retry_after_seconds(value: str | None) -> float:
+    """429/503의 Retry-After 헤더(초 단위만 지원), 없거나 이상하면 0"""
+    try:
+        return min(60.0, max(0.0, float(value))) if value else 0.0
+    except ValueError:
+        return 0.0
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+
+from kobis_api import SEARCH_PATH, KobisClient
+from kobis_quota import QuotaExceeded
+from kobis_transport import KobisRequestError, KobisUnavailable
+from movie_text import clean_movieNm, norm_openDt
+
+# =========================
+# KOBIS 영화 목록 로컬 카탈로그 (SQLite)
+# =========================
+# 박스오피스 행마다 searchMovieList를 부르는 대신,
+# 개봉연도별로 searchMovieList를 페이지 단위로 한 번 쭉 받아서 로컬에 저장해 두고
+# 매칭은 (정리된 영화명, 개봉연도) 인덱스로 로컬에서 한다.
+# → 매칭 방식을 바꿔서 다시 돌려도 API 호출이 필요 없음
+
+PAGE_SIZE = 100   # KOBIS searchMovieList의 itemPerPage 최대값
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movie (
+    movieCd     TEXT PRIMARY KEY,
+    movieNm     TEXT NOT NULL,
+    name_key    TEXT NOT NULL,      -- clean_movieNm(movieNm)
+    openDt      TEXT NOT NULL,      -- YYYYMMDD (없으면 "")
+    open_year   TEXT NOT NULL,      -- 조회한 개봉연도
+    genreAlt    TEXT NOT NULL,
+    nationAlt   TEXT NOT NULL,
+    repNationNm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_movie_name_year ON movie (name_key, open_year);
+CREATE TABLE IF NOT EXISTS synced_year (
+    open_year TEXT PRIMARY KEY,
+    tot_cnt   INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+_FIELDS = ["movieCd", "movieNm", "openDt", "genreAlt", "nationAlt", "repNationNm"]
+
+
+class MovieCatalog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> MovieCatalog:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def synced_years(self) -> set[str]:
+        return {row[0] for row in self._conn.execute("SELECT open_year FROM synced_year")}
+
+    def save_year(self, open_year: str, movies: list[dict], tot_cnt: int) -> None:
+        """한 연도치 목록을 통째로 저장 (한 트랜잭션 → 중간에 죽으면 그 연도는 미동기화 상태로 남음)"""
+        rows = [
+            (
+                m.get("movieCd", ""),
+                m.get("movieNm", ""),
+                clean_movieNm(m.get("movieNm", "")),
+                norm_openDt(m.get("openDt", "")),
+                open_year,
+                m.get("genreAlt", "") or "",
+                m.get("nationAlt", "") or "",
+                m.get("repNationNm", "") or "",
+            )
+            for m in movies
+            if m.get("movieCd")
+        ]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO movie VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO synced_year VALUES (?, ?, ?)",
+                (open_year, tot_cnt, time.time()),
+            )
+
+    def lookup(self, movieNm: str, open_year: str = "") -> list[dict]:
+        """정리된 영화명이 같은 후보들 (open_year를 주면 그 연도만)"""
+        sql = f"SELECT {', '.join(_FIELDS)} FROM movie WHERE name_key = ?"
+        params: list = [clean_movieNm(movieNm)]
+        if open_year:
+            sql += " AND open_year = ?"
+            params.append(open_year)
+        return [dict(zip(_FIELDS, row)) for row in self._conn.execute(sql + " ORDER BY movieCd", params)]
+
+    def all_movies(self) -> list[dict]:
+        """퍼지 매칭용 인덱스를 만들 때 쓰는 전체 목록"""
+        sql = f"SELECT {', '.join(_FIELDS)} FROM movie ORDER BY movieCd"
+        return [dict(zip(_FIELDS, row)) for row in self._conn.execute(sql)]
+
+    def find(self, movieNm: str, openDt_norm: str) -> dict:
+        """
+        02의 find_movie와 같은 규칙으로 로컬에서 후보 1개 고르기 (못 찾으면 빈 dict)
+        개봉연도 후보 → 없으면 연도 무시 후보 순서로 찾는다
+        """
+        year = openDt_norm[:4] if len(openDt_norm) >= 4 else ""
+        lst = self.lookup(movieNm, year) if year else []
+        if not lst:
+            lst = self.lookup(movieNm)
+        if not lst:
+            return {}
+
+        # 개봉일까지 같은 후보 우선
+        same_day = next((m for m in lst if m["openDt"] == openDt_norm), None)
+        return same_day or lst[0]
+
+
+async def _fetch_page(client: KobisClient, open_year: str, page: int) -> dict:
+    return await client.call_json(SEARCH_PATH, {
+        "openStartDt": open_year,
+        "openEndDt": open_year,
+        "curPage": page,
+        "itemPerPage": PAGE_SIZE,
+    })
+
+async def sync_year(client: KobisClient, catalog: MovieCatalog, open_year: str) -> int:
+    """
+    open_year 개봉작 목록을 페이지 단위로 전부 받아 카탈로그에 저장. return: 저장한 편수
+    (1페이지로 전체 건수를 확인한 뒤 나머지 페이지는 동시에 요청)
+    """
+    first = await _fetch_page(client, open_year, 1)
+    if "faultInfo" in first:
+        raise KobisRequestError(f"{open_year} 목록 조회 실패: {first['faultInfo']}")
+
+    result = first.get("movieListResult", {})
+    tot_cnt = int(result.get("totCnt", 0) or 0)
+    movies = list(result.get("movieList", []) or [])
+
+    n_pages = (tot_cnt + PAGE_SIZE - 1) // PAGE_SIZE
+    pages = await asyncio.gather(*[_fetch_page(client, open_year, p) for p in range(2, n_pages + 1)])
+    for data in pages:
+        if "faultInfo" in data:
+            raise KobisRequestError(f"{open_year} 목록 조회 실패: {data['faultInfo']}")
+        movies.extend(data.get("movieListResult", {}).get("movieList", []) or [])
+
+    catalog.save_year(open_year, movies, tot_cnt)
+    return len(movies)
+
+async def sync_years(client: KobisClient, catalog: MovieCatalog, years: list[str]) -> set[str]:
+    """
+    아직 받지 않은 연도만 동기화 (연도끼리도 동시에 진행)
+    return: 한도 초과 / KOBIS 장애 / 요청 거부(faultInfo, 4xx)로 이번에 못 받은 연도 (저장은 연도 단위 트랜잭션이라 반쯤 저장된 연도는 없음)
+    """
+    todo = sorted(set(years) - catalog.synced_years())
+
+    async def sync_or_skip(open_year: str) -> int | None:
+        try:
+            return await sync_year(client, catalog, open_year)
+        except (QuotaExceeded, KobisUnavailable, KobisRequestError) as e:
+            print(f"⚠️ 카탈로그 동기화 미룸: {open_year}년 ({type(e).__name__})")
+            return None
+
+    counts = await asyncio.gather(*[sync_or_skip(y) for y in todo])
+    for open_year, n in zip(todo, counts):
+        if n is not None:
+            print(f"카탈로그 동기화: {open_year}년 개봉작 {n}편")
+    return {y for y, n in zip(todo, counts) if n is None}
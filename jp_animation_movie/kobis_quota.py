@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# =========================
+# KOBIS API 키별 일일 호출 한도 관리
+# =========================
+# KOBIS 키는 하루 호출 수 제한이 있어서(기본 3,000회),
+# 키마다 오늘 쓴 호출 수를 기록하고 남은 키를 돌아가며 쓴다.
+# 모든 키가 한도에 닿으면 QuotaExceeded → 남은 작업은 다음 날(--resume)로 미룸.
+# 사용량은 SQLite에 남겨서 여러 번 나눠 실행해도 같은 날이면 이어서 셈.
+# 한도 확인과 사용량 증가는 한 번에(UPDATE ... WHERE calls < 한도) → 동시에 여러 곳에서 써도 한도를 안 넘김
+
+KST = timezone(timedelta(hours=9))   # KOBIS 한도는 한국 날짜 기준으로 초기화
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    api_key TEXT NOT NULL,
+    day     TEXT NOT NULL,
+    calls   INTEGER NOT NULL,
+    PRIMARY KEY (api_key, day)
+);
+"""
+
+
+class QuotaExceeded(RuntimeError):
+    """모든 키의 오늘 호출 한도를 다 쓴 경우"""
+
+
+class KeyPool:
+    """
+    여러 API 키를 돌아가며 쓰는 풀
+    - daily_quota=None이면 한도 없음
+    - usage_file=None이면 사용량을 메모리에만 기록
+    """
+
+    def __init__(
+        self,
+        keys: list[str],
+        *,
+        daily_quota: int | None = None,
+        usage_file: Path | None = None,
+    ):
+        if not keys:
+            raise ValueError("API 키가 하나도 없어요")
+        self.keys = list(dict.fromkeys(keys))
+        self.daily_quota = daily_quota
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self._conn = None
+        self._memory: dict[tuple[str, str], int] = {}
+        if usage_file is not None:
+            usage_file = Path(usage_file)
+            usage_file.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(usage_file, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(KST).strftime("%Y-%m-%d")
+
+    def used(self, key: str) -> int:
+        day = self._today()
+        if self._conn is None:
+            return self._memory.get((key, day), 0)
+        row = self._conn.execute(
+            "SELECT calls FROM usage WHERE api_key = ? AND day = ?", (key, day)
+        ).fetchone()
+        return 0 if row is None else row[0]
+
+    def _add(self, key: str, n: int) -> None:
+        day = self._today()
+        if self._conn is None:
+            self._memory[(key, day)] = self._memory.get((key, day), 0) + n
+            return
+        self._conn.execute(
+            "INSERT INTO usage VALUES (?, ?, ?) "
+            "ON CONFLICT(api_key, day) DO UPDATE SET calls = calls + excluded.calls",
+            (key, day, n),
+        )
+
+    def _reserve(self, key: str) -> bool:
+        """한도가 남았으면 사용량을 1 올리고 True (확인과 증가를 한 번에 → 다른 호출/프로세스와 겹쳐도 안전)"""
+        if self.daily_quota is None:
+            self._add(key, 1)
+            return True
+        day = self._today()
+        if self._conn is None:
+            calls = self._memory.get((key, day), 0)
+            if calls >= self.daily_quota:
+                return False
+            self._memory[(key, day)] = calls + 1
+            return True
+        self._conn.execute("INSERT INTO usage VALUES (?, ?, 0) ON CONFLICT(api_key, day) DO NOTHING", (key, day))
+        cur = self._conn.execute(
+            "UPDATE usage SET calls = calls + 1 WHERE api_key = ? AND day = ? AND calls < ?",
+            (key, day, self.daily_quota),
+        )
+        return cur.rowcount == 1
+
+    def remaining(self) -> int | None:
+        """오늘 남은 호출 수 합계 (한도 없으면 None)"""
+        if self.daily_quota is None:
+            return None
+        return sum(max(0, self.daily_quota - self.used(k)) for k in self.keys)
+
+    def take(self) -> str:
+        """다음 호출에 쓸 키를 골라 사용량을 1 올린다 (한도 남은 키를 순서대로 돌아가며)"""
+        with self._lock:
+            for i in range(len(self.keys)):
+                key = self.keys[(self._next + i) % len(self.keys)]
+                if self._reserve(key):
+                    self._next = (self._next + i + 1) % len(self.keys)
+                    return key
+        raise QuotaExceeded("모든 KOBIS 키의 오늘 호출 한도를 다 썼어요")
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+
+import pandas as pd
+from lxml import etree
+
+# =========================
+# KOBIS 엑셀(.xls) 내보내기 전용 테이블 리더
+# =========================
+# KOBIS에서 받은 .xls는 사실 HTML 문서라서 pd.read_html로 읽을 수 있지만,
+# read_html은 문서 안의 모든 <table>을 DataFrame으로 만든 뒤에야 고를 수 있다.
+# 여기서는 HTML을 조금씩 흘려 읽으면서(streaming)
+#   1) 헤더가 컬럼 맵과 맞는 첫 번째 테이블만 골라서
+#   2) 필요한 컬럼의 셀만 모으고, 숫자 컬럼은 읽는 즉시 '1,234' → 1234로 변환하고
+#   3) 그 테이블이 끝나면 나머지 문서는 읽지 않고 멈춘다.
+
+CHUNK_SIZE = 1 << 16
+
+# ✅ 파싱 결과 스냅샷 캐시
+# 원본 파일 내용(바이트)의 해시를 키로, 정리된 테이블을 parquet로 저장해 둔다.
+# 원본이 그대로면 다음 실행부터는 HTML 파싱 없이 스냅샷만 읽음.
+USE_SNAPSHOT_CACHE = True
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "data" / ".cache"
+SNAPSHOT_VERSION = 1   # 리더/컬럼 정리 방식이 바뀌면 올려서 기존 스냅샷 무효화
+
+# 연도별 박스오피스 (KOBIS_연도별박스오피스_{year}.xls)
+BOXOFFICE_COLUMNS = {
+    "영화명": "movieNm",
+    "개봉일": "openDt",
+    "관객수": "audiAcc",
+    "매출액": "salesAcc",
+    "스크린수": "scrnCnt",
+    "순위": "rank",
+}
+BOXOFFICE_REQUIRED = {"movieNm", "openDt", "audiAcc"}
+BOXOFFICE_INT_COLS = {"audiAcc", "salesAcc", "scrnCnt", "rank"}
+
+# 연도별 총 관객수 및 매출액 (KOBIS_총_관객수_및_매출액_연도별.xls)
+# 헤더가 2줄(연도 / 한국·외국·전체 × 매출액·관객수...)이라 "상위_하위"로 펼친 이름을 쓴다
+YEAR_BASE_COLUMNS = {
+    "연도": "year",
+    "전체_매출액": "total_sales",
+    "전체_관객수": "total_audience",
+}
+YEAR_BASE_REQUIRED = {"year", "total_sales", "total_audience"}
+YEAR_BASE_INT_COLS = {"year", "total_sales", "total_audience"}
+
+# pd.read_html과 같은 방식으로 셀 안 공백 정리 (줄바꿈/연속 공백 → 공백 1개)
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+def _clean_text(text: str) -> str:
+    return _RE_WHITESPACE.sub(" ", text).strip()
+
+def _to_int(text: str) -> int | None:
+    try:
+        return int(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+class _KobisTableReader:
+    """
+    lxml HTMLPullParser로 table / tr 이벤트만 받아서 처리하는 스트리밍 리더.
+    조건에 맞는 테이블을 다 읽으면 done=True로 바뀐다.
+    (읽은 tr은 바로 비워서 문서 전체 트리가 메모리에 쌓이지 않게 함)
+    """
+
+    def __init__(self, column_map: dict[str, str], required: set[str], int_cols: set[str]):
+        self.column_map = column_map
+        self.required = required
+        self.int_cols = int_cols
+
+        self.done = False
+        self.columns: list[str] = []          # 매칭된 테이블의 (변환된) 컬럼명
+        self.rows: list[list] = []
+
+        self._depth = 0                        # 중첩 table 대비
+        self._reset_table()
+
+    def _reset_table(self):
+        self._header_rows: list[list[tuple[str, int, int]]] = []   # (텍스트, rowspan, colspan)
+        self._picked: list[tuple[int, str]] | None = None         # (셀 위치, 컬럼명)
+        self._skip = False                                         # 헤더가 안 맞는 테이블
+
+    # ---- 헤더 처리
+    def _flatten_header(self) -> list[str]:
+        """rowspan/colspan을 풀어서 컬럼별 '상위_하위' 이름 리스트로 만든다"""
+        grid: dict[tuple[int, int], str] = {}
+        for r, row in enumerate(self._header_rows):
+            c = 0
+            for text, rowspan, colspan in row:
+                while (r, c) in grid:
+                    c += 1
+                for dr in range(rowspan):
+                    for dc in range(colspan):
+                        grid[(r + dr, c + dc)] = text
+                c += colspan
+
+        n_cols = max((c for _, c in grid), default=-1) + 1
+        names = []
+        for c in range(n_cols):
+            levels = []
+            for r in range(len(self._header_rows)):
+                text = grid.get((r, c), "")
+                if text and text not in levels:
+                    levels.append(text)
+            names.append("_".join(levels))
+        return names
+
+    def _pick_columns(self):
+        names = self._flatten_header()
+        picked = [(i, self.column_map[n]) for i, n in enumerate(names) if n in self.column_map]
+        if self.required.issubset({col for _, col in picked}):
+            self._picked = picked
+            self.columns = [col for _, col in picked]
+        else:
+            self._skip = True
+
+    # ---- 이벤트 처리
+    def handle(self, event: str, el) -> None:
+        if self.done:
+            return
+
+        if el.tag == "table":
+            if event == "start":
+                self._depth += 1
+                if self._depth == 1:
+                    self._reset_table()
+            else:
+                self._depth -= 1
+                if self._depth == 0 and self._picked is not None:
+                    self.done = True
+            return
+
+        # tr은 끝났을 때(셀이 다 채워졌을 때)만 처리
+        if event != "end" or self._depth != 1:
+            return
+        if not self._skip:
+            self._handle_row(el)
+
+        # 처리한 행은 비우고, 앞에 쌓인 형제 노드도 지워서 메모리 유지
+        el.clear()
+        parent = el.getparent()
+        if parent is not None:
+            while el.getprevious() is not None:
+                del parent[0]
+
+    def _handle_row(self, tr) -> None:
+        cells = [c for c in tr if c.tag in ("th", "td")]
+        if not cells:
+            return
+
+        if self._picked is None:
+            if all(c.tag == "th" for c in cells):
+                self._header_rows.append([
+                    (
+                        _clean_text("".join(c.itertext())),
+                        int(c.get("rowspan") or 1),
+                        int(c.get("colspan") or 1),
+                    )
+                    for c in cells
+                ])
+                return
+            # 첫 데이터 행을 만나는 순간 헤더 확정
+            self._pick_columns()
+            if self._skip:
+                return
+
+        values = []
+        for i, col in self._picked:
+            text = _clean_text("".join(cells[i].itertext())) if i < len(cells) else ""
+            if col in self.int_cols:
+                values.append(_to_int(text))
+            else:
+                values.append(text or None)   # 빈 셀은 read_html처럼 결측
+        self.rows.append(values)
+
+
+def read_kobis_table(
+    path: Path,
+    column_map: dict[str, str],
+    *,
+    required: set[str],
+    int_cols: set[str] = frozenset(),
+    encoding: str = "utf-8",
+) -> pd.DataFrame:
+    """
+    KOBIS .xls(HTML)에서 column_map 헤더와 맞는 첫 번째 테이블만 읽어서 DataFrame으로 반환
+
+    - column_map: 원본 헤더명 → 바꿀 컬럼명 (맵에 없는 컬럼은 버림)
+    - required: 이 컬럼들이 다 있어야 '맞는 테이블'로 인정
+    - int_cols: 읽으면서 바로 숫자로 바꿀 컬럼 (변환 실패는 결측)
+    """
+    reader = _KobisTableReader(column_map, set(required), set(int_cols))
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=("table", "tr"), encoding=encoding)
+
+    with open(path, "rb") as f:
+        while not reader.done:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for event, el in parser.read_events():
+                reader.handle(event, el)
+                if reader.done:
+                    break
+
+    if not reader.done:
+        raise ValueError(f"{path}에서 필요한 컬럼({sorted(required)})이 있는 테이블을 찾지 못함")
+
+    df = pd.DataFrame(reader.rows, columns=reader.columns)
+    for col in int_cols & set(df.columns):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+# =========================
+# 스냅샷 캐시
+# =========================
+def _snapshot_key(path: Path, kind: str) -> str:
+    h = hashlib.sha256(f"{kind}:v{SNAPSHOT_VERSION}:".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+def _read_with_snapshot(path: Path, kind: str, reader) -> pd.DataFrame:
+    """
+    path 내용 해시에 맞는 스냅샷이 있으면 그걸 읽고, 없으면 reader로 파싱한 뒤 스냅샷 저장
+    (같은 원본의 예전 스냅샷은 지워서 캐시 폴더가 계속 커지지 않게 함)
+    """
+    path = Path(path)
+    snapshot = SNAPSHOT_DIR / f"{path.stem}.{kind}.{_snapshot_key(path, kind)}.parquet"
+    if snapshot.exists():
+        return pd.read_parquet(snapshot)
+
+    df = reader(path)
+
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    for old in SNAPSHOT_DIR.glob(f"{path.stem}.{kind}.*.parquet"):
+        old.unlink(missing_ok=True)
+
+    # 임시 파일에 쓰고 교체 (병렬 워커/중단 시에도 반쯤 쓴 스냅샷이 남지 않게)
+    tmp = snapshot.with_name(snapshot.name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(snapshot)
+    return df
+
+def _read_boxoffice(path: Path) -> pd.DataFrame:
+    return read_kobis_table(
+        path,
+        BOXOFFICE_COLUMNS,
+        required=BOXOFFICE_REQUIRED,
+        int_cols=BOXOFFICE_INT_COLS,
+    )
+
+def _read_year_base(path: Path) -> pd.DataFrame:
+    return read_kobis_table(
+        path,
+        YEAR_BASE_COLUMNS,
+        required=YEAR_BASE_REQUIRED,
+        int_cols=YEAR_BASE_INT_COLS,
+    )
+
+def read_boxoffice_table(path: Path, *, use_cache: bool = USE_SNAPSHOT_CACHE) -> pd.DataFrame:
+    """연도별 박스오피스 파일 → movieNm / openDt / audiAcc / salesAcc / scrnCnt / rank"""
+    if use_cache:
+        return _read_with_snapshot(path, "boxoffice", _read_boxoffice)
+    return _read_boxoffice(path)
+
+def read_year_base_table(path: Path, *, use_cache: bool = USE_SNAPSHOT_CACHE) -> pd.DataFrame:
+    """연도별 총 관객수 및 매출액 파일 → year / total_sales / total_audience"""
+    if use_cache:
+        return _read_with_snapshot(path, "year_base", _read_year_base)
+    return _read_year_base(path)
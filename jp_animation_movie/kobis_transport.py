@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# =========================
+# KOBIS 호출용 재시도 / 서킷 브레이커 / 지연 통계
+# =========================
+# - 일시적 오류(타임아웃, 연결 끊김, 5xx, 429)는 지수 백오프 + 지터로 재시도
+# - 연속 실패가 쌓이면 서킷을 열어서 잠깐 요청을 멈춤 (KOBIS가 버벅일 때 계속 두드리지 않게)
+#   → 쉬는 시간이 지나면 요청 1개만 먼저 보내 보고(half-open) 성공하면 다시 정상 운영
+# - 엔드포인트별 지연 히스토그램 / 재시도 횟수 / 오류율을 모아서 실행 끝에 출력
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# 지연 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class KobisUnavailable(RuntimeError):
+    """재시도를 다 해도 KOBIS 응답을 못 받은 경우"""
+
+
+class KobisRequestError(RuntimeError):
+    """KOBIS가 이 요청 자체를 거부한 경우 (재시도해도 소용없는 4xx, 키 오류 faultInfo 등) → 그 영화만 실패 처리"""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+def backoff_delay(attempt: int, *, base: float = 0.5, cap: float = 10.0) -> float:
+    """attempt번째(0부터) 재시도 전 대기 시간: 0 ~ min(cap, base*2^attempt) 사이 랜덤 (full jitter)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    연속 failure_threshold번 실패하면 cooldown초 동안 열림(요청 대기)
+    쉬는 시간이 지나면 1개만 시험 삼아 통과시키고, 결과에 따라 닫거나 다시 연다.
+    시험 요청을 보낸 쪽은 wait()가 True를 돌려받고, 끝나면(어떤 식으로든) release_trial()을 불러야 함
+    → 결과 없이 끝난 시험(한도 초과/취소 등)은 다시 open(쉬는 시간 지난 상태)으로 돌려서 다음 요청이 시험을 이어받음
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 15.0, trial_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.trial_timeout = trial_timeout   # 시험 요청이 이보다 오래 안 끝나면 다른 요청이 시험을 이어받음
+        self.state = "closed"      # closed / open / half_open
+        self.opened = 0            # 열린 횟수 (통계용)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+
+    async def wait(self) -> bool:
+        """요청을 보내도 될 때까지 기다림. return: 이 호출이 시험 요청이면 True"""
+        while True:
+            if self.state == "closed":
+                return False
+            if self.state == "open":
+                remaining = self._opened_at + self.cooldown - time.monotonic()
+                if remaining <= 0:
+                    return self._start_trial()
+                await asyncio.sleep(remaining)
+            elif time.monotonic() - self._trial_started > self.trial_timeout:
+                # 안전장치: 시험 요청 결과가 너무 안 오면 이 요청이 시험을 이어받음
+                return self._start_trial()
+            else:
+                # 시험 요청 결과를 기다리는 중
+                await asyncio.sleep(0.1)
+
+    def _start_trial(self) -> bool:
+        self.state = "half_open"
+        self._trial_started = time.monotonic()
+        return True
+
+    def release_trial(self) -> None:
+        """시험 요청이 성공/실패 기록 없이 끝났으면 다시 open으로 (쉬는 시간은 이미 지났으니 바로 다음 시험)"""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class EndpointStats:
+    """엔드포인트별 호출 수 / 오류 수 / 재시도 수 / 지연 분포"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.retries: dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, *, ok: bool) -> None:
+        self.latencies[endpoint].append(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        self.retries[endpoint] += 1
+
+    @staticmethod
+    def _percentile(sorted_values: list[float], q: float) -> float:
+        idx = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+        return sorted_values[idx]
+
+    def histogram(self, endpoint: str) -> list[int]:
+        """LATENCY_BUCKETS 구간별 개수 (마지막 칸은 최대 구간 초과)"""
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for s in self.latencies[endpoint]:
+            counts[bisect_left(LATENCY_BUCKETS, s)] += 1
+        return counts
+
+    def report(self) -> str:
+        if not self.latencies:
+            return "API 호출 없음"
+
+        labels = [f"≤{b:g}s" for b in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]:g}s"]
+        lines = []
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            n = len(values)
+            lines.append(
+                f"[{endpoint}] 시도 {n}회 | 오류율 {self.errors[endpoint] / n:.1%} | 재시도 {self.retries[endpoint]}회 | "
+                f"p50 {self._percentile(values, 0.5):.3f}s · p95 {self._percentile(values, 0.95):.3f}s · "
+                f"max {values[-1]:.3f}s | 합계 {sum(values):.1f}s"
+            )
+            hist = self.histogram(endpoint)
+            lines.append("    " + "  ".join(f"{lab} {c}" for lab, c in zip(labels, hist) if c))
+        return "\n".join(lines)
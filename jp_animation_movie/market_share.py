@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pandas as pd
+
+# =========================
+# 여러 기준(분모)의 시장 점유율
+# =========================
+# 03의 audi_share / sales_share는 "그 해 전체 영화 시장" 대비 점유율.
+# 여기서는 같은 점유율을 다른 시장 기준으로도 바꿔서 컬럼으로 저장해 둔다.
+#   *_in_anim   : 같은 기간 애니 시장(데이터 안 애니 흥행작 점유율 합) 안에서의 비중 (애니가 아니면 결측)
+#   *_in_nation : 같은 기간 같은 대표 국적(nations 첫 번째) 영화들 안에서의 비중
+#   *_in_period : 기간 전체 시장(그 기간 연도들의 전체 매출액/관객수 합) 대비 점유율
+# → 예: 기간별 "애니 시장 내 일본 애니 비중" = 일본 애니 행의 audi_share_in_anim 합
+# 분모는 전부 groupby transform 한 번씩으로 계산 (행 단위 반복 없음)
+
+SHARE_BASES = {
+    "audi_share": ("audiAcc", "total_audience"),
+    "sales_share": ("salesAcc", "total_sales"),
+}
+MARKETS = ["anim", "nation", "period"]
+
+MARKET_SHARE_COLUMNS = [f"{share}_in_{market}" for share in SHARE_BASES for market in MARKETS]
+
+
+def main_nation(nations: pd.Series) -> pd.Series:
+    """'일본, 미국' → '일본' (국적이 여러 개면 첫 번째를 대표 국적으로)"""
+    return nations.fillna("").astype(str).str.split(",").str[0].str.strip()
+
+def add_market_shares(df2: pd.DataFrame) -> pd.DataFrame:
+    """df2(점유율 계산까지 끝난 마스터)에 MARKET_SHARE_COLUMNS + main_nation 컬럼 추가"""
+    df2 = df2.copy()
+    shares = list(SHARE_BASES)
+    df2["main_nation"] = main_nation(df2["nations"])
+
+    # 1) 애니 시장: 같은 기간 애니 행들의 점유율 합이 분모
+    anim = df2["is_animation"].astype(bool)
+    anim_total = df2[shares].where(anim).groupby(df2["period"], observed=True).transform("sum")
+    # 2) 국적 시장: 같은 기간 × 대표 국적
+    nation_total = df2.groupby(["period", "main_nation"], observed=True)[shares].transform("sum")
+
+    for share in shares:
+        df2[f"{share}_in_anim"] = (df2[share] / anim_total[share]).where(anim)
+        df2[f"{share}_in_nation"] = df2[share] / nation_total[share]
+
+    # 3) 기간 시장: 기간에 속한 연도들의 전체 시장 합 (연도당 한 번만 더함)
+    one_row_per_year = df2.drop_duplicates("year")
+    for share, (acc, total) in SHARE_BASES.items():
+        period_total = one_row_per_year.groupby("period", observed=True)[total].sum()
+        df2[f"{share}_in_period"] = df2[acc] / df2["period"].map(period_total)
+
+    return df2
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from covid_split import PERIOD_ORDER
+
+# =========================
+# 마스터 압축 표현 (카테고리 + 비트마스크)
+# =========================
+# 마스터의 genres / nations는 "애니메이션, 가족"처럼 쉼표로 이은 문자열이라
+# 장르·국적 조건으로 거를 때마다 str.contains로 문자열을 전부 훑어야 했다.
+# 로드할 때 한 번만
+#   - period / group          → 순서 고정 카테고리
+#   - genres / nations 문자열 → 카테고리 (같은 문자열이 계속 반복되니까)
+#   - 장르 / 국적 태그        → 비트마스크 정수 컬럼 (genre_mask / nation_mask)
+# 로 바꿔 두고, 태그 ↔ 비트 번호는 어휘표(vocab)로 따로 들고 있는다.
+# → "장르 A 또는 B × 국적 C" 같은 조건이 정수 AND 한 번 (tag_mask)
+#
+# 태그가 64개를 넘으면 마스크 컬럼을 64개 단위로 더 만든다 (nation_mask, nation_mask_1, ...)
+
+GROUP_ORDER = ["일본 애니", "일반 애니"]
+
+# 원본 컬럼 → 마스크 컬럼 접두사
+TAG_FIELDS = {"genres": "genre_mask", "nations": "nation_mask"}
+WORD_BITS = 64
+
+VOCAB_ATTR = "tag_vocab"   # df2.attrs에 어휘표를 붙여 두는 키
+
+
+def split_tags(s: pd.Series) -> pd.Series:
+    """'애니메이션, 가족' → ['애니메이션', '가족'] (빈 값은 빈 리스트)"""
+    return s.fillna("").astype(str).str.split(",").map(lambda xs: [x.strip() for x in xs if x.strip()])
+
+def build_vocab(df2: pd.DataFrame) -> pd.DataFrame:
+    """
+    return: field / tag / word(몇 번째 마스크 컬럼) / bit 어휘표
+    많이 나오는 태그일수록 앞 번호 (보통 첫 번째 마스크 컬럼 하나로 끝남)
+    """
+    rows = []
+    for field in TAG_FIELDS:
+        counts = split_tags(df2[field]).explode().dropna().value_counts(sort=False)
+        tags = sorted(counts.index, key=lambda t: (-counts[t], t))
+        rows += [(field, tag, i // WORD_BITS, i % WORD_BITS) for i, tag in enumerate(tags)]
+    return pd.DataFrame(rows, columns=["field", "tag", "word", "bit"])
+
+def mask_columns(field: str, n_words: int) -> list[str]:
+    prefix = TAG_FIELDS[field]
+    return [prefix if w == 0 else f"{prefix}_{w}" for w in range(max(n_words, 1))]
+
+def encode_tags(s: pd.Series, vocab: pd.DataFrame, field: str) -> pd.DataFrame:
+    """쉼표 문자열 컬럼 → 마스크 컬럼(uint64)들. 고유 문자열마다 한 번만 계산해서 펼침"""
+    v = vocab[vocab["field"] == field]
+    lookup = {t: (w, np.uint64(1) << np.uint64(b)) for t, w, b in zip(v["tag"], v["word"], v["bit"])}
+    cols = mask_columns(field, int(v["word"].max()) + 1 if len(v) else 1)
+
+    codes, uniques = pd.factorize(s.fillna("").astype(str))
+    table = np.zeros((len(uniques), len(cols)), dtype=np.uint64)
+    for i, tags in enumerate(split_tags(pd.Series(uniques))):
+        for t in tags:
+            w, bit = lookup[t]
+            table[i, w] |= bit
+
+    return pd.DataFrame(table[codes], columns=cols, index=s.index)
+
+def encode_master(df2: pd.DataFrame) -> pd.DataFrame:
+    """
+    04/05 로드 직후 한 번 호출.
+    period/group 카테고리 + genre_mask/nation_mask 컬럼을 붙이고 어휘표를 df2.attrs에 저장
+    """
+    df2 = df2.copy()
+    vocab = build_vocab(df2)
+
+    for field in TAG_FIELDS:
+        masks = encode_tags(df2[field], vocab, field)
+        df2[masks.columns] = masks
+        df2[field] = df2[field].astype("category")
+    if "main_nation" in df2.columns:
+        df2["main_nation"] = df2["main_nation"].astype("category")
+
+    df2["period"] = pd.Categorical(df2["period"], categories=PERIOD_ORDER, ordered=True)
+
+    # 애니만 일본 애니 / 일반 애니로 나눔 (애니가 아니면 결측)
+    group = np.where(df2["is_japan"].astype(bool), GROUP_ORDER[0], GROUP_ORDER[1])
+    df2["group"] = pd.Categorical(group, categories=GROUP_ORDER, ordered=True)
+    df2.loc[~df2["is_animation"].astype(bool), "group"] = np.nan
+
+    df2.attrs[VOCAB_ATTR] = vocab
+    return df2
+
+def tag_bits(vocab: pd.DataFrame, field: str, tags: list[str]) -> np.ndarray:
+    """태그 목록 → 마스크 컬럼별 비트 (어휘표에 없는 태그는 아무 행도 안 걸림)"""
+    v = vocab[(vocab["field"] == field) & vocab["tag"].isin(tags)]
+    n_words = int(vocab.loc[vocab["field"] == field, "word"].max()) + 1 if (vocab["field"] == field).any() else 1
+    bits = np.zeros(n_words, dtype=np.uint64)
+    for w, b in zip(v["word"], v["bit"]):
+        bits[w] |= np.uint64(1) << np.uint64(b)
+    return bits
+
+def tag_mask(
+    df2: pd.DataFrame,
+    *,
+    genres: list[str] | str | None = None,
+    nations: list[str] | str | None = None,
+    match: str = "any",
+) -> pd.Series:
+    """
+    장르 × 국적 조건 → 불리언 Series (encode_master 거친 df2 기준)
+    match="any": 나열한 태그 중 하나라도 / "all": 나열한 태그 전부
+    예) tag_mask(df2, genres="애니메이션", nations=["일본", "미국"])
+    """
+    hits = tag_hits(df2, None, genres=genres, nations=nations, match=match)
+    return pd.Series(hits, index=df2.index)
+
+def tag_hits(
+    df2: pd.DataFrame,
+    rows: np.ndarray | None,
+    *,
+    genres: list[str] | str | None = None,
+    nations: list[str] | str | None = None,
+    match: str = "any",
+) -> np.ndarray:
+    """tag_mask와 같은 조건을 rows(행 위치 배열)만 골라서 계산 (None이면 전체) → numpy 불리언 배열"""
+    return compile_tags(df2, genres=genres, nations=nations, match=match)(rows)
+
+def compile_tags(
+    df2: pd.DataFrame,
+    *,
+    genres: list[str] | str | None = None,
+    nations: list[str] | str | None = None,
+    match: str = "any",
+):
+    """
+    조건 → rows를 받아 불리언 배열을 돌려주는 함수
+    (어휘표 조회/마스크 배열 꺼내기는 여기서 한 번만 → 같은 조건으로 여러 번 거를 때 씀)
+    """
+    if match not in ("any", "all"):
+        raise ValueError(f"match는 'any' 또는 'all': {match!r}")
+    vocab = df2.attrs.get(VOCAB_ATTR)
+    if vocab is None:
+        raise ValueError("encode_master()를 거친 마스터가 아닙니다 (어휘표 없음)")
+
+    checks = []   # 필드별 [(마스크 배열, 비트), ...]
+    never = False
+    for field, tags in (("genres", genres), ("nations", nations)):
+        if tags is None:
+            continue
+        tags = [tags] if isinstance(tags, str) else list(tags)
+        bits = tag_bits(vocab, field, tags)
+        if match == "all" and len(set(tags)) > int(sum(bin(int(b)).count("1") for b in bits)):
+            # 어휘표에 없는 태그를 "전부" 가진 행은 없음
+            never = True
+        cols = mask_columns(field, len(bits))
+        checks.append([(df2[c].to_numpy(dtype=np.uint64), b) for c, b in zip(cols, bits)])
+
+    def hits(rows: np.ndarray | None) -> np.ndarray:
+        size = len(df2) if rows is None else len(rows)
+        out = np.full(size, not never, dtype=bool)
+        if never:
+            return out
+        for field_checks in checks:
+            hit = np.zeros(size, dtype=bool) if match == "any" else np.ones(size, dtype=bool)
+            for values, b in field_checks:
+                m = (values if rows is None else values[rows]) & b
+                if match == "any":
+                    hit |= m != 0
+                else:
+                    hit &= m == b
+            out &= hit
+        return out
+
+    return hits
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+import pandas as pd
+from aiohttp import web
+
+from kobis_api import INFO_PATH, KOBIS_BASE_URL, SEARCH_PATH
+from movie_text import clean_movieNm, norm_openDt
+from stages import load_stage
+from storage import read_frame
+
+# =========================
+# 로컬 KOBIS 대역 서버 (녹화/재생 + 지연/오류/호출 제한 흉내)
+# =========================
+# 02(메타데이터 붙이기)를 네트워크 없이 돌려보고 속도를 재기 위한 가짜 KOBIS.
+# - serve : 녹화해 둔 응답(fixture)을 그대로 돌려줌. 녹화에 없는 요청은
+#           지금까지 본 영화 목록(fixture + 02 결과 파일)으로 KOBIS처럼 답을 만들어 줌
+# - record: 진짜 KOBIS로 요청을 넘기고, 받은 응답을 fixture로 저장
+# - bench : 서버를 띄우고 동시 요청 수별로 02를 돌려서 처리량 비교
+# 지연(평균 + 가끔 느린 응답), 503 오류, 초당 호출 제한(429)을 옵션으로 흉내낼 수 있다.
+#
+# 02에서 쓰려면 API_BASE_URL = "http://127.0.0.1:8765" 로 바꾸고 `python mock_kobis_server.py serve`
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+
+FIXTURE_DIR = DATA_DIR / "kobis_fixtures"   # 엔드포인트별 {endpoint}.jsonl
+SEED_FILE = DATA_DIR / "boxoffice_top30_with_movieinfo.parquet"   # 02 결과 (영화 목록 씨앗)
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+ENDPOINTS = (SEARCH_PATH, INFO_PATH)
+
+# fixture 키에서 빼는 파라미터 (키가 달라도 같은 요청으로 봄)
+IGNORED_PARAMS = {"key"}
+
+
+def fixture_key(query) -> str:
+    return json.dumps(
+        sorted((k, str(v)) for k, v in query.items() if k not in IGNORED_PARAMS),
+        ensure_ascii=False,
+    )
+
+# =========================
+# 1) fixture 저장소
+# =========================
+class FixtureStore:
+    """
+    녹화된 응답 + 그 응답들에서 모은 영화 목록
+    녹화 그대로 재생할 수 있으면 그걸 쓰고, 없으면 영화 목록으로 응답을 만든다.
+    """
+
+    def __init__(self, fixture_dir: Path = FIXTURE_DIR):
+        self.fixture_dir = Path(fixture_dir)
+        self.responses: dict[str, dict[str, dict]] = {ep: {} for ep in ENDPOINTS}
+        self.movies: dict[str, dict] = {}   # movieCd -> searchMovieList 항목
+        self.infos: dict[str, dict] = {}    # movieCd -> searchMovieInfo의 movieInfo
+
+        for endpoint in ENDPOINTS:
+            path = self._file(endpoint)
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    self.responses[endpoint][fixture_key(rec["params"])] = rec["response"]
+                    self._learn(rec["response"])
+
+    def _file(self, endpoint: str) -> Path:
+        return self.fixture_dir / f"{Path(endpoint).stem}.jsonl"
+
+    def _learn(self, response: dict) -> None:
+        for m in response.get("movieListResult", {}).get("movieList", []) or []:
+            if m.get("movieCd"):
+                self.movies.setdefault(m["movieCd"], m)
+        info = response.get("movieInfoResult", {}).get("movieInfo") or {}
+        if info.get("movieCd"):
+            self.infos[info["movieCd"]] = info
+
+    def add(self, endpoint: str, query, response: dict) -> None:
+        """녹화: 메모리에 넣고 파일에도 한 줄 추가"""
+        params = {k: str(v) for k, v in query.items() if k not in IGNORED_PARAMS}
+        self.responses[endpoint][fixture_key(params)] = response
+        self._learn(response)
+
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._file(endpoint), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"params": params, "response": response}, ensure_ascii=False) + "\n")
+
+    def seed_from_frame(self, df: pd.DataFrame) -> int:
+        """02 결과(movieCd / movieNm / openDt_norm / genres / nations)에서 영화 목록 채우기. return: 추가 편수"""
+        added = 0
+        for r in df.astype(str).itertuples(index=False):
+            movieCd = r.movieCd.removesuffix(".0")
+            if movieCd in ("", "nan", "<NA>") or movieCd in self.movies:
+                continue
+            genres = [g for g in r.genres.split(", ") if g and g != "nan"]
+            nations = [n for n in r.nations.split(", ") if n and n != "nan"]
+            self.movies[movieCd] = {
+                "movieCd": movieCd,
+                "movieNm": r.movieNm,
+                "openDt": norm_openDt(r.openDt_norm),
+                "genreAlt": ",".join(genres),
+                "nationAlt": ",".join(nations),
+                "repNationNm": nations[0] if nations else "",
+            }
+            self.infos.setdefault(movieCd, {
+                "movieCd": movieCd,
+                "movieNm": r.movieNm,
+                "genres": [{"genreNm": g} for g in genres],
+                "nations": [{"nationNm": n} for n in nations],
+            })
+            added += 1
+        return added
+
+    def replay(self, endpoint: str, query) -> dict:
+        recorded = self.responses[endpoint].get(fixture_key(query))
+        if recorded is not None:
+            return recorded
+        if endpoint == SEARCH_PATH:
+            return self._search(query)
+        return self._info(query)
+
+    def _search(self, query) -> dict:
+        # KOBIS처럼 영화명은 부분일치, 개봉연도(openStartDt~openEndDt)는 범위로 거름
+        name = clean_movieNm(query.get("movieNm", "")).replace(" ", "")
+        start, end = query.get("openStartDt", ""), query.get("openEndDt", "")
+        hits = [
+            m for m in self.movies.values()
+            if (not name or name in clean_movieNm(m["movieNm"]).replace(" ", ""))
+            and (not start or m.get("openDt", "")[:4] >= start)
+            and (not end or m.get("openDt", "")[:4] <= end)
+        ]
+        hits.sort(key=lambda m: m["movieCd"])
+
+        page = int(query.get("curPage", 1) or 1)
+        size = int(query.get("itemPerPage", 10) or 10)
+        return {"movieListResult": {
+            "totCnt": len(hits),
+            "source": "mock",
+            "movieList": hits[(page - 1) * size:page * size],
+        }}
+
+    def _info(self, query) -> dict:
+        info = self.infos.get(query.get("movieCd", ""))
+        if info is None:
+            return {"faultInfo": {"message": "등록되지 않은 영화코드입니다.", "errorCode": "mock-404"}}
+        return {"movieInfoResult": {"movieInfo": info, "source": "mock"}}
+
+# =========================
+# 2) 서버
+# =========================
+class MockKobis:
+    """
+    latency      : 평균 응답 지연(초), jitter만큼 ± 랜덤
+    slow_rate    : 이 비율만큼은 slow_latency초 걸리는 느린 응답 (꼬리 지연 흉내)
+    error_rate   : 이 비율만큼 503
+    rate_limit   : 초당 허용 호출 수 (넘으면 429 + Retry-After)
+    fail_titles  : {영화명: HTTP 상태} 이 영화명 검색은 그 상태로 거절 (404 같은 4xx 흉내)
+    upstream     : 주면 녹화 모드 (진짜 KOBIS로 넘기고 응답 저장)
+    """
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        *,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 3.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        upstream: str | None = None,
+        fail_titles: dict[str, int] | None = None,
+        seed: int | None = None,
+    ):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.fail_titles = fail_titles or {}
+        self._random = random.Random(seed)
+
+        self.calls: dict[str, int] = defaultdict(int)
+        self.status: dict[int, int] = defaultdict(int)
+        self._window = (0, 0)   # (초, 그 초에 받은 호출 수)
+        self._session: aiohttp.ClientSession | None = None
+
+    def _over_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        sec = int(time.monotonic())
+        start, n = self._window
+        n = n + 1 if sec == start else 1
+        self._window = (sec, n)
+        return n > self.rate_limit
+
+    def _delay(self) -> float:
+        if self._random.random() < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    async def _record(self, endpoint: str, query) -> dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        async with self._session.get(f"{self.upstream}/{endpoint}", params=dict(query)) as r:
+            r.raise_for_status()
+            data = await r.json(content_type=None)
+        if "faultInfo" not in data:   # 오류 응답(키 문제 등)은 녹화하지 않음
+            self.store.add(endpoint, query, data)
+        return data
+
+    async def handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"]
+        if endpoint not in ENDPOINTS:
+            raise web.HTTPNotFound()
+        self.calls[endpoint] += 1
+
+        if self._over_limit():
+            self.status[429] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if self._random.random() < self.error_rate:
+            self.status[503] += 1
+            return web.Response(status=503)
+        fail_status = self.fail_titles.get(request.query.get("movieNm", ""))
+        if fail_status:
+            self.status[fail_status] += 1
+            return web.Response(status=fail_status)
+
+        await asyncio.sleep(self._delay())
+        if self.upstream:
+            data = await self._record(endpoint, request.query)
+        else:
+            data = self.store.replay(endpoint, request.query)
+        self.status[200] += 1
+        return web.json_response(data)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"calls": self.calls, "status": self.status})
+
+    async def close(self, app: web.Application) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/_stats", self.stats),
+            web.get("/{endpoint}", self.handle),
+        ])
+        app.on_cleanup.append(self.close)
+        return app
+
+def make_store(seed_file: Path | None = SEED_FILE) -> FixtureStore:
+    store = FixtureStore(FIXTURE_DIR)
+    n_recorded = sum(len(v) for v in store.responses.values())
+    n_seeded = 0
+    if seed_file is not None:
+        try:
+            n_seeded = store.seed_from_frame(read_frame(seed_file))
+        except FileNotFoundError:
+            pass
+    print(f"fixture 응답 {n_recorded}개, 영화 목록 {len(store.movies)}편 (02 결과에서 {n_seeded}편)")
+    return store
+
+# =========================
+# 3) 처리량 측정 (동시 요청 수별로 02를 돌려봄)
+# =========================
+async def bench(server: MockKobis, concurrency_list: list[int], *, rate_per_sec: float, port: int) -> pd.DataFrame:
+    runner = web.AppRunner(server.make_app())
+    await runner.setup()
+    await web.TCPSite(runner, HOST, port).start()
+
+    stage02 = load_stage("02")
+    rows = []
+    try:
+        for concurrency in concurrency_list:
+            # 캐시/체크포인트/결과는 임시 폴더에 → 매번 빈 캐시에서 시작
+            with tempfile.TemporaryDirectory() as tmp:
+                tmp = Path(tmp)
+                stage02.API_BASE_URL = f"http://{HOST}:{port}"
+                stage02.API_CONCURRENCY = concurrency
+                stage02.API_RATE_PER_SEC = rate_per_sec
+                stage02.DAILY_QUOTA_PER_KEY = None
+                stage02.API_CACHE_FILE = tmp / "api.sqlite"
+                stage02.QUOTA_FILE = tmp / "quota.sqlite"
+                stage02.CATALOG_FILE = tmp / "catalog.sqlite"
+                stage02.CHECKPOINT_FILE = tmp / "checkpoint.jsonl"
+                stage02.OUTPUT_FILE = tmp / "out.parquet"
+                stage02.FAIL_LOG_FILE = tmp / "failed.csv"
+
+                before = sum(server.calls.values())
+                t0 = time.perf_counter()
+                # 02는 동기 main()이라 다른 스레드에서 돌림 (서버는 이 이벤트 루프에서 계속 응답)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    await asyncio.to_thread(stage02.main)
+                elapsed = time.perf_counter() - t0
+                calls = sum(server.calls.values()) - before
+
+            rows.append({
+                "concurrency": concurrency,
+                "seconds": round(elapsed, 2),
+                "calls": calls,
+                "calls_per_sec": round(calls / elapsed, 1),
+            })
+            print(rows[-1])
+    finally:
+        await runner.cleanup()
+    return pd.DataFrame(rows)
+
+# =========================
+# 실행
+# =========================
+def parse_args():
+    parser = argparse.ArgumentParser(description="로컬 KOBIS 대역 서버")
+    parser.add_argument("mode", choices=["serve", "record", "bench"])
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=0.05, help="평균 응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연 ± 랜덤 폭(초)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="느린 응답 비율")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="느린 응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 오류 비율")
+    parser.add_argument("--rate-limit", type=float, default=None, help="초당 허용 호출 수 (넘으면 429)")
+    parser.add_argument("--upstream", default=KOBIS_BASE_URL, help="record 모드에서 넘겨줄 진짜 KOBIS 주소")
+    parser.add_argument("--no-seed", action="store_true", help="02 결과 파일로 영화 목록을 채우지 않음")
+    parser.add_argument("--random-seed", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="bench에서 비교할 동시 요청 수")
+    parser.add_argument("--client-rate", type=float, default=1000.0, help="bench에서 02의 초당 호출 상한")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    store = make_store(None if args.no_seed or args.mode == "record" else SEED_FILE)
+    server = MockKobis(
+        store,
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        upstream=args.upstream if args.mode == "record" else None,
+        seed=args.random_seed,
+    )
+
+    if args.mode == "bench":
+        result = asyncio.run(bench(server, args.concurrency, rate_per_sec=args.client_rate, port=args.port))
+        print(result.to_string(index=False))
+        return
+
+    print(f"✅ {args.mode} 모드: http://{HOST}:{args.port}  (호출 통계: /_stats)")
+    web.run_app(server.make_app(), host=HOST, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import re
+
+import pandas as pd
+
+# =========================
+# 영화명 / 개봉일 정리 (02 매칭, 카탈로그 인덱스에서 같이 씀)
+# =========================
+def norm_openDt(openDt: str) -> str:
+    digits = re.sub(r"\D", "", str(openDt))
+    return digits[:8]
+
+def clean_movieNm(name: str) -> str:
+    s = str(name).replace("\xa0", " ").strip()
+    s = re.sub(r"\s+", " ", s)
+    s = s.replace("\u200b", "").replace("\ufeff", "")
+    return s
+
+def join_alt(alt: str) -> str:
+    """KOBIS 목록의 '액션,드라마' 형식을 movieInfo와 같은 '액션, 드라마' 형식으로"""
+    return ", ".join([x.strip() for x in str(alt or "").split(",") if x.strip()])
+
+# ---- Series 버전 (행마다 apply 하지 않고 한 번에 처리, 결과는 위 함수와 같음)
+def norm_openDt_series(openDt: pd.Series) -> pd.Series:
+    return openDt.astype(str).str.replace(r"\D", "", regex=True).str[:8].fillna("")
+
+def clean_movieNm_series(name: pd.Series) -> pd.Series:
+    return (
+        name.astype(str)
+            .str.replace("\xa0", " ", regex=False)
+            .str.strip()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.replace("\u200b", "", regex=False)
+            .str.replace("\ufeff", "", regex=False)
+    )
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+
+from stages import STAGE_FILES, load_stage
+from storage import write_frame
+
+# =========================
+# 01 → 02 → 03 → 04/05 파이프라인 실행기
+# =========================
+# 단계마다 입력/출력 파일을 선언해 두고
+# - 입력 파일(+ 단계 스크립트와 그 스크립트가 import하는 로컬 모듈) 해시가 지난번 성공 때와 같고
+#   출력도 그대로 있으면 그 단계는 건너뜀
+# - 앞 단계가 끝난 단계끼리는 동시에 실행 (04 리포트와 05 그래프는 서로 상관없어서 같이 돎)
+# - 단계별 걸린 시간을 마지막에 표로 출력
+# 각 단계는 지금처럼 `python 0X_....py`를 별도 프로세스로 실행한다. (출력은 [0X] 접두어로 그대로 보여줌)
+#
+# 해시는 파일 크기/수정 시각이 안 바뀌었으면 지난번 값을 재사용 → 아무것도 안 바뀐 재실행은 1초도 안 걸림
+#
+# 사용:
+#   python pipeline.py                # 바뀐 단계만
+#   python pipeline.py --force        # 전부 다시
+#   python pipeline.py --only 03 04   # 이 단계만 (앞 단계는 건너뜀 여부만 확인)
+#   python pipeline.py --dry-run      # 뭘 실행할지만 보기
+#   python pipeline.py --in-memory    # 한 프로세스에서 DataFrame을 바로 넘기며 01~05 (중간 파일 안 씀)
+#   python pipeline.py --in-memory --write-intermediates   # 중간 파일은 뒤에서(별도 스레드) 저장
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+
+STATE_FILE = DATA_DIR / ".cache" / "pipeline_state.json"
+LOG_DIR = DATA_DIR / ".cache" / "pipeline_logs"
+
+# 단계별 선언: 앞 단계 / 입력 / 출력 (glob 패턴도 됨, BASE_DIR 기준 상대 경로)
+STAGES = {
+    "01": {
+        "deps": [],
+        "inputs": ["data/KOBIS_연도별박스오피스_*.xls"],
+        "outputs": ["data/boxoffice_top30_2015_2025.parquet"],
+    },
+    "02": {
+        "deps": ["01"],
+        "inputs": ["data/boxoffice_top30_2015_2025.parquet"],
+        "outputs": ["data/boxoffice_top30_with_movieinfo.parquet"],
+    },
+    "03": {
+        "deps": ["02"],
+        "inputs": ["data/boxoffice_top30_with_movieinfo.parquet", "data/KOBIS_총_관객수_및_매출액_연도별.xls"],
+        "outputs": ["data/analysis_master_df2.parquet"],
+    },
+    "04": {
+        "deps": ["03"],
+        "inputs": ["data/analysis_master_df2.parquet"],
+        "outputs": [],   # 화면 출력만 (실행 로그가 곧 결과)
+    },
+    "05": {
+        "deps": ["03"],
+        "inputs": ["data/analysis_master_df2.parquet"],
+        "outputs": ["outputs/*.png"],
+    },
+}
+
+
+# =========================
+# 1) 입력 해시
+# =========================
+def local_imports(script: Path, seen: set[Path] | None = None) -> set[Path]:
+    """스크립트가 import하는 같은 폴더 모듈들 (재귀) → 코드가 바뀌어도 다시 실행되게"""
+    seen = set() if seen is None else seen
+    tree = ast.parse(script.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            path = BASE_DIR / f"{name.split('.')[0]}.py"
+            if path.exists() and path not in seen:
+                seen.add(path)
+                local_imports(path, seen)
+    return seen
+
+def expand(patterns: list[str]) -> list[Path]:
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(BASE_DIR.glob(pattern)))
+    return paths
+
+class FileHasher:
+    """(크기, 수정 시각)이 그대로면 지난번 해시 재사용"""
+
+    def __init__(self, known: dict[str, list]):
+        self.known = known
+
+    def digest(self, path: Path) -> str:
+        st = path.stat()
+        rel = path.relative_to(BASE_DIR).as_posix()
+        cached = self.known.get(rel)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.known[rel] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+def stage_fingerprint(stage: str, hasher: FileHasher) -> str | None:
+    """입력 + 코드 전체의 해시 (입력 파일이 하나도 없으면 None)"""
+    spec = STAGES[stage]
+    script = BASE_DIR / STAGE_FILES[stage]
+    inputs = expand(spec["inputs"])
+    if not inputs:
+        return None
+
+    h = hashlib.sha256()
+    for path in [*inputs, script, *sorted(local_imports(script))]:
+        h.update(path.relative_to(BASE_DIR).as_posix().encode())
+        h.update(hasher.digest(path).encode())
+    return h.hexdigest()
+
+def outputs_exist(stage: str) -> bool:
+    return all(expand([pattern]) for pattern in STAGES[stage]["outputs"])
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    return {"files": {}, "stages": {}}
+
+def save_state(state: dict) -> None:
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(STATE_FILE)
+
+# =========================
+# 2) 실행
+# =========================
+async def run_script(stage: str) -> int:
+    """단계 스크립트를 별도 프로세스로 실행, 출력은 [0X] 접두어로 보여주고 로그 파일에도 저장"""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", "MPLBACKEND": "Agg"}   # 그래프 창은 안 띄움
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, STAGE_FILES[stage],
+        cwd=BASE_DIR, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    with open(LOG_DIR / f"{stage}.log", "w", encoding="utf-8") as log:
+        async for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")
+            log.write(line + "\n")
+            print(f"[{stage}] {line}")
+    return await proc.wait()
+
+async def run_pipeline(
+    targets: list[str],
+    *,
+    force: bool = False,
+    dry_run: bool = False,
+) -> dict[str, tuple[str, float]]:
+    """
+    targets 단계(와 그 앞 단계)를 의존 순서대로 실행
+    return: {단계: (상태, 걸린 초)}  상태 = ran / skipped / failed / blocked / would-run
+    """
+    state = load_state()
+    hasher = FileHasher(state["files"])
+    results: dict[str, tuple[str, float]] = {}
+    done: dict[str, asyncio.Event] = {s: asyncio.Event() for s in STAGES}
+
+    async def run_stage(stage: str) -> None:
+        for dep in STAGES[stage]["deps"]:
+            await done[dep].wait()
+        try:
+            if any(results[dep][0] in ("failed", "blocked") for dep in STAGES[stage]["deps"]):
+                results[stage] = ("blocked", 0.0)
+                return
+
+            started = time.perf_counter()
+            fingerprint = stage_fingerprint(stage, hasher)
+            unchanged = (
+                fingerprint is not None
+                and state["stages"].get(stage) == fingerprint
+                and outputs_exist(stage)
+            )
+            if stage not in targets or (unchanged and not force):
+                results[stage] = ("skipped", time.perf_counter() - started)
+                return
+            if dry_run:
+                results[stage] = ("would-run", 0.0)
+                return
+
+            print(f"▶ {stage} 시작: {STAGE_FILES[stage]}")
+            code = await run_script(stage)
+            elapsed = time.perf_counter() - started
+            if code != 0:
+                results[stage] = ("failed", elapsed)
+                print(f"❌ {stage} 실패 (exit {code}) → 로그: {LOG_DIR / f'{stage}.log'}")
+                return
+
+            # 성공했을 때만 기록 (입력은 실행 전 기준 → 실행 중에 입력이 바뀌면 다음에 다시 돎)
+            state["stages"][stage] = fingerprint
+            results[stage] = ("ran", elapsed)
+        finally:
+            done[stage].set()
+
+    await asyncio.gather(*[run_stage(s) for s in STAGES])
+    if not dry_run:
+        save_state(state)
+    return results
+
+# =========================
+# 3) 메모리 모드 (한 프로세스, 디스크 왕복 없음)
+# =========================
+def run_in_memory(*, write_intermediates: bool = False, plots: bool = True) -> dict[str, tuple[str, float]]:
+    """
+    01 → 02 → 03 → 04 → 05를 한 프로세스에서 실행하고 DataFrame을 그대로 다음 단계로 넘긴다.
+    write_intermediates=True면 중간 결과를 저장하는 일은 별도 스레드에 맡기고 계산은 바로 다음 단계로.
+    (건너뛰기 판단은 안 함 → 항상 전부 계산)
+    """
+    s1, s2, s3, s4 = (load_stage(s) for s in ("01", "02", "03", "04"))
+    results: dict[str, tuple[str, float]] = {}
+    pending = []
+
+    with (ThreadPoolExecutor(max_workers=1) if write_intermediates else nullcontext()) as writer:
+
+        def save(func, *args) -> None:
+            # 저장 스레드에는 복사본을 넘김 (원본은 바로 다음 단계가 계속 씀 → 저장 중에 바뀌지 않게)
+            if writer is not None:
+                args = [a.copy() if isinstance(a, pd.DataFrame) else a for a in args]
+                pending.append(writer.submit(func, *args))
+
+        def timed(stage: str, func, *args):
+            print(f"▶ {stage} 시작 (메모리)")
+            started = time.perf_counter()
+            out = func(*args)
+            results[stage] = ("ran", time.perf_counter() - started)
+            return out
+
+        top30 = timed("01", lambda: s1.build_top30(s1.find_year_files(s1.DATA_DIR)))
+        save(write_frame, top30, s1.OUTPUT_FILE)
+
+        enriched, failed = timed("02", lambda: s2.attach_metadata(top30))
+        save(write_frame, enriched, s2.OUTPUT_FILE)
+        save(s2.write_csv_atomic, failed, s2.FAIL_LOG_FILE)
+
+        df2 = timed("03", lambda: s3.build_df2(s3.prepare_movies(enriched), s3.load_year_base(s3.YEAR_FILE)))
+        save(write_frame, df2, s3.OUTPUT_FILE)
+
+        timed("04", s4.main, df2)
+        if plots:
+            # matplotlib은 스레드에 안전하지 않아서 04 다음에 순서대로
+            timed("05", load_stage("05").main, df2)
+
+        started = time.perf_counter()
+        for fut in pending:
+            fut.result()   # 저장 중 오류가 있으면 여기서 올라옴
+    if pending:
+        results["저장 대기"] = ("ran", time.perf_counter() - started)
+    return results
+
+def print_report(results: dict[str, tuple[str, float]], total: float) -> None:
+    print("\n===== 파이프라인 결과 =====")
+    for stage, (status, seconds) in results.items():
+        print(f"{stage}  {STAGE_FILES.get(stage, ''):<36} {status:<9} {seconds:8.2f}s")
+    print(f"전체 {total:.2f}s")
+
+# =========================
+# 실행
+# =========================
+def parse_args():
+    parser = argparse.ArgumentParser(description="01~05 단계를 바뀐 것만 의존 순서대로 실행")
+    parser.add_argument("--only", nargs="+", choices=list(STAGES), help="이 단계만 실행 대상으로")
+    parser.add_argument("--force", action="store_true", help="입력이 안 바뀌었어도 다시 실행")
+    parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 뭘 실행할지만 출력")
+    parser.add_argument("--in-memory", action="store_true", help="한 프로세스에서 DataFrame을 바로 넘기며 전부 실행")
+    parser.add_argument("--write-intermediates", action="store_true", help="(--in-memory) 중간 결과 파일도 백그라운드로 저장")
+    parser.add_argument("--no-plots", action="store_true", help="(--in-memory) 05 그래프는 건너뜀")
+    return parser.parse_args()
+
+def main(
+    only: list[str] | None = None,
+    force: bool = False,
+    dry_run: bool = False,
+    in_memory: bool = False,
+    write_intermediates: bool = False,
+    plots: bool = True,
+) -> int:
+    started = time.perf_counter()
+    if in_memory:
+        print_report(run_in_memory(write_intermediates=write_intermediates, plots=plots), time.perf_counter() - started)
+        return 0
+
+    results = asyncio.run(run_pipeline(only or list(STAGES), force=force, dry_run=dry_run))
+    print_report(results, time.perf_counter() - started)
+    return 1 if any(status == "failed" for status, _ in results.values()) else 0
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(main(
+        only=args.only,
+        force=args.force,
+        dry_run=args.dry_run,
+        in_memory=args.in_memory,
+        write_intermediates=args.write_intermediates,
+        plots=not args.no_plots,
+    ))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from market_share import MARKET_SHARE_COLUMNS
+
+# =========================
+# 점유율 집계 큐브 (04 리포트 공용)
+# =========================
+# 04의 리포트들이 각자 df2를 필터/복사하고 groupby 하던 것을
+# 마스터를 한 번만 훑어서 (연도 × 기간 × 애니 여부 × 일본 여부) 칸별로 미리 집계해 두고,
+# 리포트는 이 작은 칸들을 다시 묶어서(rollup) 만든다.
+# - 개수 / 합계 / 평균은 칸 값만으로 계산 (마스터 크기와 무관)
+# - 중앙값은 칸 값만으로는 못 구해서, 칸마다 정렬해 둔 값 배열을 이어 붙여서 계산
+#   (DataFrame 필터/복사 없이 숫자 배열만 씀)
+# 마스터에 시장별 점유율(market_share.py) 컬럼이 있으면 그 합계/평균도 같이 집계한다.
+
+CUBE_KEYS = ["year", "period", "is_animation", "is_japan"]
+METRICS = ["audi_share", "sales_share"]   # 중앙값까지 구하는 기본 점유율
+
+
+class ShareCube:
+    """
+    cells: 칸별 n(편수) / {metric}_count(결측 제외 개수) / {metric}_sum
+    rollup(by, where)으로 원하는 단위로 다시 묶는다.
+    """
+
+    def __init__(self, df2: pd.DataFrame):
+        self.metrics = METRICS + [c for c in MARKET_SHARE_COLUMNS if c in df2.columns]
+        grouped = df2.groupby(CUBE_KEYS, sort=True, dropna=False, observed=True)
+
+        stats = {"n": ("movieNm", "size")}
+        for m in self.metrics:
+            stats[f"{m}_count"] = (m, "count")
+            stats[f"{m}_sum"] = (m, "sum")
+        self.cells = grouped.agg(**stats).reset_index()
+
+        # 중앙값용: 칸 번호(cells의 행 번호) → 결측 뺀 값 배열
+        group_ids = grouped.ngroup().to_numpy()
+        self._values = {
+            m: [v[~np.isnan(v)] for v in _split_by_group(df2[m].to_numpy(dtype=float), group_ids)]
+            for m in METRICS
+        }
+
+    def rollup(
+        self,
+        by: list[str | pd.Series],
+        where: pd.Series | None = None,
+        *,
+        medians: bool = False,
+    ) -> pd.DataFrame:
+        """
+        by   : cells 컬럼 이름 또는 cells와 같은 인덱스의 Series (예: 애니 & 일본)
+        where: cells에 대한 불리언 조건 (예: cube.cells["is_animation"])
+        return: by별 n / {metric}_sum / {metric}_mean (+ medians=True면 {metric}_median)
+        """
+        cells = self.cells if where is None else self.cells[where]
+        keys = [cells[k] if isinstance(k, str) else k.loc[cells.index] for k in by]
+
+        sums = [c for c in cells.columns if c == "n" or c.endswith(("_count", "_sum"))]
+        grouped = cells.groupby(keys, sort=True, observed=True)
+        out = grouped[sums].sum()
+
+        for m in self.metrics:
+            out[f"{m}_mean"] = out[f"{m}_sum"] / out[f"{m}_count"]
+
+        if medians:
+            cell_ids = _split_by_group(cells.index.to_numpy(), grouped.ngroup().to_numpy())
+            for m in METRICS:
+                values = self._values[m]
+                out[f"{m}_median"] = [np.median(np.concatenate([values[i] for i in ids])) for ids in cell_ids]
+
+        return out.drop(columns=[f"{m}_count" for m in self.metrics]).reset_index()
+
+    def values(self, metric: str, where: pd.Series | None = None) -> np.ndarray:
+        """where(cells 조건)에 걸리는 칸들의 개별 영화 값(결측 제외)을 이어 붙인 배열 (부트스트랩용)"""
+        ids = self.cells.index if where is None else self.cells.index[where.to_numpy(dtype=bool)]
+        parts = [self._values[metric][i] for i in ids]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+
+def _split_by_group(values: np.ndarray, group_ids: np.ndarray) -> list[np.ndarray]:
+    """values를 그룹 번호(0..k-1) 순서대로 나눈 배열 리스트 (한 번 정렬해서 자름)"""
+    order = np.argsort(group_ids, kind="stable")
+    bounds = np.cumsum(np.bincount(group_ids))[:-1]
+    return np.split(values[order], bounds)
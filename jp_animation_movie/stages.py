@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+# =========================
+# 번호 붙은 단계 스크립트(01~05)를 모듈로 불러오기
+# =========================
+# 파일 이름이 숫자로 시작해서 `import 01_...`처럼은 못 쓰지만
+# importlib.import_module("01_make_top30_boxoffice")로는 불러올 수 있다.
+# (이렇게 불러야 01의 프로세스 풀 워커가 함수를 모듈 이름으로 다시 찾을 수 있음)
+# 05는 파일 이름에 점이 두 개라 모듈 이름으로는 안 돼서 파일 경로로 불러온다.
+
+BASE_DIR = Path(__file__).resolve().parent
+
+STAGE_FILES = {
+    "01": "01_make_top30_boxoffice.py",
+    "02": "02_attach_movie_metadata.py",
+    "03": "03_build_market_share_dataset.py",
+    "04": "04_analysis.py",
+    "05": "05_visualize..py",
+}
+
+def load_stage(stage: str) -> ModuleType:
+    """단계 번호("01" ~ "05")로 스크립트를 모듈로 불러온다 (한 번 불러온 건 재사용)"""
+    path = BASE_DIR / STAGE_FILES[stage]
+    name = path.stem
+
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    if "." not in name:
+        return importlib.import_module(name)
+
+    name = f"stage{stage}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+import pandas as pd
+
+# =========================
+# 단계 간 중간 산출물 저장/로드 (parquet)
+# =========================
+# 01 → 02 → 03 → 04/05로 넘기는 데이터는 xlsx 대신 parquet로 저장한다.
+# - openpyxl 읽기/쓰기보다 훨씬 빠르고
+# - bool / Int64 / string 같은 dtype이 그대로 보존됨
+# 사람이 엑셀로 보고 싶으면 마지막에 `python storage.py`로 xlsx만 따로 뽑으면 됨.
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+
+# True면 write_frame 할 때마다 같은 이름의 xlsx도 같이 저장 (느림, 확인용)
+EXPORT_XLSX = False
+
+def write_frame(df: pd.DataFrame, path: Path, *, export_xlsx: bool = EXPORT_XLSX) -> Path:
+    """
+    df를 parquet로 저장 (임시 파일에 쓰고 교체해서 중간에 죽어도 파일이 깨지지 않게)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = path.with_name(path.name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(path)
+
+    if export_xlsx:
+        export_xlsx_file(path)
+    return path
+
+def read_frame(path: Path, *, years: list[int] | None = None) -> pd.DataFrame:
+    """
+    parquet 중간 산출물을 읽는다.
+    parquet가 아직 없으면 예전 방식의 같은 이름 xlsx를 대신 읽음 (이전 실행 결과 호환)
+    years를 주면 그 연도(year 컬럼) 행만 읽음 (parquet는 필터를 걸어서 읽기)
+    """
+    path = Path(path)
+    if path.exists():
+        if years is None:
+            return pd.read_parquet(path)
+        return pd.read_parquet(path, filters=[("year", "in", list(years))])
+
+    legacy = path.with_suffix(".xlsx")
+    if legacy.exists():
+        df = pd.read_excel(legacy)
+        return df if years is None else df[df["year"].isin(years)].reset_index(drop=True)
+
+    raise FileNotFoundError(f"{path} (또는 {legacy.name})이 없어요. 앞 단계를 먼저 실행해 주세요.")
+
+def replace_years(df_part: pd.DataFrame, path: Path, years: list[int], *, base: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    path에 저장된 프레임에서 years 연도 행만 df_part로 바꿔 끼우고(없던 연도면 추가) 저장
+    다른 연도 행은 읽은 그대로 다시 씀 → 재계산은 바꾼 연도만큼만
+    base: 이미 읽어 둔 path 내용 (주면 다시 읽지 않음)
+    return: 저장된 전체 프레임
+    """
+    if base is None:
+        try:
+            base = read_frame(path)
+        except FileNotFoundError:
+            base = df_part.iloc[0:0]
+
+    kept = base[~base["year"].isin(years)].copy()
+    # 예전 xlsx에서 읽은 경우처럼 dtype이 다르면 새로 만든 쪽에 맞춤 (parquet는 컬럼 dtype이 하나여야 함)
+    for c in kept.columns.intersection(df_part.columns):
+        if kept[c].dtype != df_part[c].dtype:
+            kept[c] = kept[c].astype(df_part[c].dtype)
+    out = (
+        pd.concat([kept, df_part], ignore_index=True)
+          .sort_values("year", kind="stable", ignore_index=True)
+    )
+    write_frame(out, path)
+    return out
+
+def file_digest(path: Path) -> str:
+    """파일 내용(바이트)의 SHA-256 (입력이 바뀌었는지 확인용)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def export_xlsx_file(path: Path) -> Path:
+    """parquet 파일 하나를 같은 이름의 xlsx로 내보내기 (사람이 보는 용도)"""
+    path = Path(path)
+    output = path.with_suffix(".xlsx")
+    pd.read_parquet(path).to_excel(output, index=False)
+    return output
+
+def main():
+    # data 폴더의 중간 산출물(parquet)을 전부 xlsx로 내보내기
+    for path in sorted(DATA_DIR.glob("*.parquet")):
+        output = export_xlsx_file(path)
+        print(f"✅ 내보내기: {output}")
+
+if __name__ == "__main__":
+    main()
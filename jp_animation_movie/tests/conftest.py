@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# =========================
+# 테스트 공용 (모듈들이 서로 파일 이름으로 import 하니까 상위 폴더를 경로에 추가)
+# =========================
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from aiohttp import web  # noqa: E402
+
+from covid_split import label_period  # noqa: E402
+from mock_kobis_server import HOST, FixtureStore, MockKobis  # noqa: E402
+from stages import load_stage  # noqa: E402
+from storage import read_frame, write_frame  # noqa: E402
+
+GENRES = ["애니메이션", "가족", "액션", "드라마", "코미디"]
+NATIONS = ["일본", "미국", "한국", "프랑스"]
+
+
+def random_master(rng: np.random.Generator, n_rows: int = 400, years=range(2015, 2026)) -> pd.DataFrame:
+    """
+    03 결과와 같은 모양의 가짜 마스터 → 04 check_master_df2까지 거친 것
+    관객/매출은 작은 정수에서 뽑고 전체 시장은 연도마다 같게 해서 점유율 동점이 많이 나오게 함
+    """
+    year = rng.choice(np.asarray(years), size=n_rows)
+    audiAcc = rng.integers(0, 20, size=n_rows) * 100
+    salesAcc = rng.integers(0, 50, size=n_rows) * 1000
+    genres = [", ".join(rng.choice(GENRES, size=rng.integers(1, 4), replace=False)) for _ in range(n_rows)]
+    nations = [", ".join(rng.choice(NATIONS, size=rng.integers(1, 3), replace=False)) for _ in range(n_rows)]
+
+    df2 = pd.DataFrame({
+        "year": year,
+        "rank": rng.integers(1, 31, size=n_rows),
+        "movieNm": [f"영화{i}" for i in range(n_rows)],
+        "genres": genres,
+        "nations": nations,
+        "audiAcc": audiAcc,
+        "salesAcc": salesAcc,
+        "total_audience": 100_000,
+        "total_sales": 1_000_000_000,
+    })
+    df2["is_animation"] = df2["genres"].str.contains("애니메이션")
+    df2["is_japan"] = df2["nations"].str.contains("일본")
+    df2["audi_share"] = (df2["audiAcc"] / df2["total_audience"]).mask(rng.random(n_rows) < 0.1)
+    df2["sales_share"] = (df2["salesAcc"] / df2["total_sales"]).mask(rng.random(n_rows) < 0.1)
+    df2["audi_share_pct"] = df2["audi_share"] * 100
+    df2["sales_share_pct"] = df2["sales_share"] * 100
+    df2["period"] = label_period(df2["year"])
+    df2 = df2.dropna(subset=["period"]).reset_index(drop=True)
+
+    return load_stage("04").check_master_df2(df2)
+
+
+@pytest.fixture
+def make_master():
+    return random_master
+
+
+# =========================
+# 02를 로컬 가짜 KOBIS에 붙여서 돌리기
+# =========================
+@pytest.fixture
+def mock_kobis(tmp_path):
+    """
+    movies(DataFrame: movieCd/movieNm/openDt_norm/genres/nations)로 가짜 KOBIS를 띄우고 주소를 돌려줌
+    서버는 별도 스레드의 이벤트 루프에서 돌고 (02 main은 자기 asyncio.run을 쓰니까) 테스트 끝나면 내림
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runners = []
+
+    def start(movies: pd.DataFrame, **options) -> tuple[str, MockKobis]:
+        store = FixtureStore(tmp_path / "fixtures")
+        store.seed_from_frame(movies)
+        server = MockKobis(store, latency=0.0, **options)
+
+        async def serve() -> int:
+            runner = web.AppRunner(server.make_app())
+            await runner.setup()
+            await web.TCPSite(runner, HOST, 0).start()
+            runners.append(runner)
+            return runner.addresses[0][1]
+
+        port = asyncio.run_coroutine_threadsafe(serve(), loop).result()
+        return f"http://{HOST}:{port}", server
+
+    yield start
+
+    for runner in runners:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def run_stage02(tmp_path, monkeypatch):
+    """
+    입출력/캐시 파일을 전부 tmp_path로 돌려서 02 main 실행 → (결과 df, 실패 로그 df)
+    run(top30, base_url, **main 인자, **{02 모듈 상수: 값})
+    """
+    stage02 = load_stage("02")
+    for name, file in [
+        ("INPUT_FILE", "top30.parquet"),
+        ("OUTPUT_FILE", "out.parquet"),
+        ("FAIL_LOG_FILE", "failed.csv"),
+        ("API_CACHE_FILE", "api.sqlite"),
+        ("QUOTA_FILE", "quota.sqlite"),
+        ("CATALOG_FILE", "catalog.sqlite"),
+        ("CHECKPOINT_FILE", "checkpoint.jsonl"),
+    ]:
+        monkeypatch.setattr(stage02, name, tmp_path / file)
+    monkeypatch.setattr(stage02, "API_RATE_PER_SEC", 1000.0)
+    monkeypatch.setattr(stage02, "DAILY_QUOTA_PER_KEY", None)
+
+    def run(top30: pd.DataFrame, base_url: str, *, write_input: bool = True, **kwargs) -> tuple[pd.DataFrame, pd.DataFrame]:
+        settings = {k: kwargs.pop(k) for k in list(kwargs) if k.isupper()}
+        for name, value in {"API_BASE_URL": base_url, **settings}.items():
+            monkeypatch.setattr(stage02, name, value)
+        if write_input:
+            write_frame(top30, stage02.INPUT_FILE)
+        stage02.main(**kwargs)
+        failed = pd.read_csv(stage02.FAIL_LOG_FILE, dtype={"movieNm": str, "openDt": str, "openDt_norm": str}, encoding="utf-8-sig")
+        return read_frame(stage02.OUTPUT_FILE), failed
+
+    return run
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from breakpoint_sweep import METRICS, sweep
+from covid_split import PERIOD_AFTER, PERIOD_BEFORE
+from stages import load_stage
+
+
+def brute_force_row(df2: pd.DataFrame, lo: int, hi: int) -> dict:
+    """연도 lo~hi 행만 골라서 pandas로 바로 계산"""
+    part = df2[df2["year"].between(lo, hi)]
+    jp = part["is_animation"].astype(bool) & part["is_japan"].astype(bool)
+    anim = part["is_animation"].astype(bool)
+    row = {"jp_n": int(jp.sum()), "other_n": int((~jp).sum())}
+    for key, col in METRICS.items():
+        for g, mask in (("jp", jp), ("other", ~jp)):
+            row[f"{g}_avg_{key}_pct"] = part.loc[mask, col].mean() * 100
+            row[f"{g}_median_{key}_pct"] = part.loc[mask, col].median() * 100
+        row[f"jp_within_anim_{key}_pct"] = part.loc[jp, col].sum() / part.loc[anim, col].sum() * 100
+    return row
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("max_gap", [0, 2])
+def test_sweep_matches_brute_force(make_master, seed, max_gap):
+    # 2018년은 비워 둠 (마스터에 없는 연도도 구간 안에 끼어 있을 수 있음)
+    years = [y for y in range(2013, 2026) if y != 2018]
+    df2 = make_master(np.random.default_rng(seed), n_rows=500, years=years)
+    table = sweep(df2, max_gap=max_gap)
+
+    # 이전 마지막 연도(마지막 연도 제외) × 사이 연도 0~max_gap개, 이후가 남는 것만 × 전/후
+    n_splits = sum(1 for b in years[:-1] for gap in range(max_gap + 1) if b + 1 + gap <= years[-1])
+    assert len(table) == 2 * n_splits
+
+    first, last = years[0], years[-1]
+    for r in table.itertuples(index=False):
+        lo, hi = (first, r.before_max) if r.period == PERIOD_BEFORE else (r.after_min, last)
+        assert r.years == f"{lo}~{hi}"
+        want = brute_force_row(df2, lo, hi)
+        for col, value in want.items():
+            got = getattr(r, col)
+            # sweep 쪽은 소수 4자리(비중은 2자리)로 반올림된 값
+            tol = 0.51e-2 if col.startswith("jp_within") else 0.51e-4
+            if np.isnan(value):
+                assert np.isnan(got), (r.before_max, r.after_min, r.period, col)
+            else:
+                assert got == pytest.approx(value, abs=tol), (r.before_max, r.after_min, r.period, col)
+
+    gap_rows = table[table["after_min"] - table["before_max"] == 3]
+    assert (gap_rows["excluded"] == (gap_rows["before_max"] + 1).astype(str) + "~" + (gap_rows["before_max"] + 2).astype(str)).all()
+    assert (table.loc[table["after_min"] - table["before_max"] == 1, "excluded"] == "-").all()
+
+
+def test_current_split_matches_04(make_master):
+    stage04 = load_stage("04")
+    df2 = make_master(np.random.default_rng(0), n_rows=600)
+    current = sweep(df2).query("current").set_index("period")
+    assert list(current.index) == [PERIOD_BEFORE, PERIOD_AFTER]
+
+    summary = stage04.make_summary(df2)
+    for period in [PERIOD_BEFORE, PERIOD_AFTER]:
+        for g, is_jp in (("jp", True), ("other", False)):
+            s = summary[(summary["period"] == period) & (summary["is_jp_anim"] == is_jp)].iloc[0]
+            assert current.loc[period, f"{g}_n"] == s["n"]
+            for key in METRICS:
+                assert current.loc[period, f"{g}_avg_{key}_pct"] == pytest.approx(s[f"avg_{key}_share_pct"], abs=1e-9)
+                assert current.loc[period, f"{g}_median_{key}_pct"] == pytest.approx(s[f"median_{key}_share_pct"], abs=1e-9)
+
+    within = stage04.jp_share_within_animation_market(df2).set_index("period")
+    for period in [PERIOD_BEFORE, PERIOD_AFTER]:
+        for key in METRICS:
+            assert current.loc[period, f"jp_within_anim_{key}_pct"] == pytest.approx(within.loc[period, f"jp_within_anim_{key}_pct"], abs=1e-9)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import asyncio
+
+from kobis_catalog import MovieCatalog, sync_years
+
+
+class FakeClient:
+    """2016년 목록 조회만 faultInfo(키 오류 같은 것)로 답하는 KOBIS 대역"""
+
+    async def call_json(self, path: str, params: dict) -> dict:
+        if params["openStartDt"] == "2016":
+            return {"faultInfo": {"message": "유효하지않은 키값입니다.", "errorCode": "320010"}}
+        movies = [{"movieCd": f"{params['openStartDt']}0001", "movieNm": "영화", "openDt": f"{params['openStartDt']}0101"}]
+        return {"movieListResult": {"totCnt": len(movies), "movieList": movies}}
+
+
+def test_fault_info_skips_only_that_year(tmp_path, capsys):
+    with MovieCatalog(tmp_path / "catalog.sqlite") as catalog:
+        unsynced = asyncio.run(sync_years(FakeClient(), catalog, ["2015", "2016", "2017"]))
+        assert unsynced == {"2016"}
+        assert catalog.synced_years() == {"2015", "2017"}
+        assert [m["movieCd"] for m in catalog.lookup("영화")] == ["20150001", "20170001"]
+    assert "⚠️ 카탈로그 동기화 미룸: 2016년 (KobisRequestError)" in capsys.readouterr().out
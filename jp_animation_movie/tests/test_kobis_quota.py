@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from kobis_quota import KeyPool, QuotaExceeded
+
+
+def take_all(pool: KeyPool) -> list[str]:
+    taken = []
+    while True:
+        try:
+            taken.append(pool.take())
+        except QuotaExceeded:
+            return taken
+
+
+def test_rotates_keys_until_quota(tmp_path):
+    pool = KeyPool(["a", "b"], daily_quota=2, usage_file=tmp_path / "quota.sqlite")
+    assert take_all(pool) == ["a", "b", "a", "b"]
+    assert pool.remaining() == 0
+    pool.close()
+
+    # 같은 날 다시 열어도 사용량은 이어서 셈
+    again = KeyPool(["a", "b"], daily_quota=3, usage_file=tmp_path / "quota.sqlite")
+    assert take_all(again) == ["a", "b"]
+    again.close()
+
+
+@pytest.mark.parametrize("shared_file", [True, False])
+def test_concurrent_takers_never_overrun(tmp_path, shared_file):
+    # 스레드마다 따로 연 풀(= 따로 도는 프로세스)이 같은 사용량 파일을 동시에 씀 / 한 풀을 여러 스레드가 같이 씀
+    quota, n_threads = 50, 8
+    shared = None if shared_file else KeyPool(["a", "b"], daily_quota=quota)
+    taken: list[str] = []
+    start = threading.Barrier(n_threads)
+
+    def run() -> None:
+        pool = KeyPool(["a", "b"], daily_quota=quota, usage_file=tmp_path / "quota.sqlite") if shared_file else shared
+        start.wait()
+        got = take_all(pool)
+        if shared_file:
+            pool.close()
+        taken.extend(got)
+
+    threads = [threading.Thread(target=run) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert taken.count("a") == quota
+    assert taken.count("b") == quota
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import kobis_table
+from kobis_table import (
+    BOXOFFICE_COLUMNS, BOXOFFICE_INT_COLS, BOXOFFICE_REQUIRED,
+    YEAR_BASE_COLUMNS, YEAR_BASE_INT_COLS, YEAR_BASE_REQUIRED,
+    read_boxoffice_table, read_kobis_table, read_year_base_table,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+BOXOFFICE_FILES = sorted(DATA_DIR.glob("KOBIS_연도별박스오피스_*.xls"))
+YEAR_FILE = DATA_DIR / "KOBIS_총_관객수_및_매출액_연도별.xls"
+
+
+def read_html_reference(path: Path, column_map: dict[str, str], required: set[str], int_cols: set[str]) -> pd.DataFrame:
+    """예전 방식: pd.read_html로 전부 읽고 필요한 컬럼이 있는 첫 테이블 → 숫자 변환"""
+    for t in pd.read_html(path, encoding="utf-8"):
+        if isinstance(t.columns, pd.MultiIndex):
+            t.columns = ["_".join(dict.fromkeys(str(x) for x in c)) for c in t.columns]
+        t = t.rename(columns=column_map)
+        if required.issubset(t.columns):
+            t = t[[c for c in t.columns if c in column_map.values()]].copy()
+            for c in int_cols & set(t.columns):
+                t[c] = pd.to_numeric(t[c].astype(str).str.replace(",", ""), errors="coerce")
+            return t
+    raise ValueError(path)
+
+
+def assert_same(got: pd.DataFrame, want: pd.DataFrame) -> None:
+    # 숫자 컬럼 dtype은 결측 유무에 따라 int/float가 갈려서 값만 비교
+    pd.testing.assert_frame_equal(got, want[got.columns], check_dtype=False)
+
+
+@pytest.mark.skipif(not BOXOFFICE_FILES, reason="KOBIS 박스오피스 파일 없음")
+@pytest.mark.parametrize("path", BOXOFFICE_FILES, ids=lambda p: p.stem[-4:])
+def test_boxoffice_matches_read_html(path):
+    got = read_boxoffice_table(path, use_cache=False)
+    assert_same(got, read_html_reference(path, BOXOFFICE_COLUMNS, BOXOFFICE_REQUIRED, BOXOFFICE_INT_COLS))
+
+
+@pytest.mark.skipif(not YEAR_FILE.exists(), reason="연도별 전체 시장 파일 없음")
+def test_year_base_matches_read_html():
+    got = read_year_base_table(YEAR_FILE, use_cache=False)
+    assert_same(got, read_html_reference(YEAR_FILE, YEAR_BASE_COLUMNS, YEAR_BASE_REQUIRED, YEAR_BASE_INT_COLS))
+
+
+SYNTHETIC = """<html><body>
+<table><tr><th>조회 조건</th></tr><tr><td>2015</td></tr></table>
+<table>
+  <tr><th rowspan="2">순위</th><th rowspan="2">영화명</th><th colspan="2">누적</th><th rowspan="2">비고</th></tr>
+  <tr><th>관객수</th><th>매출액</th></tr>
+  <tr><td>1</td><td>  영화
+    하나 </td><td>1,234,567</td><td>9,876,543,210</td><td><table><tr><td>안쪽 표</td></tr></table></td></tr>
+  <tr><td>2</td><td></td><td>-</td><td>10</td><td></td></tr>
+</table>
+<table><tr><th>순위</th><th>영화명</th></tr><tr><td>99</td><td>뒤쪽 표</td></tr></table>
+</body></html>"""
+
+SYNTHETIC_COLUMNS = {"순위": "rank", "영화명": "movieNm", "누적_관객수": "audiAcc", "누적_매출액": "salesAcc"}
+
+
+def test_synthetic_table_matches_read_html(tmp_path):
+    # 앞쪽 조건표는 건너뛰고, 2줄 헤더 / 셀 안 줄바꿈 / 빈 셀 / 숫자 아닌 값 / 안쪽 표 / 뒤쪽 표
+    path = tmp_path / "synthetic.xls"
+    path.write_text(SYNTHETIC, encoding="utf-8")
+    required, int_cols = {"rank", "movieNm", "audiAcc"}, {"rank", "audiAcc", "salesAcc"}
+
+    got = read_kobis_table(path, SYNTHETIC_COLUMNS, required=required, int_cols=int_cols)
+    assert got["rank"].tolist() == [1, 2]
+    assert got["salesAcc"].tolist() == [9876543210, 10]
+    assert got["audiAcc"].iloc[0] == 1234567 and pd.isna(got["audiAcc"].iloc[1])
+    assert pd.isna(got["movieNm"].iloc[1])
+    assert_same(got, read_html_reference(path, SYNTHETIC_COLUMNS, required, int_cols))
+
+
+def test_missing_table_raises(tmp_path):
+    path = tmp_path / "empty.xls"
+    path.write_text("<html><body><table><tr><th>다른 표</th></tr><tr><td>1</td></tr></table></body></html>", encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_kobis_table(path, SYNTHETIC_COLUMNS, required={"rank"})
+
+
+def test_snapshot_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(kobis_table, "SNAPSHOT_DIR", tmp_path / "cache")
+    path = tmp_path / "synthetic.xls"
+    path.write_text(SYNTHETIC, encoding="utf-8")
+    calls = []
+
+    def reader(p: Path) -> pd.DataFrame:
+        calls.append(p)
+        return read_kobis_table(p, SYNTHETIC_COLUMNS, required={"rank"}, int_cols={"rank"})
+
+    first = kobis_table._read_with_snapshot(path, "test", reader)
+    again = kobis_table._read_with_snapshot(path, "test", reader)
+    pd.testing.assert_frame_equal(first, again)
+    assert len(calls) == 1   # 두 번째는 스냅샷에서
+
+    # 원본이 바뀌면 다시 파싱하고 예전 스냅샷은 지움
+    path.write_text(SYNTHETIC.replace("1,234,567", "7"), encoding="utf-8")
+    kobis_table._read_with_snapshot(path, "test", reader)
+    assert len(calls) == 2
+    assert len(list((tmp_path / "cache").glob("synthetic.test.*.parquet"))) == 1
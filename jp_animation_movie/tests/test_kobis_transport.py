@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from kobis_api import SEARCH_PATH, KobisClient
+from kobis_quota import KeyPool, QuotaExceeded
+from kobis_transport import CircuitBreaker, KobisRequestError
+
+COOLDOWN = 0.05
+
+
+def opened_breaker(**kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=COOLDOWN, **kwargs)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opened == 1
+    return breaker
+
+
+def test_half_open_lets_one_trial_through():
+    async def scenario():
+        breaker = opened_breaker()
+        started = time.monotonic()
+        assert await breaker.wait() is True   # 쉬는 시간 뒤 첫 요청이 시험 요청
+        assert time.monotonic() - started >= COOLDOWN * 0.9
+        assert breaker.state == "half_open"
+
+        # 시험 결과가 나올 때까지 다른 요청은 대기 → 성공하면 일반 요청으로 통과
+        other = asyncio.ensure_future(breaker.wait())
+        await asyncio.sleep(0.15)
+        assert not other.done()
+        breaker.record_success()
+        assert await other is False
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens():
+    async def scenario():
+        breaker = opened_breaker()
+        assert await breaker.wait() is True
+        breaker.record_failure()   # 시험 실패는 1번이어도 다시 open (쉬는 시간 새로)
+        assert breaker.state == "open" and breaker.opened == 2
+        started = time.monotonic()
+        assert await breaker.wait() is True
+        assert time.monotonic() - started >= COOLDOWN * 0.9
+
+    asyncio.run(scenario())
+
+
+def test_released_trial_is_taken_over_immediately():
+    async def scenario():
+        breaker = opened_breaker()
+        assert await breaker.wait() is True
+        breaker.release_trial()    # 결과 없이 끝난 시험 (한도 초과 / 취소)
+        assert breaker.state == "open"
+        started = time.monotonic()
+        assert await breaker.wait() is True   # 쉬는 시간은 이미 지남 → 바로 다음 시험
+        assert time.monotonic() - started < COOLDOWN
+        assert breaker.opened == 1
+
+    asyncio.run(scenario())
+
+
+def test_stuck_trial_times_out():
+    async def scenario():
+        breaker = opened_breaker(trial_timeout=0.2)
+        assert await breaker.wait() is True
+        started = time.monotonic()
+        assert await breaker.wait() is True   # 첫 시험이 안 끝나면 trial_timeout 뒤 이어받음
+        assert time.monotonic() - started >= 0.2
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def base_url(mock_kobis):
+    movies = pd.DataFrame([("20150001", "베테랑", "20150805", "액션", "한국")],
+                          columns=["movieCd", "movieNm", "openDt_norm", "genres", "nations"])
+    url, _ = mock_kobis(movies, fail_titles={"없는 영화": 404})
+    return url
+
+
+def test_client_4xx_trial_closes_breaker(base_url):
+    # 시험 요청이 4xx면 서버는 살아 있는 거라 닫고, 그 호출만 KobisRequestError
+    async def scenario():
+        breaker = opened_breaker()
+        async with KobisClient("key", base_url=base_url, breaker=breaker, max_retries=0) as client:
+            with pytest.raises(KobisRequestError) as e:
+                await client.search_movie_list("없는 영화")
+            assert e.value.status == 404
+            assert breaker.state == "closed"
+            data = await client.search_movie_list("베테랑")
+            assert data["movieListResult"]["movieList"][0]["movieCd"] == "20150001"
+
+    asyncio.run(scenario())
+
+
+def test_client_quota_during_trial_releases_it(base_url):
+    # 시험 요청이 키 한도에 걸려 나가지도 못하면 브레이커는 다시 open (half_open에 갇히지 않음)
+    async def scenario():
+        breaker = opened_breaker()
+        keys = KeyPool(["key"], daily_quota=0)
+        async with KobisClient(keys, base_url=base_url, breaker=breaker) as client:
+            with pytest.raises(QuotaExceeded):
+                await client.call_json(SEARCH_PATH, {"movieNm": "베테랑"})
+        assert breaker.state == "open"
+
+    asyncio.run(scenario())
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import pipeline
+
+# 실제와 같은 모양의 작은 단계 그래프 (03 스크립트만 로컬 모듈 helper를 import)
+STAGES = {
+    "01": {"deps": [], "inputs": ["raw/*.txt"], "outputs": ["out/01.txt"]},
+    "02": {"deps": ["01"], "inputs": ["out/01.txt"], "outputs": ["out/02.txt"]},
+    "03": {"deps": ["02"], "inputs": ["out/02.txt"], "outputs": ["out/03.txt"]},
+    "04": {"deps": ["03"], "inputs": ["out/03.txt"], "outputs": []},
+    "05": {"deps": ["03"], "inputs": ["out/03.txt"], "outputs": ["out/05.txt"]},
+}
+
+
+@pytest.fixture
+def toy(tmp_path, monkeypatch):
+    """
+    단계 스크립트 대신 입력을 이어 붙여 출력에 쓰는 가짜 실행기
+    return: run(**run_pipeline 인자, fail=실패시킬 단계) → ({단계: 상태}, 실행한 단계 순서)
+    """
+    monkeypatch.setattr(pipeline, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(pipeline, "STAGES", STAGES)
+    monkeypatch.setattr(pipeline, "STAGE_FILES", {s: f"stage{s}.py" for s in STAGES})
+    monkeypatch.setattr(pipeline, "STATE_FILE", tmp_path / "state.json")
+    for s in STAGES:
+        (tmp_path / f"stage{s}.py").write_text("import helper\n" if s == "03" else "x = 1\n", encoding="utf-8")
+    (tmp_path / "helper.py").write_text("y = 1\n", encoding="utf-8")
+    (tmp_path / "raw").mkdir()
+    (tmp_path / "raw" / "2015.txt").write_text("2015", encoding="utf-8")
+
+    def run(targets=None, *, fail=(), **kwargs):
+        ran = []
+
+        async def fake_script(stage: str) -> int:
+            ran.append(stage)
+            if stage in fail:
+                return 1
+            text = "|".join(p.read_text(encoding="utf-8") for p in pipeline.expand(STAGES[stage]["inputs"]))
+            for pattern in STAGES[stage]["outputs"]:
+                out = tmp_path / pattern
+                out.parent.mkdir(exist_ok=True)
+                out.write_text(f"{stage}({text})", encoding="utf-8")
+            return 0
+
+        monkeypatch.setattr(pipeline, "run_script", fake_script)
+        results = asyncio.run(pipeline.run_pipeline(targets or list(STAGES), **kwargs))
+        return {s: status for s, (status, _) in results.items()}, ran
+
+    run.dir = tmp_path
+    return run
+
+
+def statuses(**kw) -> dict[str, str]:
+    return {s: kw.get(f"s{s}", "skipped") for s in STAGES}
+
+
+def test_unchanged_stages_are_skipped(toy):
+    results, ran = toy()
+    assert results == statuses(s01="ran", s02="ran", s03="ran", s04="ran", s05="ran")
+    assert ran[:3] == ["01", "02", "03"] and set(ran[3:]) == {"04", "05"}
+
+    # 아무것도 안 바뀌면 전부 건너뜀
+    assert toy() == (statuses(), [])
+
+    # 입력이 바뀌면 그 뒤 전부
+    (toy.dir / "raw" / "2016.txt").write_text("2016", encoding="utf-8")
+    results, ran = toy()
+    assert results == statuses(s01="ran", s02="ran", s03="ran", s04="ran", s05="ran")
+
+
+def test_code_change_and_missing_output(toy):
+    toy()
+    # 03이 import하는 모듈이 바뀌면 03은 다시 돎, 03 출력 내용이 그대로면 04/05는 건너뜀
+    (toy.dir / "helper.py").write_text("y = 2  # 바뀜\n", encoding="utf-8")
+    assert toy() == (statuses(s03="ran"), ["03"])
+
+    # 출력이 없어지면 그 단계만 다시
+    (toy.dir / "out" / "05.txt").unlink()
+    assert toy() == (statuses(s05="ran"), ["05"])
+
+
+def test_failure_blocks_downstream_and_reruns_next_time(toy):
+    toy()
+    (toy.dir / "raw" / "2015.txt").write_text("2015 수정", encoding="utf-8")
+    results, ran = toy(fail={"02"})
+    assert results == statuses(s01="ran", s02="failed", s03="blocked", s04="blocked", s05="blocked")
+    assert ran == ["01", "02"]
+
+    # 실패한 단계는 기록이 안 남아서 다음 실행 때 다시 (01은 이미 성공 → 건너뜀)
+    results, ran = toy()
+    assert results == statuses(s02="ran", s03="ran", s04="ran", s05="ran")
+
+
+def test_dry_run_only_and_force(toy):
+    results, ran = toy(dry_run=True)
+    assert results == statuses(s01="would-run", s02="would-run", s03="would-run", s04="would-run", s05="would-run")
+    assert ran == [] and not pipeline.STATE_FILE.exists()
+
+    toy()
+    # --only: 대상이 아닌 단계는 건너뜀 / --force: 안 바뀌어도 다시
+    assert toy(["04"]) == (statuses(), [])
+    assert toy(["04"], force=True) == (statuses(s04="ran"), ["04"])
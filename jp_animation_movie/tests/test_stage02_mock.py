@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import pandas as pd
+
+# 가짜 KOBIS에 있는 영화 (movieCd / 제목 / 개봉일 / 장르 / 국적)
+MOVIES = pd.DataFrame([
+    ("20150001", "너의 이름은", "20170104", "애니메이션, 드라마", "일본"),
+    ("20150002", "베테랑", "20150805", "액션, 드라마", "한국"),
+    ("20150003", "인사이드 아웃", "20150709", "애니메이션, 가족", "미국"),
+    ("20150004", "스즈메의 문단속", "20230308", "애니메이션", "일본"),
+], columns=["movieCd", "movieNm", "openDt_norm", "genres", "nations"])
+
+
+def make_top30(movies: pd.DataFrame, audiAcc: list[int]) -> pd.DataFrame:
+    """01 결과 모양 (year / rank / movieNm / openDt / audiAcc)"""
+    return pd.DataFrame({
+        "year": movies["openDt_norm"].str[:4].astype(int),
+        "rank": range(1, len(movies) + 1),
+        "movieNm": movies["movieNm"],
+        "openDt": movies["openDt_norm"].str[:4] + "-" + movies["openDt_norm"].str[4:6] + "-" + movies["openDt_norm"].str[6:],
+        "audiAcc": audiAcc,
+    })
+
+
+def test_run_against_mock_server(mock_kobis, run_stage02):
+    base_url, server = mock_kobis(MOVIES)
+    top30 = make_top30(MOVIES, [400, 300, 200, 100])
+
+    out, failed = run_stage02(top30, base_url)
+    assert out["movieCd"].tolist() == MOVIES["movieCd"].tolist()
+    assert out["genres"].tolist() == MOVIES["genres"].tolist()
+    assert out["is_animation"].tolist() == [True, False, True, True]
+    assert out["is_japan"].tolist() == [True, False, False, True]
+    assert failed.empty
+    assert server.calls["searchMovieList.json"] == len(MOVIES)
+
+
+def test_rejected_title_is_logged_and_run_finishes(mock_kobis, run_stage02):
+    # 한 영화 검색만 404 → 그 영화만 실패 로그에 남고 나머지는 정상
+    base_url, server = mock_kobis(MOVIES, fail_titles={"베테랑": 404})
+    top30 = make_top30(MOVIES, [400, 300, 200, 100])
+
+    out, failed = run_stage02(top30, base_url)
+    assert server.status[404] == 1   # 4xx는 재시도 안 함
+    assert out.set_index("movieNm")["movieCd"].to_dict() == {
+        "너의 이름은": "20150001", "베테랑": "", "인사이드 아웃": "20150003", "스즈메의 문단속": "20150004",
+    }
+    assert failed[["movieNm", "reason"]].values.tolist() == [["베테랑", "request_error"]]
+
+
+def test_small_quota_resolves_top_audience_first(mock_kobis, run_stage02):
+    # 호출 2번치 한도면 관객 수 1, 2위 영화만 조회되고 나머지는 미룸 (행 순서와 관객 순서를 다르게)
+    base_url, server = mock_kobis(MOVIES)
+    top30 = make_top30(MOVIES, [100, 400, 200, 300])
+
+    out, failed = run_stage02(top30, base_url, DAILY_QUOTA_PER_KEY=2, API_CONCURRENCY=1)
+    assert server.calls["searchMovieList.json"] == 2
+    resolved = out.loc[out["movieCd"].ne(""), "movieNm"]
+    assert sorted(resolved) == ["베테랑", "스즈메의 문단속"]
+    assert sorted(failed.loc[failed["reason"].eq("deferred"), "movieNm"]) == ["너의 이름은", "인사이드 아웃"]
+
+
+def test_years_run_keeps_other_fail_log_rows(mock_kobis, run_stage02, tmp_path):
+    # 2015년만 다시 돌림 → 다른 연도 / 연도가 빈 옛 기록은 그대로, 빈칸이 "nan"이 되면 안 됨
+    base_url, _ = mock_kobis(MOVIES, fail_titles={"베테랑": 404})
+    top30 = make_top30(MOVIES, [400, 300, 200, 100])
+    pd.DataFrame({
+        "year": ["2015", "", "2023"],
+        "movieNm": ["베테랑", "연도 없는 옛 기록", "다른 해 영화"],
+        "openDt": ["2015-08-05", "", "2023-01-01"],
+        "openDt_norm": ["20150805", "", "20230101"],
+        "reason": ["no_movieCd", "no_movieCd", "deferred"],
+    }).to_csv(tmp_path / "failed.csv", index=False, encoding="utf-8-sig")
+
+    out, failed = run_stage02(top30, base_url, years=[2015])
+    assert sorted(out["year"]) == [2015, 2015]
+    failed = pd.read_csv(tmp_path / "failed.csv", dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    assert failed.values.tolist() == [
+        ["", "연도 없는 옛 기록", "", "", "no_movieCd"],
+        ["2023", "다른 해 영화", "2023-01-01", "20230101", "deferred"],
+        ["2015", "베테랑", "2015-08-05", "20150805", "request_error"],
+    ]
+
+
+def test_resume_after_quota(mock_kobis, run_stage02, tmp_path):
+    # 한도 때문에 미룬 영화는 --resume 때 체크포인트에 없는 것만 조회
+    base_url, server = mock_kobis(MOVIES)
+    top30 = make_top30(MOVIES, [400, 300, 200, 100])
+    run_stage02(top30, base_url, DAILY_QUOTA_PER_KEY=2, API_CONCURRENCY=1)
+    assert (tmp_path / "checkpoint.jsonl").exists()
+
+    # 다음 날(한도가 다시 생김)이라고 치고 이어서
+    out, failed = run_stage02(top30, base_url, resume=True, DAILY_QUOTA_PER_KEY=None)
+    assert server.calls["searchMovieList.json"] == len(MOVIES)
+    assert out["movieCd"].tolist() == MOVIES["movieCd"].tolist()
+    assert failed.empty
+    assert not (tmp_path / "checkpoint.jsonl").exists()   # 다 끝나면 정리
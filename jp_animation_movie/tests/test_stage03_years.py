@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stages import load_stage
+from storage import read_frame, write_frame
+
+YEARS = range(2015, 2026)
+
+
+def make_movies(rng: np.random.Generator, n_rows: int = 200) -> pd.DataFrame:
+    """02 결과 모양의 가짜 Top30"""
+    nations = rng.choice(["일본", "미국", "한국", "일본, 미국"], size=n_rows)
+    animation = rng.random(n_rows) < 0.3
+    return pd.DataFrame({
+        "year": rng.choice(np.asarray(YEARS), size=n_rows),
+        "rank": rng.integers(1, 31, size=n_rows),
+        "movieNm": [f"영화{i}" for i in range(n_rows)],
+        "audiAcc": rng.integers(1, 100, size=n_rows) * 1000,
+        "salesAcc": rng.integers(1, 100, size=n_rows) * 10_000,
+        "genres": np.where(animation, "애니메이션", "드라마"),
+        "nations": nations,
+        "is_animation": animation,
+        "is_japan": pd.Series(nations).str.contains("일본"),
+    })
+
+
+def make_year_base(rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({
+        "year": list(YEARS),
+        "total_sales": rng.integers(100, 200, size=len(YEARS)) * 10_000_000,
+        "total_audience": rng.integers(100, 200, size=len(YEARS)) * 1_000_000,
+    })
+
+
+@pytest.fixture
+def stage03(tmp_path, monkeypatch):
+    stage03 = load_stage("03")
+    monkeypatch.setattr(stage03, "MOVIE_FILE", tmp_path / "movies.parquet")
+    monkeypatch.setattr(stage03, "OUTPUT_FILE", tmp_path / "master.parquet")
+    monkeypatch.setattr(stage03, "DATA_DIR", tmp_path)
+    return stage03
+
+
+def run(stage03, monkeypatch, movies: pd.DataFrame, year_base: pd.DataFrame, years=None) -> pd.DataFrame:
+    write_frame(movies, stage03.MOVIE_FILE)
+    monkeypatch.setattr(stage03, "load_year_base", lambda path: year_base.copy())
+    stage03.main(years=years)
+    return read_frame(stage03.OUTPUT_FILE).sort_values(["year", "movieNm"], ignore_index=True)
+
+
+@pytest.mark.parametrize("years", [[2017], [2019, 2020], [2024]])
+def test_year_refresh_equals_full_rebuild(stage03, monkeypatch, years):
+    rng = np.random.default_rng(1)
+    movies, year_base = make_movies(rng), make_year_base(rng)
+    run(stage03, monkeypatch, movies, year_base)
+
+    # 바꾼 연도: 관객/매출, 전체 시장 숫자가 바뀌고 영화 하나는 빠짐
+    changed = movies["year"].isin(years)
+    movies.loc[changed, "audiAcc"] *= 2
+    movies.loc[changed, "salesAcc"] += 5_000
+    movies = movies.drop(index=movies.index[changed][0])
+    year_base.loc[year_base["year"].isin(years), "total_audience"] += 7_000_000
+
+    got = run(stage03, monkeypatch, movies, year_base, years=years)
+    (stage03.OUTPUT_FILE).unlink()
+    want = run(stage03, monkeypatch, movies, year_base)
+    pd.testing.assert_frame_equal(got, want, check_exact=False, rtol=1e-12)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from storage import read_frame, replace_years, write_frame
+
+
+def frame(years: list[int], tag: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "year": pd.array(years, dtype="Int64"),
+        "movieNm": [f"{tag}{i}" for i in range(len(years))],
+        "audiAcc": [float(i) for i in range(len(years))],
+    })
+
+
+def test_replace_years_swaps_only_those_years(tmp_path):
+    path = tmp_path / "master.parquet"
+    write_frame(frame([2015, 2015, 2016, 2017, 2017], "old"), path)
+
+    # 2016년은 교체(2행으로), 2018년은 새로 추가, 나머지는 그대로
+    out = replace_years(frame([2018, 2016, 2016], "new"), path, [2016, 2018])
+    assert out.equals(read_frame(path))
+    assert out["year"].tolist() == [2015, 2015, 2016, 2016, 2017, 2017, 2018]
+    assert out["movieNm"].tolist() == ["old0", "old1", "new1", "new2", "old3", "old4", "new0"]
+
+
+def test_replace_years_drops_emptied_year(tmp_path):
+    # years에 있는데 새 행이 없는 연도는 빠짐
+    path = tmp_path / "master.parquet"
+    write_frame(frame([2015, 2016], "old"), path)
+    out = replace_years(frame([2015], "new"), path, [2015, 2016])
+    assert out["movieNm"].tolist() == ["new0"]
+
+
+def test_replace_years_new_file_and_base(tmp_path):
+    path = tmp_path / "없던.parquet"
+    out = replace_years(frame([2020], "new"), path, [2020])
+    assert out["movieNm"].tolist() == ["new0"] and path.exists()
+
+    # base를 주면 파일 대신 그걸 기준으로 (파일은 안 읽음)
+    base = frame([2019, 2020], "base")
+    out = replace_years(frame([2020], "new"), path, [2020], base=base)
+    assert out["movieNm"].tolist() == ["base0", "new0"]
+
+
+def test_replace_years_aligns_legacy_dtypes(tmp_path):
+    # 예전 xlsx에서 읽은 것처럼 dtype이 다른 기존 행은 새 행 dtype에 맞춰서 저장
+    path = tmp_path / "master.parquet"
+    legacy = frame([2015, 2016], "old").astype({"year": "int64", "audiAcc": "int64"})
+    out = replace_years(frame([2016], "new"), path, [2016], base=legacy)
+    assert out["year"].dtype == "Int64" and out["audiAcc"].dtype == "float64"
+    assert read_frame(path, years=[2015])["movieNm"].tolist() == ["old0"]
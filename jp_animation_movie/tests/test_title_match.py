@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from title_match import NgramIndex, pick_candidate
+
+# 1991년 애니메이션과 2017년 실사 리메이크 (제목이 거의 같음)
+ORIGINAL = {"movieCd": "19920001", "movieNm": "미녀와 야수", "openDt": "19920704"}
+REMAKE = {"movieCd": "20170001", "movieNm": "미녀와 야수", "openDt": "20170316"}
+RERELEASE = {"movieCd": "20160001", "movieNm": "미녀와 야수 (재개봉)", "openDt": "20161228"}
+
+
+def test_fuzzy_match_skips_far_open_year():
+    # 2017년 리메이크가 카탈로그에 없으면 1992년 원작이 점수상 1등이지만 연도가 멀어서 못 찾음으로
+    index = NgramIndex([ORIGINAL])
+    assert index.scored("미녀와야수", "20170316") == []
+    assert index.best("미녀와야수", "20170316") == {}
+    # 개봉일을 모르면 연도로 거르지 않음
+    assert index.best("미녀와야수") == ORIGINAL
+
+
+def test_fuzzy_match_allows_nearby_year():
+    # 1년 차이(연말 재개봉)는 허용, 같은 연도 후보가 있으면 그쪽이 이김
+    index = NgramIndex([ORIGINAL, RERELEASE, REMAKE])
+    assert index.best("미녀와야수", "20170316") == REMAKE
+    assert [m["movieCd"] for _, m in index.scored("미녀와야수", "20170316")] == ["20170001", "20160001"]
+    assert NgramIndex([ORIGINAL, RERELEASE]).best("미녀와야수", "20170316") == RERELEASE
+
+
+def test_pick_candidate_fuzzy_path_uses_year_gate():
+    # 완전일치가 없어서 퍼지로 갈 때도 같은 규칙
+    assert pick_candidate("미녀와야수", "20170316", [ORIGINAL]) == {}
+    assert pick_candidate("미녀와 야수", "20170316", [ORIGINAL, REMAKE]) == REMAKE
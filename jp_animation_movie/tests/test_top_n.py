@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from covid_split import PERIOD_AFTER, PERIOD_BEFORE
+from top_n import TopNIndex
+
+
+def brute_force(df2, metric, n, *, period=None, years=None, genres=None, nations=None, match="any"):
+    """필터 → sort_values → head(n) (동점이면 행 순서, TopNIndex와 같은 규칙)"""
+    keep = df2[metric].notna()
+    if period is not None:
+        keep &= df2["period"].astype(str).isin([period] if isinstance(period, str) else period)
+    if years is not None:
+        keep &= df2["year"].isin([years] if isinstance(years, int) else years)
+    for field, tags in (("genres", genres), ("nations", nations)):
+        if tags is None:
+            continue
+        tags = [tags] if isinstance(tags, str) else tags
+        have = df2[field].astype(str).str.split(",").map(lambda xs: {x.strip() for x in xs})
+        check = any if match == "any" else all
+        keep &= have.map(lambda h: check(t in h for t in tags))
+
+    out = df2[keep].assign(_pos=np.flatnonzero(keep))
+    return out.sort_values([metric, "_pos"], ascending=[False, True]).head(n).drop(columns="_pos")
+
+
+QUERIES = [
+    dict(),
+    dict(period=PERIOD_BEFORE),
+    dict(period=[PERIOD_BEFORE, PERIOD_AFTER], years=[2016, 2021, 2024]),
+    dict(years=2020),
+    dict(genres="애니메이션", nations="일본"),
+    dict(genres=["가족", "코미디"], period=PERIOD_AFTER),
+    dict(genres=["애니메이션", "가족"], nations=["일본", "미국"], match="all"),
+    dict(nations="없는 나라"),
+    # 빈 조건: 연도 []는 아무 파티션도 없음, 태그 []는 any면 없음 / all이면 전부
+    dict(years=[]),
+    dict(genres=[]),
+    dict(genres=[], match="all"),
+    dict(nations=["없는 나라", "일본"], match="all"),
+]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("metric", ["audi_share", "sales_share", "audiAcc", "audi_share_in_anim"])
+@pytest.mark.parametrize("n", [1, 7, 50, 10_000])   # 10_000: 걸리는 행보다 n이 큰 경우
+def test_query_matches_sort_values(make_master, seed, metric, n):
+    df2 = make_master(np.random.default_rng(seed))
+    index = TopNIndex(df2)
+    for filters in QUERIES:
+        got = index.query(metric, n, **filters)
+        want = brute_force(df2, metric, n, **filters)
+        pd.testing.assert_frame_equal(got, want, obj=f"{metric} n={n} {filters}")
+
+
+def test_query_n_zero_and_unknown_metric(make_master):
+    index = TopNIndex(make_master(np.random.default_rng(0)))
+    assert index.query("audi_share", 0).empty
+    with pytest.raises(ValueError):
+        index.query("없는 지표", 5)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import uncertainty
+from uncertainty import STATS, compare_many, compare_two
+
+
+def loop_reference(a, b, stat, *, n_boot, n_perm, level, seed) -> dict:
+    """compare_two를 재표본 하나씩 반복문으로 (같은 시드 → 같은 난수 순서)"""
+    rng = np.random.default_rng(seed)
+    f = STATS[stat]
+    boot_a = np.array([f(a[rng.integers(0, len(a), size=len(a))]) for _ in range(n_boot)])
+    boot_b = np.array([f(b[rng.integers(0, len(b), size=len(b))]) for _ in range(n_boot)])
+    q = [(1 - level) / 2, 1 - (1 - level) / 2]
+
+    pooled = np.concatenate([a, b])
+    observed = abs(f(b) - f(a))
+    hits = 0
+    for _ in range(n_perm):
+        s = rng.permuted(pooled)
+        hits += abs(f(s[len(a):]) - f(s[:len(a)])) >= observed - 1e-12
+
+    (a_lo, a_hi), (b_lo, b_hi), (d_lo, d_hi) = (np.quantile(s, q) for s in (boot_a, boot_b, boot_b - boot_a))
+    return {
+        "n_a": len(a), "n_b": len(b),
+        "a": f(a), "a_lo": a_lo, "a_hi": a_hi,
+        "b": f(b), "b_lo": b_lo, "b_hi": b_hi,
+        "diff": f(b) - f(a), "diff_lo": d_lo, "diff_hi": d_hi,
+        "p_value": (hits + 1) / (n_perm + 1),
+    }
+
+
+@pytest.mark.parametrize("stat", ["mean", "median"])
+@pytest.mark.parametrize("batch_cells", [uncertainty.BATCH_CELLS, 100])   # 100: 재표본 행렬을 여러 번 나눠 만듦
+def test_compare_two_matches_loop(monkeypatch, stat, batch_cells):
+    monkeypatch.setattr(uncertainty, "BATCH_CELLS", batch_cells)
+    rng = np.random.default_rng(7)
+    a, b = rng.random(31), rng.random(12) + 0.2
+
+    got = compare_two(a, b, stat, n_boot=400, n_perm=400, level=0.9, seed=11)
+    want = loop_reference(a, b, stat, n_boot=400, n_perm=400, level=0.9, seed=11)
+    assert got.keys() == want.keys()
+    for k in want:
+        assert got[k] == pytest.approx(want[k], rel=1e-12), k
+
+
+def test_compare_two_empty_group():
+    res = compare_two(np.empty(0), np.array([0.1, 0.2]), n_boot=50, n_perm=50, seed=0)
+    assert res["n_a"] == 0
+    assert all(np.isnan(res[k]) for k in ["a", "a_lo", "a_hi", "diff", "diff_lo", "diff_hi", "p_value"])
+    assert res["b_lo"] <= res["b"] <= res["b_hi"]
+
+
+def test_compare_many_same_with_workers():
+    rng = np.random.default_rng(3)
+    comparisons = [
+        {"comparison": f"비교{i}", "metric": "audi_share", "group_a": "A", "group_b": "B",
+         "a": rng.random(rng.integers(5, 40)), "b": rng.random(rng.integers(5, 40))}
+        for i in range(3)
+    ]
+    kwargs = dict(n_boot=300, n_perm=300, seed=42)
+
+    one = compare_many(comparisons, workers=1, **kwargs)
+    two = compare_many(comparisons, workers=2, **kwargs)
+    pd.testing.assert_frame_equal(one, two)
+    assert len(one) == len(comparisons) * 2   # 비교 × (mean, median)
+
+    # 시드가 같으면 다시 돌려도 같고, 다르면 구간이 달라짐
+    pd.testing.assert_frame_equal(one, compare_many(comparisons, workers=1, **kwargs))
+    other = compare_many(comparisons, workers=1, **(kwargs | {"seed": 43}))
+    assert not np.allclose(one["a_lo"], other["a_lo"])
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pandas as pd
+
+import update_year
+
+STATE = {
+    "2024": {"source": "a", "base": [1, 2]},
+    "2025": {"source": "b", "base": [3, 4]},
+}
+
+
+def test_deferred_years():
+    failed = pd.DataFrame({
+        "year": ["2024", "2025", "", "2025"],
+        "reason": ["no_movieCd", "deferred", "deferred", "request_error"],
+    })
+    assert update_year.deferred_years(failed) == [2025]
+
+
+def test_partial_year_is_not_recorded(tmp_path, monkeypatch):
+    # 2025년은 02에서 미룬 영화가 남음 → 매니페스트에 안 적히고(예전 기록도 지움) 다음 plan()에서 다시 잡힘
+    monkeypatch.setattr(update_year, "MANIFEST_FILE", tmp_path / "manifest.json")
+    monkeypatch.setattr(update_year, "current_state", lambda: STATE)
+    monkeypatch.setattr(update_year, "master_years", lambda: {2024, 2025})
+    monkeypatch.setattr(update_year, "update", lambda full, share_only, resume: [2025])
+    update_year.save_manifest(STATE)
+
+    update_year.main(years=[2024, 2025])
+    assert update_year.load_manifest() == {"2024": STATE["2024"]}
+    assert update_year.plan(STATE, update_year.load_manifest()) == ([2025], [])
+
+    # 다음 실행에서 다 끝나면 기록됨
+    monkeypatch.setattr(update_year, "update", lambda full, share_only, resume: [])
+    update_year.main()
+    assert update_year.load_manifest() == STATE
+    assert update_year.plan(STATE, update_year.load_manifest()) == ([], [])
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from year_trend import CAGR_COLUMNS, YearTrend
+
+
+def assert_same_table(got: YearTrend, want: YearTrend) -> None:
+    # CAGR 거듭제곱은 경로에 따라 마지막 자리 정도 차이
+    pd.testing.assert_frame_equal(got.table(), want.table(), check_exact=False, rtol=1e-12)
+
+
+@pytest.fixture
+def df2(make_master):
+    # 일본 애니가 없는 연도가 중간에 끼게: 2017, 2020년은 일본 애니 행 제거
+    df2 = make_master(np.random.default_rng(5), n_rows=300)
+    jp = df2["is_animation"] & df2["is_japan"]
+    return df2[~(jp & df2["year"].isin([2017, 2020]))].reset_index(drop=True)
+
+
+def test_append_matches_from_master(df2):
+    full = YearTrend.from_master(df2)
+
+    one_by_one = YearTrend()
+    for year in sorted(df2["year"].unique()):
+        one_by_one.upsert(df2[df2["year"] == year])
+    assert_same_table(one_by_one, full)
+
+    # 중간 연도를 나중에 다시 넣어도(뒤쪽 다시 쌓기) 같음
+    shuffled = YearTrend()
+    for year in [2019, 2015, 2025, 2016, 2020, 2017, 2018, 2021, 2024, 2022, 2023]:
+        shuffled.upsert(df2[df2["year"] == year])
+    assert_same_table(shuffled, full)
+
+
+def test_cagr_on_yearly_values():
+    # 일본 애니 관객: 2015년 0 → 2016년 100 → 2017년 0 → 2018년 400 → 2019년 800
+    years = [2015, 2016, 2017, 2018, 2019]
+    audi = [0, 100, 0, 400, 800]
+    df2 = pd.DataFrame({
+        "year": years,
+        "is_animation": True,
+        "is_japan": True,
+        "audi_share": 0.1,
+        "sales_share": 0.1,
+        "audiAcc": audi,
+        "salesAcc": [a * 10 for a in audi],
+        "total_audience": 10_000,
+        "total_sales": 100_000,
+    })
+    # 기준은 처음 0보다 큰 2016년: 2018년 (400/100)^(1/2) - 1 = 1.0, 2019년 (800/100)^(1/3) - 1 = 1.0
+    # 첫 해 이전, 기준 연도, 값이 0인 해는 NaN
+    want = [np.nan, np.nan, np.nan, 1.0, 1.0]
+
+    full = YearTrend.from_master(df2)
+    one_by_one = YearTrend()
+    for year in years:
+        one_by_one.upsert(df2[df2["year"] == year])
+    for trend in (full, one_by_one):
+        t = trend.table()
+        for c in CAGR_COLUMNS:
+            np.testing.assert_allclose(t[f"{c}_cagr"], want, rtol=1e-12)
+
+
+def test_save_load_roundtrip(df2, tmp_path):
+    trend = YearTrend.from_master(df2)
+    trend.source = "abc"
+    trend.save(tmp_path / "trend.json")
+
+    loaded = YearTrend.load(tmp_path / "trend.json")
+    assert loaded.source == "abc"
+    assert_same_table(loaded, trend)
+    assert YearTrend.load(tmp_path / "없음.json") is None
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from datetime import date
+
+from movie_text import clean_movieNm, norm_openDt
+
+# =========================
+# 영화명 퍼지 매칭 (문자 n-gram 인덱스)
+# =========================
+# 박스오피스 영화명과 KOBIS 목록 영화명이 구두점/부제/띄어쓰기 때문에
+# 완전일치가 안 되는 경우를 위해, 후보들을 메모리에서 점수 매겨 고른다.
+# - 제목 유사도: 문자 2-gram 집합의 Dice 계수 / 포함 관계(부제 붙은 제목) 중 큰 값
+# - 개봉일이 가까울수록 가산점, 개봉연도가 MAX_YEAR_GAP년 넘게 차이나면 후보에서 뺌
+#   (리메이크/재개봉작은 제목이 같거나 거의 같아서 점수만으로는 못 거름)
+# 추가 API 검색 없이, 이미 받은 후보 목록이나 로컬 카탈로그만 대상으로 함.
+
+NGRAM = 2
+MIN_SCORE = 0.6          # 이 점수 미만이면 '못 찾음'으로 처리
+DATE_WEIGHT = 0.2        # 최종 점수에서 개봉일 근접도 비중
+DATE_SCALE_DAYS = 365    # 이 일수 이상 차이나면 근접도 0
+CONTAINMENT_WEIGHT = 0.9 # 한쪽 제목이 다른 쪽에 통째로 들어 있을 때(부제 등) 인정 비율
+MAX_YEAR_GAP = 1         # 개봉연도가 이보다 더 차이나면 다른 영화로 봄 (둘 다 연도를 알 때만, 연말 개봉/시사회 날짜 차이는 허용)
+MIN_CONTAINMENT_NGRAMS = 4  # 짧은 쪽 n-gram이 이보다 적으면 포함 점수를 그 비율만큼 깎음 ('코난' 같은 짧은 제목이 아무 부제에나 걸리는 것 방지)
+
+_RE_NON_WORD = re.compile(r"[\W_]+")
+
+def match_key(name: str) -> str:
+    """비교용 제목 키: 정리 후 소문자, 공백/구두점 제거"""
+    return _RE_NON_WORD.sub("", clean_movieNm(name).lower())
+
+def char_ngrams(key: str, n: int = NGRAM) -> set[str]:
+    if len(key) <= n:
+        return {key} if key else set()
+    return {key[i:i + n] for i in range(len(key) - n + 1)}
+
+def title_similarity(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    dice = 2 * common / (len(a) + len(b))
+    shorter = min(len(a), len(b))
+    containment = common / shorter * min(1.0, shorter / MIN_CONTAINMENT_NGRAMS)
+    return max(dice, CONTAINMENT_WEIGHT * containment)
+
+def _to_date(openDt_norm: str) -> date | None:
+    if len(openDt_norm) != 8:
+        return None
+    try:
+        return date(int(openDt_norm[:4]), int(openDt_norm[4:6]), int(openDt_norm[6:]))
+    except ValueError:
+        return None
+
+def open_year(openDt_norm: str) -> int | None:
+    """YYYYMMDD(또는 YYYY…) → 개봉연도, 모르면 None"""
+    head = openDt_norm[:4]
+    return int(head) if len(head) == 4 and head.isdigit() else None
+
+def date_proximity(a: str, b: str) -> float:
+    """두 YYYYMMDD 개봉일이 가까울수록 1에 가까움 (날짜를 모르면 중간값 0.5)"""
+    da, db = _to_date(a), _to_date(b)
+    if da is None or db is None:
+        return 0.5
+    return max(0.0, 1 - abs((da - db).days) / DATE_SCALE_DAYS)
+
+
+class NgramIndex:
+    """
+    후보 영화 목록(dict: movieCd / movieNm / openDt ...)에 대한 문자 n-gram 역색인
+    best()는 n-gram이 하나라도 겹치는 후보만 점수 계산한다.
+    개봉일을 주면 개봉연도가 MAX_YEAR_GAP년 넘게 차이나는 후보는 뺀다.
+    """
+
+    def __init__(self, movies: list[dict]):
+        self.movies = movies
+        self._grams: list[set[str]] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+
+        for i, m in enumerate(movies):
+            grams = char_ngrams(match_key(m.get("movieNm", "")))
+            self._grams.append(grams)
+            for g in grams:
+                self._postings[g].append(i)
+
+    def scored(self, movieNm: str, openDt_norm: str = "") -> list[tuple[float, dict]]:
+        """(점수, 후보) 목록을 점수 내림차순으로"""
+        query = char_ngrams(match_key(movieNm))
+        candidates = {i for g in query for i in self._postings.get(g, ())}
+        year = open_year(openDt_norm)
+
+        out = []
+        for i in candidates:
+            movie = self.movies[i]
+            movie_openDt = norm_openDt(movie.get("openDt", ""))
+            movie_year = open_year(movie_openDt)
+            if year is not None and movie_year is not None and abs(movie_year - year) > MAX_YEAR_GAP:
+                continue
+            sim = title_similarity(query, self._grams[i])
+            near = date_proximity(openDt_norm, movie_openDt)
+            out.append(((1 - DATE_WEIGHT) * sim + DATE_WEIGHT * near, movie))
+        out.sort(key=lambda t: t[0], reverse=True)
+        return out
+
+    def best(self, movieNm: str, openDt_norm: str = "", *, min_score: float = MIN_SCORE) -> dict:
+        """가장 점수 높은 후보 (min_score 미만이면 빈 dict)"""
+        scored = self.scored(movieNm, openDt_norm)
+        if not scored or scored[0][0] < min_score:
+            return {}
+        return scored[0][1]
+
+
+_RE_BRACKETS = re.compile(r"\s*[\(\[（][^\)\]）]*[\)\]）]\s*")
+_PREFIXES = ("극장판 ", "劇場版 ")
+
+def title_variants(movieNm: str) -> list[str]:
+    """
+    재검색용 제목 변형들 (원래 제목 포함, 중복 제거)
+    - 괄호 안 내용 제거: '영화 (감독판)' → '영화'
+    - 부제 제거: '본편: 부제' → '본편'
+    - '극장판' 같은 접두어 제거
+    - 띄어쓰기 제거
+    """
+    name = clean_movieNm(movieNm)
+    variants = [name]
+
+    no_brackets = clean_movieNm(_RE_BRACKETS.sub(" ", name))
+    variants.append(no_brackets)
+
+    for v in list(variants):
+        for sep in (":", " - ", "~"):
+            if sep in v:
+                variants.append(v.split(sep)[0].strip())
+
+    for v in list(variants):
+        for prefix in _PREFIXES:
+            if v.startswith(prefix):
+                variants.append(v[len(prefix):].strip())
+
+    variants.append(name.replace(" ", ""))
+    return [v for v in dict.fromkeys(variants) if v]
+
+def pick_candidate(movieNm: str, openDt_norm: str, candidates: list[dict]) -> dict:
+    """
+    검색 후보 목록에서 1개 고르기
+    1) 정리된 영화명 완전일치 (여러 개면 개봉일 가까운 것)
+    2) 없으면 퍼지 점수 최고 후보 (기준 미달이면 빈 dict)
+    """
+    name = clean_movieNm(movieNm)
+    exact = [m for m in candidates if clean_movieNm(m.get("movieNm", "")) == name]
+    if exact:
+        return max(exact, key=lambda m: date_proximity(openDt_norm, norm_openDt(m.get("openDt", ""))))
+    return NgramIndex(candidates).best(movieNm, openDt_norm)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from market_share import MARKET_SHARE_COLUMNS
+from master_codes import compile_tags
+
+# =========================
+# TOP N 조회 인덱스 (04 top_n_movies 일반화)
+# =========================
+# top_n_movies는 호출할 때마다 필터 → 전체 sort_values → head(n)이었다.
+# 여기서는 마스터를 한 번만 연도(파티션)별 · 지표별로 내림차순 정렬해 둔 순위 인덱스를 만들고,
+# 조회는
+#   1) 기간/연도 조건에 맞는 연도 파티션만 고르고
+#   2) 파티션마다 순위 앞에서부터 조금씩 읽으면서 장르 × 국적 비트마스크로 거르고 (n개 모이면 멈춤)
+#   3) 파티션 후보들(최대 n × 파티션 수) 중 argpartition으로 상위 n개만 골라 그 n개만 정렬
+# → 반복 조회 비용이 마스터 크기가 아니라 n에 비례 (조건이 아주 드문 태그면 더 읽게 됨)
+#
+# 사용:
+#   index = TopNIndex(df2)   # encode_master 거친 마스터
+#   index.query("sales_share", 10, period="코로나 이후", genres="애니메이션", nations=["일본", "미국"])
+
+BASE_METRICS = ["audi_share", "sales_share", "audiAcc", "salesAcc"]
+FIRST_CHUNK = 16   # 파티션에서 처음 읽는 개수 (모자라면 두 배씩)
+
+
+class TopNIndex:
+    """
+    df2: encode_master()를 거친 마스터 (장르/국적 조건은 비트마스크로 거름)
+    metrics: 순위 인덱스를 만들 지표 (기본: 점유율/누적 관객·매출 + 시장별 점유율)
+    """
+
+    def __init__(self, df2: pd.DataFrame, metrics: list[str] | None = None):
+        self.df2 = df2
+        self.metrics = metrics or [c for c in BASE_METRICS + MARKET_SHARE_COLUMNS if c in df2.columns]
+
+        years = df2["year"].to_numpy(dtype=int)
+        self.years = np.unique(years)
+        # 연도 → 기간 라벨 (기간은 연도로 정해지니까 파티션 단위로 충분)
+        self.year_period = (
+            pd.Series(df2["period"].astype(str).to_numpy(), index=years)
+              .groupby(level=0).first()
+              .to_dict()
+        )
+
+        # 장르 × 국적 조건별로 만든 비트마스크 검사 함수 (같은 조건 반복 조회 때 재사용)
+        self._filters = {}
+
+        # 지표별 {연도: 그 해 행 위치를 지표 내림차순으로} (결측은 빼 둠)
+        self._ranks = {}
+        self._values = {}
+        for m in self.metrics:
+            values = df2[m].to_numpy(dtype=float)
+            pos = np.flatnonzero(~np.isnan(values))
+            order = pos[np.lexsort((-values[pos], years[pos]))]
+            bounds = np.searchsorted(years[order], self.years, side="right")[:-1]
+            self._ranks[m] = dict(zip(self.years.tolist(), np.split(order, bounds)))
+            self._values[m] = values
+
+    def partitions(self, *, period=None, years=None) -> list[int]:
+        """기간/연도 조건에 맞는 연도 파티션 목록"""
+        periods = {period} if isinstance(period, str) else (set(period) if period is not None else None)
+        wanted = {years} if isinstance(years, (int, np.integer)) else (set(years) if years is not None else None)
+        return [
+            y for y in self.years.tolist()
+            if (periods is None or self.year_period[y] in periods)
+            and (wanted is None or y in wanted)
+        ]
+
+    def query_rows(
+        self,
+        metric: str = "audi_share",
+        n: int = 10,
+        *,
+        period: str | list[str] | None = None,
+        years: int | list[int] | None = None,
+        genres: str | list[str] | None = None,
+        nations: str | list[str] | None = None,
+        match: str = "any",
+    ) -> np.ndarray:
+        """조건에 맞는 metric 상위 n개 행 위치 (내림차순)"""
+        if metric not in self._ranks:
+            raise ValueError(f"순위 인덱스가 없는 지표입니다: {metric!r} (가능: {self.metrics})")
+        if n <= 0:
+            return np.empty(0, dtype=int)
+
+        filtered = genres is not None or nations is not None
+        hits = self._filter(genres, nations, match) if filtered else None
+        candidates = []
+        for y in self.partitions(period=period, years=years):
+            ranked = self._ranks[metric][y]
+            if not filtered:
+                candidates.append(ranked[:n])
+                continue
+
+            # 순위 앞에서부터 조금씩 읽으면서 거름 (n개 모이면 멈춤)
+            found, start, chunk = [], 0, max(FIRST_CHUNK, n)
+            while start < len(ranked) and sum(map(len, found)) < n:
+                rows = ranked[start:start + chunk]
+                found.append(rows[hits(rows)])
+                start += chunk
+                chunk *= 2
+            if found:
+                candidates.append(np.concatenate(found)[:n])
+
+        if not candidates:
+            return np.empty(0, dtype=int)
+        rows = np.concatenate(candidates)
+
+        # 후보 중 상위 n개만 부분 선택 → 그 n개만 정렬 (동점이면 행 순서)
+        # n번째 값과 동점인 후보는 argpartition이 아무거나 골라서, n번째 값 이상을 전부 남기고 정렬 후 자름
+        values = self._values[metric][rows]
+        if len(rows) > n:
+            kth = -np.partition(-values, n - 1)[n - 1]
+            keep = values >= kth
+            rows, values = rows[keep], values[keep]
+        return rows[np.lexsort((rows, -values))][:n]
+
+    def _filter(self, genres, nations, match):
+        key = (_tags_key(genres), _tags_key(nations), match)
+        if key not in self._filters:
+            self._filters[key] = compile_tags(self.df2, genres=genres, nations=nations, match=match)
+        return self._filters[key]
+
+    def query(self, metric: str = "audi_share", n: int = 10, **filters) -> pd.DataFrame:
+        """query_rows 결과를 마스터 행으로 (filters: period / years / genres / nations / match)"""
+        return self.df2.iloc[self.query_rows(metric, n, **filters)]
+
+
+def _tags_key(tags):
+    """장르/국적 조건 → 필터 캐시 키 (리스트는 해시가 안 돼서 튜플로)"""
+    if tags is None or isinstance(tags, str):
+        return tags
+    return tuple(tags)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from stages import load_stage
+import pandas as pd
+
+from storage import file_digest, read_frame
+from year_trend import YearTrend
+
+# =========================
+# 연도 단위 증분 갱신 (01 → 02 → 03을 바뀐 연도만)
+# =========================
+# 새 연도 파일(KOBIS_연도별박스오피스_2026.xls)이 들어오거나 어떤 연도 파일이 바뀌었을 때
+# 전체를 다시 돌리지 않고 그 연도만
+#   01: 그 연도 파일만 파싱해서 Top30 교체
+#   02: 그 연도 행만 KOBIS 조회해서 결과 교체
+#   03: 그 연도 점유율만 다시 계산해서 마스터 교체
+# 연도별 총 관객수/매출액 표에서 어떤 연도 숫자만 바뀐 경우는 03만 그 연도 다시 계산.
+#
+# 어떤 연도가 바뀌었는지는 매니페스트(연도별 원본 파일 해시 + 그 해 전체 시장 숫자)로 판단한다.
+# 02에서 API 한도/장애로 미룬 영화가 남은 연도는 매니페스트에 안 적음 → 다음 실행 때 다시 잡힘
+# 연도별 추이(year_trend.py) 상태도 같이 들고 있다가 다시 계산한 연도만 반영한다.
+#
+# 사용:
+#   python update_year.py              # 새로 생기거나 바뀐 연도만 자동으로
+#   python update_year.py --year 2026  # 이 연도만 강제로 다시
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+
+MANIFEST_FILE = DATA_DIR / ".cache" / "year_manifest.json"
+TREND_FILE = DATA_DIR / ".cache" / "year_trend.json"
+
+
+def load_manifest() -> dict[str, dict] | None:
+    if not MANIFEST_FILE.exists():
+        return None
+    return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+
+def save_manifest(manifest: dict[str, dict]) -> None:
+    MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_FILE.with_name(MANIFEST_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(MANIFEST_FILE)
+
+def current_state() -> dict[str, dict]:
+    """연도별 {source: 박스오피스 파일 해시, base: [그 해 전체 매출액, 전체 관객수]}"""
+    stage01, stage03 = load_stage("01"), load_stage("03")
+
+    base = stage03.load_year_base(stage03.YEAR_FILE).set_index("year")
+    state = {}
+    for year, path in stage01.find_year_files(stage01.DATA_DIR):
+        row = base.loc[year, ["total_sales", "total_audience"]].tolist() if year in base.index else None
+        state[str(year)] = {"source": file_digest(path), "base": row}
+    return state
+
+def master_digest(master: Path) -> str | None:
+    """마스터 파일 해시 (parquet가 없으면 예전 xlsx, 둘 다 없으면 None)"""
+    for path in (master, master.with_suffix(".xlsx")):
+        if path.exists():
+            return file_digest(path)
+    return None
+
+def master_years() -> set[int]:
+    try:
+        return set(read_frame(load_stage("03").OUTPUT_FILE)["year"].dropna().astype(int))
+    except FileNotFoundError:
+        return set()
+
+def plan(state: dict[str, dict], manifest: dict[str, dict] | None) -> tuple[list[int], list[int]]:
+    """
+    return: (01~03 전부 다시 할 연도, 03만 다시 할 연도)
+    매니페스트가 없으면(처음 실행) 지금 마스터에 있는 연도는 최신이라고 보고 기록만 함
+    """
+    in_master = master_years()
+    if manifest is None:
+        manifest = {y: s for y, s in state.items() if int(y) in in_master}
+
+    full, share_only = [], []
+    for y, s in state.items():
+        old = manifest.get(y)
+        if old is None or int(y) not in in_master or old["source"] != s["source"]:
+            full.append(int(y))
+        elif old["base"] != s["base"]:
+            share_only.append(int(y))
+    return sorted(full), sorted(share_only)
+
+def deferred_years(failed: pd.DataFrame) -> list[int]:
+    """02 실패 로그에서 미룬(deferred) 영화가 남아 있는 연도"""
+    years = pd.to_numeric(failed.loc[failed["reason"].eq("deferred"), "year"], errors="coerce")
+    return sorted(set(years.dropna().astype(int)))
+
+def update(full: list[int], share_only: list[int], *, resume: bool = False) -> list[int]:
+    """return: 02가 다 못 끝낸(미룬 영화가 남은) 연도"""
+    partial = []
+    if full:
+        print(f"▶ 01~03 다시 실행: {full}")
+        load_stage("01").main(years=full)
+        partial = deferred_years(load_stage("02").main(resume=resume, years=full))
+    recompute = sorted(set(full) | set(share_only))
+    if recompute:
+        print(f"▶ 03 점유율 다시 계산: {recompute}")
+        stage03 = load_stage("03")
+        before = master_digest(stage03.OUTPUT_FILE)
+        stage03.main(years=recompute)
+        update_trend(recompute, before)
+    return partial
+
+def update_trend(years: list[int], before: str | None = None) -> YearTrend:
+    """
+    연도별 추이 상태에 다시 계산한 연도만 반영
+    before: 03을 돌리기 전 마스터 해시. 상태에 적힌 해시와 다르면
+            (상태가 없음 / 그 사이 03 전체 실행·pipeline 등으로 마스터가 바뀜) 마스터 전체로 다시 만듦
+    """
+    master = load_stage("03").OUTPUT_FILE
+    trend = YearTrend.load(TREND_FILE)
+    if trend is None or trend.source is None or trend.source != before:
+        trend = YearTrend.from_master(read_frame(master))
+    else:
+        trend.upsert(read_frame(master, years=years))
+    trend.source = master_digest(master)
+    trend.save(TREND_FILE)
+
+    cols = ["year", "jp_anim_count", "jp_sum_audi_share", f"jp_sum_audi_share_ma{trend.window}", "jp_sum_audi_share_yoy", "cum_jp_audi_share"]
+    print("▶ 연도별 추이 (최근 연도)")
+    print(trend.table().loc[:, cols].tail(len(years) + 1).to_string(index=False))
+    return trend
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="바뀐 연도만 01 → 02 → 03 다시 실행해서 마스터 갱신")
+    parser.add_argument("--year", type=int, nargs="+", dest="years", help="자동 감지 대신 이 연도만 강제로 다시")
+    parser.add_argument("--resume", action="store_true", help="02를 지난 체크포인트에서 이어서")
+    return parser.parse_args()
+
+def main(years: list[int] | None = None, resume: bool = False):
+    state = current_state()
+
+    if years is not None:
+        full, share_only = sorted(years), []
+    else:
+        full, share_only = plan(state, load_manifest())
+
+    partial = []
+    if not full and not share_only:
+        print("✅ 바뀐 연도가 없어요 (마스터 최신)")
+    else:
+        partial = update(full, share_only, resume=resume)
+
+    # 다 끝난 뒤에만 기록 → 중간에 실패하면 다음 실행 때 같은 연도를 다시 잡음
+    # 02에서 미룬 영화가 남은 연도도 빼 둠 (예전 기록도 지워야 다음 plan()에서 다시 잡힘)
+    manifest = load_manifest() or {}
+    in_master = master_years()
+    manifest.update({y: s for y, s in state.items() if int(y) in in_master and int(y) not in partial})
+    for y in partial:
+        manifest.pop(str(y), None)
+    save_manifest(manifest)
+    if partial:
+        print(f"⚠️ 02에서 미룬 영화가 남은 연도 {partial}는 다음 실행 때 다시 해요 (python update_year.py --resume)")
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(years=args.years, resume=args.resume)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import bisect
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# 연도별 추이 엔진 (04 trend_jp_animation_by_year + 이동평균/전년 대비/CAGR/누적 점유율)
+# =========================
+# 일본 애니(애니 & 일본)의 연도별 집계만 들고 있다가
+#   - 마스터 전체로 만들 때(from_master): 연도별 집계 한 번 + 파생 지표는 누적합 기반 벡터 연산
+#   - 연도가 새로 붙을 때(upsert): 그 연도 행만 집계해서 뒤에 붙이고, 파생 지표는 직전 값/누적합으로 바로 계산
+#     (지표마다 O(1), 마스터 전체를 다시 groupby 안 함)
+#   - 중간 연도가 바뀌면 그 연도부터 뒤쪽만 다시 계산
+# 두 경로의 결과는 같음 (둘 다 같은 순서로 누적합을 쌓음, CAGR 거듭제곱만 마지막 자리 정도 차이)
+#
+# 상태는 json으로 저장/로드 가능 (update_year.py가 바뀐 연도만 반영할 때 씀)
+
+WINDOW = 3   # 이동평균 연도 수 (앞쪽 연도는 있는 만큼만 평균)
+
+# 연도별 기본 집계
+BASE_COLUMNS = [
+    "jp_anim_count",
+    "jp_audi_share_count", "jp_sum_audi_share",
+    "jp_sales_share_count", "jp_sum_sales_share",
+    "jp_audiAcc", "jp_salesAcc",
+    "total_audience", "total_sales",
+]
+MA_COLUMNS = ["jp_anim_count", "jp_sum_audi_share", "jp_sum_sales_share"]     # 이동평균 + 전년 대비
+CAGR_COLUMNS = ["jp_audiAcc", "jp_salesAcc"]                                   # 그해 값의 연평균 성장률 (첫 흥행 연도 대비)
+CUM_SHARES = {                                                                 # 누적 점유율 = 누적 분자 / 누적 분모
+    "cum_jp_audi_share": ("jp_audiAcc", "total_audience"),
+    "cum_jp_sales_share": ("jp_salesAcc", "total_sales"),
+}
+CUM_COLUMNS = MA_COLUMNS + [c for pair in CUM_SHARES.values() for c in pair]
+
+
+def year_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """마스터(또는 일부 연도 행) → 연도별 BASE_COLUMNS (연도 오름차순)"""
+    jp = df["is_animation"].astype(bool) & df["is_japan"].astype(bool)
+    year = df["year"].astype(int)
+    parts = pd.DataFrame({
+        "year": year,
+        "jp_anim_count": jp.astype(int),
+        "jp_audi_share_count": (jp & df["audi_share"].notna()).astype(int),
+        "jp_sum_audi_share": df["audi_share"].where(jp, 0).fillna(0),
+        "jp_sales_share_count": (jp & df["sales_share"].notna()).astype(int),
+        "jp_sum_sales_share": df["sales_share"].where(jp, 0).fillna(0),
+        "jp_audiAcc": df["audiAcc"].where(jp, 0).fillna(0),
+        "jp_salesAcc": df["salesAcc"].where(jp, 0).fillna(0),
+    })
+    out = parts.groupby("year", sort=True).sum()
+    # 전체 시장은 연도당 한 값 (행마다 같은 값이 붙어 있음)
+    out[["total_audience", "total_sales"]] = df.groupby(year)[["total_audience", "total_sales"]].first()
+    return out.reset_index()[["year", *BASE_COLUMNS]]
+
+
+class YearTrend:
+    """
+    years / base(연도별 집계) / cum(누적합)을 리스트로 들고, 파생 지표도 연도마다 한 번만 계산해 쌓아 둠
+    table()로 04 출력용 DataFrame
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self.years: list[int] = []
+        self.base: dict[str, list[float]] = {c: [] for c in BASE_COLUMNS}
+        self.cum: dict[str, list[float]] = {c: [] for c in CUM_COLUMNS}
+        self.derived: dict[str, list[float]] = {c: [] for c in self.derived_columns()}
+        self._cagr_base: dict[str, int | None] = {c: None for c in CAGR_COLUMNS}   # 그해 값이 처음으로 0보다 큰 연도 위치
+        self.source: str | None = None   # 이 상태를 만든 마스터 파일 해시 (update_year.py가 기록/비교)
+
+    def derived_columns(self) -> list[str]:
+        return (
+            ["jp_avg_audi_share", "jp_avg_sales_share"]
+            + [f"{c}_ma{self.window}" for c in MA_COLUMNS]
+            + [f"{c}_yoy" for c in MA_COLUMNS]
+            + [f"{c}_cagr" for c in CAGR_COLUMNS]
+            + list(CUM_SHARES)
+        )
+
+    # ---- 마스터 전체로 한 번에 (벡터 연산)
+    @classmethod
+    def from_master(cls, df2: pd.DataFrame, window: int = WINDOW) -> "YearTrend":
+        trend = cls(window)
+        agg = year_aggregates(df2)
+        trend.years = agg["year"].tolist()
+        trend.base = {c: agg[c].astype(float).tolist() for c in BASE_COLUMNS}
+        trend._derive_all()
+        return trend
+
+    def _derive_all(self) -> None:
+        """base 전체에서 cum / derived를 벡터 연산으로 다시 만듦"""
+        base = {c: np.asarray(v, dtype=float) for c, v in self.base.items()}
+        years = np.asarray(self.years, dtype=float)
+        n, w = len(years), self.window
+        cum = {c: np.cumsum(base[c]) for c in CUM_COLUMNS}
+        self.cum = {c: v.tolist() for c, v in cum.items()}
+
+        d = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            d["jp_avg_audi_share"] = base["jp_sum_audi_share"] / base["jp_audi_share_count"]
+            d["jp_avg_sales_share"] = base["jp_sum_sales_share"] / base["jp_sales_share_count"]
+
+            # 이동평균: 누적합 차이 / 창 안 연도 수
+            span = np.minimum(np.arange(1, n + 1), w)
+            for c in MA_COLUMNS:
+                before = np.concatenate([np.zeros(min(w, n)), cum[c][:-w]]) if n > w else np.zeros(n)
+                d[f"{c}_ma{w}"] = (cum[c] - before) / span
+            for c in MA_COLUMNS:
+                d[f"{c}_yoy"] = np.concatenate([[np.nan], np.diff(base[c])]) if n else np.empty(0)
+
+            # CAGR: 그해 값이 처음으로 0보다 큰 연도 대비 그해 값의 연평균 성장률
+            # (일본 애니가 없는 해는 값이 0 → -100% 대신 NaN)
+            for c in CAGR_COLUMNS:
+                positive = np.flatnonzero(base[c] > 0)
+                self._cagr_base[c] = int(positive[0]) if len(positive) else None
+                out = np.full(n, np.nan)
+                if len(positive):
+                    i0 = positive[0]
+                    later = (np.arange(n) > i0) & (base[c] > 0)
+                    out[later] = (base[c][later] / base[c][i0]) ** (1 / (years[later] - years[i0])) - 1
+                d[f"{c}_cagr"] = out
+
+            for name, (num, den) in CUM_SHARES.items():
+                d[name] = cum[num] / cum[den]
+
+        self.derived = {c: d[c].tolist() for c in self.derived_columns()}
+
+    # ---- 연도 하나씩 (O(1))
+    def _append(self, year: int, row: dict[str, float]) -> None:
+        t, w = len(self.years), self.window
+        self.years.append(year)
+        for c in BASE_COLUMNS:
+            self.base[c].append(float(row[c]))
+        for c in CUM_COLUMNS:
+            prev = self.cum[c][-1] if t else 0.0
+            self.cum[c].append(prev + float(row[c]))
+
+        base, cum, d = self.base, self.cum, self.derived
+        d["jp_avg_audi_share"].append(_div(base["jp_sum_audi_share"][t], base["jp_audi_share_count"][t]))
+        d["jp_avg_sales_share"].append(_div(base["jp_sum_sales_share"][t], base["jp_sales_share_count"][t]))
+        for c in MA_COLUMNS:
+            before = cum[c][t - w] if t >= w else 0.0
+            d[f"{c}_ma{w}"].append((cum[c][t] - before) / min(t + 1, w))
+        for c in MA_COLUMNS:
+            d[f"{c}_yoy"].append(base[c][t] - base[c][t - 1] if t else np.nan)
+        for c in CAGR_COLUMNS:
+            i0 = self._cagr_base[c]
+            if i0 is None:
+                if base[c][t] > 0:
+                    self._cagr_base[c] = t
+                d[f"{c}_cagr"].append(np.nan)
+            elif base[c][t] > 0:
+                d[f"{c}_cagr"].append((base[c][t] / base[c][i0]) ** (1 / (year - self.years[i0])) - 1)
+            else:
+                d[f"{c}_cagr"].append(np.nan)
+        for name, (num, den) in CUM_SHARES.items():
+            d[name].append(_div(cum[num][t], cum[den][t]))
+
+    def _truncate(self, pos: int) -> None:
+        """pos 위치(포함)부터 뒤를 버림"""
+        del self.years[pos:]
+        for store in (self.base, self.cum, self.derived):
+            for v in store.values():
+                del v[pos:]
+        for c, i0 in self._cagr_base.items():
+            if i0 is not None and i0 >= pos:
+                self._cagr_base[c] = None
+
+    def upsert(self, df_years: pd.DataFrame) -> list[int]:
+        """
+        df_years: 마스터에서 몇 개 연도 행만 (03 --year 결과 등)
+        마지막 연도 뒤에 붙는 연도는 그냥 append (지표마다 O(1))
+        중간 연도가 바뀌면 그 연도부터 뒤쪽만 다시 쌓음
+        return: 반영한 연도
+        """
+        agg = year_aggregates(df_years)
+        if agg.empty:
+            return []
+        changed = {int(r["year"]): r for _, r in agg.iterrows()}
+
+        # 바뀐 연도 중 제일 앞 연도 위치부터 다시 (새 연도만 붙는 경우면 맨 끝 → 기존 연도는 안 건드림)
+        pos = bisect.bisect_left(self.years, min(changed))
+        # 뒤쪽 기존 연도는 집계를 그대로 다시 씀 (바뀐 연도만 새 집계)
+        tail = {y: {c: self.base[c][i] for c in BASE_COLUMNS} for i, y in enumerate(self.years[pos:], start=pos)}
+        tail.update(changed)
+        self._truncate(pos)
+        for y in sorted(tail):
+            self._append(y, tail[y])
+        return sorted(changed)
+
+    def table(self) -> pd.DataFrame:
+        return pd.DataFrame({"year": self.years, **self.base, **self.derived})
+
+    # ---- 저장 / 로드
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {"window": self.window, "source": self.source, "years": self.years, "base": self.base}
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "YearTrend | None":
+        if not path.exists():
+            return None
+        state = json.loads(path.read_text(encoding="utf-8"))
+        trend = cls(state["window"])
+        trend.source = state.get("source")   # 예전 상태 파일엔 없음 → None (다시 만들게 됨)
+        # 저장은 연도별 집계만, 파생 지표는 로드할 때 한 번에
+        trend.years = state["years"]
+        trend.base = state["base"]
+        trend._derive_all()
+        return trend
+
+
+def _div(a: float, b: float) -> float:
+    """numpy 나눗셈과 같은 결과 (0/0 → nan, x/0 → ±inf)"""
+    if b:
+        return a / b
+    return math.nan if a == 0 else math.copysign(math.inf, a)